@@ -1,17 +1,23 @@
+from __future__ import annotations
+
 from typing import Any, Union, Optional, Iterable
 
 from attribute_management import NamedAttribute, AttributeAddress, SingleAttribute, ComplexAttributeManagementCommand, \
-    AttributeCommand, AttributeIndex, ListAttribute, UnaryAttribute, StrSingleAttribute
+    AttributeCommand, AttributeIndex, ListAttribute, UnaryAttribute, StrSingleAttribute, ObjSingleAttribute
 from descr_value_checkers import ValueChecker, DEFAULT_VALUE_CHECKER, ValueInSetChecker, \
     ValueStrIsPositiveNumberChecker, ValueAddressChecker
 from descr_value_suggesters import Suggester, DEFAULT_VALUE_SUGGESTER, InterstationDirectiveSuggester, \
-    EqualOtherAttributeSuggester, ConstSuggester, AddressSuggester
+    EqualOtherAttributeSuggester, ConstSuggester, AddressSuggester, CachedSuggestion
 from descr_value_presentation import Presentation, DEFAULT_PRESENTATION
 from attr_manage_group import AttributeManagementGroup
 from attribute_address_access import cyclic_find, NotValidIndexException
+from config import DEFAULT_SPARSE_ATTRIBUTES
+from instrumentation import instrumented
 
 
 class AttributeAccessRulesDescriptor:
+    deferred_checks: Optional[dict[StrSingleAttribute, AttributeAccessRulesDescriptor]] = None
+    sparse: bool = DEFAULT_SPARSE_ATTRIBUTES
 
     def __init__(self,
                  is_list: bool = False,
@@ -47,67 +53,137 @@ class AttributeAccessRulesDescriptor:
 
     def __set_name__(self, owner, name):
         self.name = name
+        self.storage_name = "_{}".format(name)
 
+    @instrumented("descriptor.get")
     def __get__(self, instance, owner):
         if not instance:
             return self
-        if not hasattr(instance, "_{}".format(self.name)):
-            self.init_attr_in_object(instance)
-        self.value_suggester.eval_possible_values(instance)
-        return getattr(instance, "_{}".format(self.name))
+        if self.is_materialized(instance):
+            named_attr = instance.__dict__[self.storage_name]
+        elif self.sparse:
+            named_attr = self.make_named_attr(instance)
+        else:
+            named_attr = self.init_attr_in_object(instance)
+        return named_attr
 
+    @instrumented("descriptor.set")
     def __set__(self, instance, command: ComplexAttributeManagementCommand):
-        if not hasattr(instance, "_{}".format(self.name)):
-            self.init_attr_in_object(instance)
+        instance.version += 1
+        self.materialized(instance)
         command_, attr_address, value = command.command, command.attrib_address, command.value
         if command_ == AttributeCommand.set_single:
             """ index is already exists """
-            cycle_named_attr, single_attrib, obj, slice_address = cyclic_find(instance, attr_address, True)
-            if not (obj is instance):
-                setattr(obj, slice_address.get_first_attr_name(),
-                        ComplexAttributeManagementCommand(command=command_, attrib_address=slice_address, value=value))
-                return
-            if not single_attrib:
-                self.new_attr_operations(instance, cycle_named_attr)
+            single_attrib = instance.str_attr(attr_address)
+            if single_attrib is None:
                 cycle_named_attr, single_attrib, obj, slice_address = cyclic_find(instance, attr_address, True)
-            sa_type = cycle_named_attr.single_attribute_type
-            if issubclass(sa_type, str):
-                single_attrib: StrSingleAttribute
-                single_attrib.last_input_value = value
-                single_attrib.is_suggested = False
-                single_attrib.error_message = ""
-                if (not value) or value.isspace():
-                    if single_attrib.needs_in_suggestion:
-                        self.suggest(instance, single_attrib)
-                    else:
-                        single_attrib.displaying_value = ""
-                        self.form_file_presentation(single_attrib)
-                else:
-                    single_attrib.displaying_value = single_attrib.last_input_value
-                    self.form_file_presentation(single_attrib)
-                    self.check_value(single_attrib, value)
-                self.equal_others_suggesters_handling(instance)
-                if not single_attrib.possible_str_value_storages:
-                    self.possible_values_binding(single_attrib)
+                if (not single_attrib) and (obj is instance):
+                    self.new_stored_attr_operations(instance, cycle_named_attr)
+                    cycle_named_attr, single_attrib, obj, slice_address = cyclic_find(instance, attr_address, True)
+                if not (obj is instance):
+                    setattr(obj, slice_address.get_first_attr_name(),
+                            ComplexAttributeManagementCommand(command=command_, attrib_address=slice_address,
+                                                              value=value))
+                    return
+            if isinstance(single_attrib, StrSingleAttribute):
+                self.input_value(single_attrib, value)
+                self.complete_input(instance, single_attrib)
+                self.dependents_handling(instance)
             else:
                 assert False
             return
-        else:
-            cycle_named_attr, _, _, _ = cyclic_find(instance, attr_address)
+        cycle_named_attr, _, obj, slice_address = cyclic_find(instance, attr_address)
+        if not (obj is instance):
+            setattr(obj, slice_address.get_first_attr_name(),
+                    ComplexAttributeManagementCommand(command=command_, attrib_address=slice_address, value=value))
+            return
         if command_ == AttributeCommand.append:
             assert isinstance(cycle_named_attr, ListAttribute)
-            self.new_attr_operations(instance, cycle_named_attr)
+            instance.renumber_lists()
+            self.new_stored_attr_operations(instance, cycle_named_attr)
         elif command_ == AttributeCommand.remove:
             assert isinstance(cycle_named_attr, ListAttribute)
-            index = attr_address.attribute_index_list[-1].index
-            cycle_named_attr.remove_existing_sa(index)
+            index = attr_address.attribute_indexes[-1].index
+            instance.list_element_removed(cycle_named_attr, cycle_named_attr.remove_existing_sa(index))
         else:
             assert False
 
+    def input_value(self, single_attrib: StrSingleAttribute, value: str):
+        """ value is stored, suggestion and checks are made by complete_input """
+        single_attrib.last_input_value = value
+        single_attrib.is_suggested = False
+        single_attrib.error_message = ""
+        if value and not value.isspace():
+            single_attrib.displaying_value = value
+            self.form_file_presentation(single_attrib)
+
+    def complete_input(self, instance, single_attrib: StrSingleAttribute):
+        value = single_attrib.last_input_value
+        if (not value) or value.isspace():
+            if single_attrib.needs_in_suggestion:
+                self.suggest(instance, single_attrib)
+            else:
+                single_attrib.displaying_value = ""
+                self.form_file_presentation(single_attrib)
+        else:
+            self.check_value(single_attrib, value)
+        if not single_attrib.possible_str_value_storages:
+            self.possible_values_binding(instance, single_attrib)
+
+    def trusted_load(self, instance, values: list, check: bool = False) -> list[StrSingleAttribute]:
+        """ values of file exported by this tool are stored as input without commands and dependents handling,
+            dicts are loaded by nested objects, returns loaded string attributes """
+        named_attr = self.materialized(instance)
+        loaded = []
+        for i, value in enumerate(values):
+            if isinstance(named_attr, ListAttribute):
+                while named_attr.sa_count <= i:
+                    self.new_stored_attr_operations(instance, named_attr)
+            single_attrib = named_attr.single_attributes[i]
+            if isinstance(single_attrib, ObjSingleAttribute):
+                single_attrib.obj.from_trusted_dict({"data": value}, check)
+                continue
+            value = str(value)
+            self.input_value(single_attrib, value)
+            if (not value) or value.isspace():
+                self.complete_input(instance, single_attrib)
+            elif check:
+                self.check_value(single_attrib, value)
+            loaded.append(single_attrib)
+        return loaded
+
+    def set_loaded_suggestion(self, instance, single_attrib: StrSingleAttribute):
+        """ suggestion shown next to loaded value is renewed after all values are loaded, loaded value stays
+            explicit even if it is equal to suggestion, as value set by command, so later edits of its base
+            attribute do not change it in either load path """
+        suggestion = self.suggestion(instance)
+        if not suggestion:
+            return
+        single_attrib.suggested_value = suggestion
+        single_attrib.is_suggested = False
+
     def form_file_presentation(self, single_attrib: StrSingleAttribute):
         single_attrib.file_value = self.presentation.convert(single_attrib.displaying_value)
 
-    def init_attr_in_object(self, instance):
+    def is_materialized(self, instance) -> bool:
+        return self.storage_name in instance.__dict__
+
+    def materialized(self, instance) -> NamedAttribute:
+        """ stored attribute, for changes that are made not by commands """
+        if self.is_materialized(instance):
+            return instance.__dict__[self.storage_name]
+        return self.init_attr_in_object(instance)
+
+    def init_attr_in_object(self, instance) -> NamedAttribute:
+        named_attr = self.make_named_attr(instance)
+        setattr(instance, self.storage_name, named_attr)
+        for single_attribute in named_attr.single_attributes:
+            if isinstance(single_attribute, StrSingleAttribute):
+                instance.register_str_attr(single_attribute)
+        return named_attr
+
+    def make_named_attr(self, instance) -> NamedAttribute:
+        """ attribute with default (suggested) values, in sparse mode it is made on every read until first write """
         instance_aa: AttributeAddress = instance.obj_addr
         ca_addr = instance_aa.expand(AttributeIndex(self.name, -1))
         named_attr = type(self.named_attribute_template)\
@@ -119,60 +195,95 @@ class AttributeAccessRulesDescriptor:
             count_cycles += 1  # temporary for test - displaying attribute existence
         for _ in range(count_cycles):
             self.new_attr_operations(instance, named_attr)
-        setattr(instance, "_{}".format(self.name), named_attr)
-        self.equal_others_suggesters_binding(self.value_suggester)
+        return named_attr
 
-    def new_attr_operations(self, instance, named_attr):
+    def new_attr_operations(self, instance, named_attr) -> SingleAttribute:
         new_sa = named_attr.append_new_sa()
         if isinstance(new_sa, StrSingleAttribute):
             self.suggest(instance, new_sa)
-        self.possible_values_binding(new_sa)
+            self.possible_values_binding(instance, new_sa)
+        return new_sa
+
+    def new_stored_attr_operations(self, instance, named_attr):
+        new_sa = self.new_attr_operations(instance, named_attr)
+        if isinstance(new_sa, StrSingleAttribute):
+            instance.register_str_attr(new_sa)
 
-    def possible_values_binding(self, str_sa: StrSingleAttribute):
+    def possible_values_binding(self, instance, str_sa: StrSingleAttribute):
         storages = []
         for value_checker in self.value_checkers:
             if isinstance(value_checker, ValueInSetChecker):
                 storages += list(value_checker.storages)
-        sugg_poss_val = self.value_suggester.possible_values
-        if isinstance(self.value_suggester, (EqualOtherAttributeSuggester, ConstSuggester, InterstationDirectiveSuggester, AddressSuggester)):
-            storages.append(sugg_poss_val)
+        if isinstance(self.value_suggester, (EqualOtherAttributeSuggester, InterstationDirectiveSuggester)):
+            storages.append(self.cached_suggestion(instance))
+        elif isinstance(self.value_suggester, (ConstSuggester, AddressSuggester)):
+            storages.append(self.value_suggester.possible_values)
         str_sa.possible_str_value_storages = storages
 
-    def equal_others_suggesters_binding(self, suggester: Suggester):
-        for sugg_cls in {EqualOtherAttributeSuggester, InterstationDirectiveSuggester}:
-            if isinstance(suggester, sugg_cls):
-                common_sugg_dict = sugg_cls.attr_dependencies
-                if self.name not in common_sugg_dict:
-                    common_sugg_dict[self.name] = suggester.attr_name
-
-    def equal_others_suggesters_handling(self, instance):
-        """ only for not list attributes """
-        for sugg_cls in {EqualOtherAttributeSuggester, InterstationDirectiveSuggester}:
-            for key, value in sugg_cls.attr_dependencies.items():
-                if value == self.name:
-                    if hasattr(instance, key):
-                        named_attr: UnaryAttribute = getattr(instance, key)
-                        single_attr: StrSingleAttribute = named_attr.single_attribute
-                        if single_attr.is_suggested:
-                            single_attr.needs_in_suggestion = True
-                            setattr(instance, key, ComplexAttributeManagementCommand(AttributeCommand.set_single,
-                                                                                     single_attr.address,
-                                                                                     ""))
+    def cached_suggestion(self, instance) -> CachedSuggestion:
+        """ for suggesters depending on other attribute of object, one per object attribute """
+        suggestions: dict[str, CachedSuggestion] = instance.suggestions
+        if self.name not in suggestions:
+            suggestions[self.name] = CachedSuggestion(self.value_suggester, instance, self.name)
+        return suggestions[self.name]
+
+    def dependents_handling(self, instance):
+        """ called after change of attribute value, suggested values of dependent attributes are renewed
+            in one pass in topological order, not materialized dependents are suggested on read """
+        schema = type(instance).attr_schema
+        dependents = schema.dependents.get(self.name, ())
+        suggestions: dict[str, CachedSuggestion] = instance.suggestions
+        for attr_name in dependents:
+            if attr_name in suggestions:
+                suggestions[attr_name].invalidate()
+        for attr_name in dependents:
+            schema_item = schema.by_name[attr_name]
+            descriptor: AttributeAccessRulesDescriptor = schema_item.descriptor
+            if schema_item.is_list or (descriptor.sparse and not descriptor.is_materialized(instance)):
+                continue
+            named_attr: UnaryAttribute = getattr(instance, attr_name)
+            single_attr: StrSingleAttribute = named_attr.single_attribute
+            if single_attr.is_suggested:
+                single_attr.last_input_value = ""
+                single_attr.is_suggested = False
+                single_attr.error_message = ""
+                descriptor.suggest(instance, single_attr)
+
+    def suggestion(self, instance) -> str:
+        if isinstance(self.value_suggester, (ConstSuggester, AddressSuggester)):
+            return self.value_suggester.suggest()
+        elif isinstance(self.value_suggester, (EqualOtherAttributeSuggester, InterstationDirectiveSuggester)):
+            return self.cached_suggestion(instance).value
+        return ""
 
     def suggest(self, instance, single_attrib: StrSingleAttribute):
         single_attrib.needs_in_suggestion = False
         if isinstance(self.value_suggester, ConstSuggester):
             single_attrib.displaying_value = single_attrib.suggested_value = self.value_suggester.suggest()
-        elif isinstance(self.value_suggester, EqualOtherAttributeSuggester):
-            single_attrib.displaying_value = single_attrib.suggested_value = self.value_suggester.suggest(instance)
-        elif isinstance(self.value_suggester, InterstationDirectiveSuggester):
-            self.value_suggester.descr_name = self.name
-            single_attrib.displaying_value = single_attrib.suggested_value = self.value_suggester.suggest(instance)
+        elif isinstance(self.value_suggester, (EqualOtherAttributeSuggester, InterstationDirectiveSuggester)):
+            single_attrib.displaying_value = single_attrib.suggested_value = self.cached_suggestion(instance).value
         elif isinstance(self.value_suggester, AddressSuggester):
             single_attrib.displaying_value = single_attrib.suggested_value = self.value_suggester.suggest()
         self.form_file_presentation(single_attrib)
 
+    @classmethod
+    def defer_checks(cls):
+        """ value checks are postponed till run_deferred_checks, e.g. while referenced objects are not imported """
+        cls.deferred_checks = {}
+
+    @classmethod
+    def run_deferred_checks(cls) -> int:
+        deferred_checks, cls.deferred_checks = cls.deferred_checks or {}, None
+        for str_sa, descriptor in deferred_checks.items():
+            value = str_sa.last_input_value
+            if value and not value.isspace():
+                descriptor.check_value(str_sa, value)
+        return len(deferred_checks)
+
     def check_value(self, str_sa: StrSingleAttribute, value: Any):
+        if self.deferred_checks is not None:
+            self.deferred_checks[str_sa] = self
+            return
         for value_checker in self.value_checkers:
             if isinstance(value_checker, ValueInSetChecker):
                 str_sa.error_message = value_checker.check_value(value)
@@ -202,7 +313,7 @@ if __name__ == '__main__':
     print(obj_B.b.__dict__)
     print(obj_B.b.single_attribute_list[0].obj.a)
 
-    address = AttributeAddress(attribute_index_list=[AttributeIndex(attr_name="a"), AttributeIndex()])
+    address = AttributeAddress([AttributeIndex(attr_name="a"), AttributeIndex()])
     command_1 = ComplexAttributeManagementCommand(command=AttributeCommand(AttributeCommand.append),
                                                   attrib_address=address)  #
     command_2 = ComplexAttributeManagementCommand(command=AttributeCommand(AttributeCommand.set_single),
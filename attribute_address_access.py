@@ -11,9 +11,9 @@ class NotValidIndexException(Exception):
 def cyclic_find(start_object, attr_address: AttributeAddress, find_single_attribute: bool = False) -> \
         tuple[NamedAttribute, Optional[SingleAttribute], Any, AttributeAddress]:
     """ returns last NamedAttribute and SingleAttribute in address """
-    ail = attr_address.attribute_index_list
+    ail = attr_address.attribute_indexes
     for i, attr_index in enumerate(ail):
-        slice_attr_addr = attr_address.get_end_slice(attr_index)
+        slice_attr_addr = attr_address.suffix(i)
         attr_name, index = attr_index.attr_name, attr_index.index
         cycle_named_attr = getattr(start_object, attr_name)
         if (len(ail) - 1 == i) and not find_single_attribute:
@@ -36,17 +36,32 @@ def cyclic_find(start_object, attr_address: AttributeAddress, find_single_attrib
 
 
 def set_str_attr(obj, value: str, attr_address: AttributeAddress):
-    attr_name: str = attr_address.attribute_index_list[0].attr_name
+    attr_name: str = attr_address.attribute_indexes[0].attr_name
     setattr(obj, attr_name, ComplexAttributeManagementCommand(AttributeCommand.set_single,
                                                               attr_address,
                                                               value))
 
 
 def get_str_attr(obj, attr_address: AttributeAddress):
-    named_attr, str_single_attr, _, _ = cyclic_find(obj, attr_address, True)
+    str_single_attr = obj.str_attr(attr_address)
+    if str_single_attr is None:
+        named_attr, str_single_attr, _, _ = cyclic_find(obj, attr_address, True)
     return str_single_attr.displaying_value
 
 
+def stored_str_attr(obj, attr_address: AttributeAddress) -> StrSingleAttribute:
+    """ string attribute address points to, attributes on the way are materialized, as descriptor does for
+        set_single command, so flags set on returned attribute are kept for the command """
+    getattr(type(obj), attr_address.get_first_attr_name()).materialized(obj)
+    str_single_attr = obj.str_attr(attr_address)
+    if str_single_attr is None:
+        _, str_single_attr, nested_obj, slice_address = cyclic_find(obj, attr_address, True)
+        if nested_obj is not obj:
+            return stored_str_attr(nested_obj, slice_address)
+    assert isinstance(str_single_attr, StrSingleAttribute)
+    return str_single_attr
+
+
 class AttributeDependence:
     def __init__(self):
         self.base_attr_name = ""
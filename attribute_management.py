@@ -1,13 +1,11 @@
 from __future__ import annotations
 
 from abc import abstractmethod, ABC
-from copy import copy
 from dataclasses import dataclass, field
-from typing import Any, Iterable, Union, Type, Optional
+from typing import Any, Iterable, Union, Type, Optional, NamedTuple
 
 from custom_enum import CustomEnum
 from config import SINGLE_ATTRIBUTE_PROPERTIES, NAMED_ATTRIBUTE_PROPERTIES, ADDRESS, PROPERTIES, INTERNAL_STRUCTURE
-from file_object_conversions import attr_name_from_object_to_file
 
 
 class AttributeCommand(CustomEnum):
@@ -16,51 +14,70 @@ class AttributeCommand(CustomEnum):
     remove = 2
 
 
-class AttributeIndex:
-    def __init__(self, attr_name: str = "", index: int = 0):
-        self.attr_name: str = attr_name
-        self.index: int = index
+class AttributeIndex(NamedTuple):
+    attr_name: str = ""
+    index: int = 0
 
     def to_list(self):
         return [f'{self.attr_name}', self.index]
 
 
 class AttributeAddress:
-    def __init__(self, attribute_index_list: list[AttributeIndex] = None):
-        self.attribute_index_list = attribute_index_list or []
+    """ immutable and interned: equal addresses are the same object, so address is usable as dict key,
+        expand, parent, suffix and to_list results are cached """
+    __slots__ = ("attribute_indexes", "parent", "_children", "_list", "_suffixes")
+    _interned: dict[tuple[AttributeIndex, ...], AttributeAddress] = {}
+
+    def __new__(cls, attribute_indexes: Iterable[AttributeIndex] = ()):
+        attribute_indexes = tuple(attribute_indexes)
+        if attribute_indexes in cls._interned:
+            return cls._interned[attribute_indexes]
+        aa = super().__new__(cls)
+        parent = cls(attribute_indexes[:-1]) if attribute_indexes else None
+        object.__setattr__(aa, "attribute_indexes", attribute_indexes)
+        object.__setattr__(aa, "parent", parent)
+        object.__setattr__(aa, "_children", {})
+        object.__setattr__(aa, "_list", [ai.to_list() for ai in attribute_indexes])
+        object.__setattr__(aa, "_suffixes", None)
+        if parent is not None:
+            parent._children[attribute_indexes[-1]] = aa
+        cls._interned[attribute_indexes] = aa
+        return aa
+
+    def __setattr__(self, key, value):
+        raise AttributeError("AttributeAddress is immutable")
+
+    def __reduce__(self):
+        return AttributeAddress, (self.attribute_indexes,)
+
+    def __repr__(self):
+        return "AttributeAddress({})".format(self._list)
 
     def get_first_attr_name(self) -> str:
-        return self.attribute_index_list[0].attr_name
+        return self.attribute_indexes[0].attr_name
 
     def expand(self, ai: AttributeIndex) -> AttributeAddress:
-        return AttributeAddress(self.attribute_index_list + [ai])
-
-    def get_end_slice(self, ai: AttributeIndex) -> AttributeAddress:
-        result_list = []
-        append = False
-        for attr_ind in self.attribute_index_list:
-            if attr_ind == ai:
-                append = True
-            if append:
-                result_list.append(attr_ind)
-        return AttributeAddress(result_list)
+        if ai in self._children:
+            return self._children[ai]
+        return AttributeAddress(self.attribute_indexes + (ai,))
+
+    def suffix(self, start: int) -> AttributeAddress:
+        """ address from index position start to end """
+        if self._suffixes is None:
+            object.__setattr__(self, "_suffixes", tuple(AttributeAddress(self.attribute_indexes[i:])
+                                                        for i in range(len(self.attribute_indexes))))
+        return self._suffixes[start]
 
     def specify_num_of_last(self, num: int) -> AttributeAddress:
-        new_ail = copy(self.attribute_index_list)
-        last_ai = new_ail.pop()
-        new_ail.append(AttributeIndex(last_ai.attr_name, num))
-        return AttributeAddress(new_ail)
+        return self.parent.expand(AttributeIndex(self.attribute_indexes[-1].attr_name, num))
 
-    def to_list(self):
-        return [ai.to_list() for ai in self.attribute_index_list]
+    def to_list(self) -> list[list[str, int]]:
+        """ cached, must not be changed """
+        return self._list
 
     @staticmethod
     def from_list(laa: list[list[str, int]]) -> AttributeAddress:
-        aa = AttributeAddress()
-        for attr_index in laa:
-            ai = AttributeIndex(*attr_index)
-            aa.attribute_index_list.append(ai)
-        return aa
+        return AttributeAddress(AttributeIndex(*attr_index) for attr_index in laa)
 
 
 @dataclass
@@ -71,6 +88,8 @@ class ComplexAttributeManagementCommand:
 
 
 class AddressedAttribute(ABC):
+    __slots__ = ("address",)
+
     def __init__(self, attr_addr: AttributeAddress = None):
         self.address = attr_addr
 
@@ -84,6 +103,8 @@ class AddressedAttribute(ABC):
 
 
 class NamedAttribute(AddressedAttribute):
+    __slots__ = ("single_attribute_type", "min_count")
+
     def __init__(self, attr_addr: AttributeAddress = None, single_attribute_type: Type = str, min_count: int = 0):
         super().__init__(attr_addr)
         self.single_attribute_type = single_attribute_type
@@ -102,8 +123,20 @@ class NamedAttribute(AddressedAttribute):
         return StrSingleAttribute(addr) if issubclass(self.single_attribute_type, str) \
             else ObjSingleAttribute(addr, self.single_attribute_type(obj_addr=addr))
 
+    @property
+    @abstractmethod
+    def single_attributes(self) -> Iterable[SingleAttribute]:
+        pass
+
+    def readdress(self, attr_addr: AttributeAddress):
+        self.address = attr_addr
+        for i, single_attribute in enumerate(self.single_attributes):
+            single_attribute.readdress(attr_addr.specify_num_of_last(i))
+
 
 class UnaryAttribute(NamedAttribute):
+    __slots__ = ("single_attribute",)
+
     def __init__(self, attr_addr: AttributeAddress = None, single_attribute_type: Type = str, min_count: int = 0):
         super().__init__(attr_addr, single_attribute_type, min_count)
         self.single_attribute = None
@@ -127,6 +160,10 @@ class UnaryAttribute(NamedAttribute):
                 self.single_attribute.attr_exchange_representation
         }
 
+    @property
+    def single_attributes(self) -> tuple[SingleAttribute, ...]:
+        return () if self.single_attribute is None else (self.single_attribute,)
+
     def append_new_sa(self) -> SingleAttribute:
         new_sa_addr = self.address.specify_num_of_last(0)
         sa = self.init_single_attr(new_sa_addr)
@@ -138,9 +175,12 @@ class UnaryAttribute(NamedAttribute):
 
 
 class ListAttribute(NamedAttribute):
+    __slots__ = ("single_attribute_list", "renumber_from")
+
     def __init__(self, attr_addr: AttributeAddress = None, single_attribute_type: Type = str, min_count: int = 0):
         super().__init__(attr_addr, single_attribute_type, min_count)
         self.single_attribute_list: list[SingleAttribute] = []
+        self.renumber_from: Optional[int] = None  # position of first element with outdated address
 
     @property
     def file_representation(self):
@@ -163,24 +203,47 @@ class ListAttribute(NamedAttribute):
     def sa_count(self):
         return len(self.single_attribute_list)
 
+    @property
+    def single_attributes(self) -> list[SingleAttribute]:
+        return self.single_attribute_list
+
     def append_new_sa(self) -> SingleAttribute:
         new_sa_addr = self.address.specify_num_of_last(self.sa_count)
         sa = self.init_single_attr(new_sa_addr)
         self.single_attribute_list.append(sa)
         return sa
 
-    def remove_existing_sa(self, index: int):
-        for i in range(index+1, self.sa_count):
+    def remove_existing_sa(self, index: int) -> SingleAttribute:
+        """ addresses of next elements are not changed till renumber """
+        if (self.renumber_from is None) or (index < self.renumber_from):
+            self.renumber_from = index
+        return self.single_attribute_list.pop(index)
+
+    def renumber(self) -> list[tuple[AttributeAddress, SingleAttribute]]:
+        """ one pass after any number of removals, returns old address and element for every readdressed one """
+        renumbered = []
+        if self.renumber_from is None:
+            return renumbered
+        for i in range(self.renumber_from, self.sa_count):
             sa = self.single_attribute_list[i]
-            sa.address = sa.address.specify_num_of_last(i-1)
-        self.single_attribute_list.pop(index)
+            new_address = self.address.specify_num_of_last(i)
+            if not (sa.address is new_address):
+                renumbered.append((sa.address, sa))
+                sa.readdress(new_address)
+        self.renumber_from = None
+        return renumbered
 
 
 class SingleAttribute(AddressedAttribute):
+    __slots__ = ()
+
     def __init__(self, attr_addr: AttributeAddress = None):
         super().__init__(attr_addr)
         # self.is_empty = True
 
+    def readdress(self, attr_addr: AttributeAddress):
+        self.address = attr_addr
+
     @abstractmethod
     def file_representation(self) -> dict:
         pass
@@ -191,6 +254,12 @@ class SingleAttribute(AddressedAttribute):
 
 
 class StrSingleAttribute(SingleAttribute):
+    __slots__ = ("displaying_value", "_suggested_value", "last_input_value", "needs_in_suggestion", "is_suggested",
+                 "is_required", "error_message", "possible_str_value_storages", "file_value")
+    # attr_exchange_dict keys, "address" and "possible_values" are made from address and storages
+    exchange_fields = ("address", "displaying_value", "_suggested_value", "last_input_value", "needs_in_suggestion",
+                       "is_suggested", "is_required", "error_message", "file_value")
+
     def __init__(self, attr_addr: AttributeAddress = None):
         super().__init__(attr_addr)
         self.displaying_value: str = ""
@@ -229,12 +298,9 @@ class StrSingleAttribute(SingleAttribute):
 
     @property
     def attr_exchange_dict(self) -> dict:
-        attr_exch_dict = copy(self.__dict__)
-
-        attr_exch_dict.pop("possible_str_value_storages")
-        attr_exch_dict["possible_values"] = self.possible_values
-
+        attr_exch_dict = {field_name: getattr(self, field_name) for field_name in self.exchange_fields}
         attr_exch_dict["address"] = self.address.to_list()
+        attr_exch_dict["possible_values"] = self.possible_values
         return attr_exch_dict
 
     @property
@@ -254,26 +320,25 @@ class StrSingleAttribute(SingleAttribute):
 
 
 class ObjSingleAttribute(SingleAttribute):
+    __slots__ = ("obj",)
+
     def __init__(self, attr_addr: AttributeAddress = None, obj: Any = None):  # PpoObject
         super().__init__(attr_addr)
         self.obj: Any = obj
 
+    def readdress(self, attr_addr: AttributeAddress):
+        self.address = attr_addr
+        self.obj.readdress(attr_addr)
+
     @property
     def file_representation(self):
-        d = {}
-        data_attr_names = self.obj.data_attr_names
-        for data_attr_name in data_attr_names:
-            na: NamedAttribute = getattr(self.obj, data_attr_name)
-            file_representation = na.file_representation
-            if not (file_representation is None):
-                d[attr_name_from_object_to_file(data_attr_name)] = file_representation
-        return d or None
+        return self.obj.file_data() or None
 
     @property
     def attr_exchange_representation(self):
         d = {}
-        data_attr_names = self.obj.data_attr_names
-        for data_attr_name in data_attr_names:
+        self.obj.renumber_lists()
+        for data_attr_name in self.obj.attr_schema.names:
             na: NamedAttribute = getattr(self.obj, data_attr_name)
             d[data_attr_name] = na.attr_exchange_representation
         return {
@@ -285,9 +350,8 @@ class ObjSingleAttribute(SingleAttribute):
 
 
 if __name__ == "__main__":
-    pai = NamedAttribute()
     sa = StrSingleAttribute()
-    print(sa.__dict__)
+    print({name: getattr(sa, name, None) for cls in type(sa).__mro__ for name in getattr(cls, "__slots__", ())})
 
     ai = AttributeIndex("lala", 0)
     print(ai.to_list())
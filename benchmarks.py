@@ -0,0 +1,560 @@
+import contextlib
+import gc
+import glob
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from itertools import cycle
+
+import instrumentation
+from nv_oh import ObjectsHandler
+from aar_descriptor import AttributeAccessRulesDescriptor
+from attribute_management import AttributeAddress, AttributeCommand, ComplexAttributeManagementCommand
+from attribute_address_access import get_str_attr
+from ppo_class_registry import make_ppo_object
+from ppo_object import PpoSemiAutomaticBlockingSystemRi, StartWarningArea, get_tag, address_expansion, set_tag
+from tpl_obj_id_reconciliation import reconcile
+from descr_value_checkers import ValueAddressChecker
+from ppo_address import iter_address_attributes, validate_addresses
+from export_engine import ExportEngine, group_objects, snapshot_group, write_group, group_file_path
+from project_save import save_project, fsync_file
+from config_diff import diff_configs, config_files
+from config import FILE_NAME_TO_CLASSES
+from xml_records import iter_source_entries, iter_tpl_records, iter_obj_id_records
+
+BENCH_CLASSES = ["PpoPoint", "PpoTrainSignal", "PpoShuntingSignal", "PpoPointSection", "PpoTrackSection",
+                 "PpoTrackAnD", "PpoLineEnd", "PpoRoutePointer", "PpoTrackUnit", "PpoTrackEncodingPoint"]
+
+
+def populate_station(oh: ObjectsHandler, count: int):
+    cls_names = cycle(BENCH_CLASSES)
+    for i in range(count):
+        cls_name = next(cls_names)
+        oh.init_object(cls_name, "{}_bench_{}".format(cls_name, i))
+
+
+def mean_op_time_us(func, args_list: list) -> float:
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def bench_objects_handler_indexes(station_sizes=(1000, 2500, 5000, 10000, 40000), ops_count: int = 200):
+    """ add and remove mean time does not depend on station size, rename keeps object position and moves keys
+        from the nearest end of its class, so renames of objects at random positions grow with class size,
+        renamed and removed objects are taken at random positions of class """
+    print("Objects handler indexes: mean operation time, us")
+    print("{:>8} {:>8} {:>10} {:>10} {:>10}".format("objects", "class", "add", "rename", "remove"))
+    rnd = random.Random(0)
+    for station_size in station_sizes:
+        release_previous_station()
+        oh = ObjectsHandler()
+        oh.auto_add_io = False
+        populate_station(oh, station_size)
+        new_names = [oh.new_object_name("PpoTrackSection") + "_{}".format(i) for i in range(ops_count)]
+        add_time = mean_op_time_us(oh.init_object, [("PpoTrackSection", name) for name in new_names])
+        class_size = len(oh.objects_tree["PpoTrackSection"])
+        names = rnd.sample(list(oh.objects_tree["PpoTrackSection"]), min(2 * ops_count, class_size))
+        half = len(names) // 2
+        rename_time = mean_op_time_us(oh.rename_object, [(name, name + "_r") for name in names[:half]])
+        remove_time = mean_op_time_us(oh.remove_object, [(name,) for name in names[half:]])
+        print("{:>8} {:>8} {:>10.1f} {:>10.1f} {:>10.1f}".format(station_size, class_size, add_time, rename_time,
+                                                               remove_time))
+
+
+def bench_value_in_set_check(station_sizes=(1000, 2500, 5000, 10000), checks_count: int = 200):
+    """ reference attribute check against all tracks with and without membership index """
+    print("Value in set check: mean check time, us")
+    print("{:>8} {:>10} {:>10}".format("objects", "rebuild", "index"))
+    for station_size in station_sizes:
+        release_previous_station()
+        oh = ObjectsHandler()
+        oh.auto_add_io = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            populate_station(oh, station_size)
+        checker = StartWarningArea.obj.value_checkers[0]
+        values = [(name,) for name in list(oh.name_to_obj_dict)[:checks_count]]
+        index, checker.index = checker.index, None
+        rebuild_time = mean_op_time_us(checker.check_value, values)
+        checker.index = index
+        index_time = mean_op_time_us(checker.check_value, values)
+        print("{:>8} {:>10.1f} {:>10.2f}".format(station_size, rebuild_time, index_time))
+
+
+def build_and_export_station(station_size: int) -> tuple[float, float, int, int]:
+    """ returns build and export time, memory traced after build and after export if tracemalloc is started """
+    start = time.perf_counter()
+    oh = ObjectsHandler()
+    oh.auto_add_io = False
+    populate_station(oh, station_size)
+    build_time = time.perf_counter() - start
+    build_memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for obj in oh.name_to_obj_dict.values():
+        obj.to_json_dict(True, True)
+    export_time = time.perf_counter() - start
+    return build_time, export_time, build_memory, tracemalloc.get_traced_memory()[0]
+
+
+def release_previous_station():
+    """ checkers storages of classes keep last objects tree alive, binding them to new handler releases it """
+    ObjectsHandler()
+    gc.collect()
+
+
+def bench_sparse_attributes(station_size: int = 10000):
+    """ construction time and memory per object with and without sparse attribute storage,
+        export pass reads every attribute of every object """
+    print("Attribute storage: {} objects".format(station_size))
+    print("{:>8} {:>10} {:>10} {:>10} {:>10}".format("sparse", "build, s", "export, s", "B/obj", "B/obj exp"))
+    default_sparse = AttributeAccessRulesDescriptor.sparse
+    for sparse in (False, True):
+        AttributeAccessRulesDescriptor.sparse = sparse
+        release_previous_station()
+        build_time, export_time, _, _ = build_and_export_station(station_size)
+        release_previous_station()
+        tracemalloc.start()
+        _, _, build_memory, export_memory = build_and_export_station(station_size)
+        tracemalloc.stop()
+        print("{:>8} {:>10.2f} {:>10.2f} {:>10.0f} {:>10.0f}".format(str(sparse), build_time, export_time,
+                                                                     build_memory / station_size,
+                                                                     export_memory / station_size))
+    AttributeAccessRulesDescriptor.sparse = default_sparse
+
+
+def bench_list_element_removal(list_sizes=(100, 1000, 5000), removes_count: int = 50):
+    """ removals from list head followed by read of last element and tag reads, time per operation """
+    print("List element removal: mean operation time, us")
+    print("{:>8} {:>10} {:>10} {:>10}".format("elements", "remove", "read last", "get tag"))
+    for list_size in list_sizes:
+        obj = PpoSemiAutomaticBlockingSystemRi()
+        for i in range(list_size):
+            obj.notificationPoints = ComplexAttributeManagementCommand(
+                AttributeCommand.append, AttributeAddress.from_list([["notificationPoints", i]]))
+        remove_command = ComplexAttributeManagementCommand(
+            AttributeCommand.remove, AttributeAddress.from_list([["notificationPoints", 0]]))
+        remove_time = mean_op_time_us(setattr, [(obj, "notificationPoints", remove_command)] * removes_count)
+        last_point = AttributeAddress.from_list([["notificationPoints", list_size - removes_count], ["point", 0]])
+        read_time = mean_op_time_us(get_str_attr, [(obj, last_point)])
+        tag_time = mean_op_time_us(get_tag, [(obj,)] * removes_count)
+        print("{:>8} {:>10.1f} {:>10.1f} {:>10.2f}".format(list_size, remove_time, read_time, tag_time))
+
+
+def bench_config_load_memory(config_dir: str = os.path.join("config_examples", "ribatskoe_json")):
+    """ memory of objects loaded from example config, bytes per object,
+        dense - all attributes are stored by export pass without sparse storage """
+    print("Config load memory, B/object")
+    default_sparse = AttributeAccessRulesDescriptor.sparse
+    for sparse in (True, False):
+        AttributeAccessRulesDescriptor.sparse = sparse
+        release_previous_station()
+        tracemalloc.start()
+        oh = ObjectsHandler()
+        oh.auto_add_io = False
+        start_memory = tracemalloc.get_traced_memory()[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            oh.input_config_files_opened([config_dir])
+            if not sparse:
+                for cls_name in oh.objects_tree:
+                    for obj in oh.objects_tree[cls_name].values():
+                        obj.to_json_dict(True, True)
+        memory = tracemalloc.get_traced_memory()[0] - start_memory
+        tracemalloc.stop()
+        objects_count = sum(len(objects) for objects in oh.objects_tree.values())
+        print("{:>8} {:>6} objects {:>8.0f}".format("sparse" if sparse else "dense", objects_count,
+                                                    memory / objects_count))
+    AttributeAccessRulesDescriptor.sparse = default_sparse
+
+
+def bench_batch_commands(config_dir: str = os.path.join("config_examples", "ribatskoe_json"), repeats: int = 5):
+    """ objects of example config made from dicts by one setattr per command and by apply_batch, best of repeats """
+    object_dicts = []
+    for file_name in sorted(glob.glob(os.path.join(config_dir, "*.json"))):
+        with open(file_name) as read_file:
+            object_dicts.extend(json.load(read_file))
+
+    def load_by_setattr():
+        for d in object_dicts:
+            obj = make_ppo_object(d["class"])
+            if "tag" in d:
+                set_tag(obj, d["tag"])
+            for command in address_expansion(d.get("data", {}), obj.obj_addr):
+                setattr(obj, command.attrib_address.get_first_attr_name(), command)
+
+    def load_by_batch():
+        for d in object_dicts:
+            make_ppo_object(d["class"]).from_dict(d)
+
+    print("Commands application: {} objects, best of {}, s".format(len(object_dicts), repeats))
+    for name, load in (("setattr", load_by_setattr), ("batch", load_by_batch)):
+        times = []
+        for _ in range(repeats):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                load()
+                times.append(time.perf_counter() - start)
+        print("{:>8} {:>10.3f}".format(name, min(times)))
+
+
+def bench_trusted_load(config_dirs=(os.path.join("config_examples", "novosokol_json"),
+                                     os.path.join("config_examples", "ribatskoe_json")), repeats: int = 5):
+    """ full station load by commands and by trusted load with and without checks, best of repeats """
+    print("Station load time, best of {}, s".format(repeats))
+    print("{:>16} {:>10} {:>10} {:>10}".format("station", "commands", "trusted", "no checks"))
+    for config_dir in config_dirs:
+        times = []
+        for trusted, checks in ((False, True), (True, True), (True, False)):
+            best = None
+            for _ in range(repeats):
+                release_previous_station()
+                oh = ObjectsHandler()
+                oh.trusted_load, oh.trusted_load_checks = trusted, checks
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    oh.input_config_files_opened([config_dir])
+                    load_time = time.perf_counter() - start
+                best = load_time if best is None else min(best, load_time)
+            times.append(best)
+        print("{:>16} {:>10.3f} {:>10.3f} {:>10.3f}".format(os.path.basename(config_dir), *times))
+
+
+def bench_address_validation(config_dir: str = os.path.join("config_examples", "ribatskoe_json"), repeats: int = 5):
+    """ all address attributes of station, one value check per attribute and bulk validation, best of repeats """
+    release_previous_station()
+    oh = ObjectsHandler()
+    with contextlib.redirect_stdout(io.StringIO()):
+        oh.input_config_files_opened([config_dir])
+    tagged_objects = [(obj_name, obj) for cls_dict in oh.objects_tree.values()
+                      for obj_name, obj in cls_dict.items()]
+    checker = ValueAddressChecker()
+
+    def check_one_by_one():
+        for _, obj in tagged_objects:
+            for str_sa in iter_address_attributes(obj):
+                if str_sa.last_input_value and not str_sa.last_input_value.isspace():
+                    checker.check_value(str_sa.last_input_value)
+
+    times = []
+    for validate in (check_one_by_one, lambda: validate_addresses(tagged_objects)):
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            validate()
+            best = min(best or 1e9, time.perf_counter() - start)
+        times.append(best * 1000)
+    report = validate_addresses(tagged_objects)
+    print("Address validation: {} addresses, {} malformed, best of {}, ms".format(
+        len(report.records) + len(report.malformed), len(report.malformed), repeats))
+    print("{:>10} {:>10}".format("one by one", "bulk"))
+    print("{:>10.2f} {:>10.2f}".format(*times))
+
+
+def bench_instrumentation(config_dir: str = os.path.join("config_examples", "ribatskoe_json"), repeats: int = 5):
+    """ station load and export with instrumentation disabled and enabled, best of repeats, probes of last run """
+    times = []
+    for enabled in (False, True):
+        if enabled:
+            instrumentation.enable()
+        best = None
+        for _ in range(repeats):
+            release_previous_station()
+            instrumentation.reset()
+            start = time.perf_counter()
+            oh = ObjectsHandler()
+            with contextlib.redirect_stdout(io.StringIO()):
+                oh.input_config_files_opened([config_dir])
+            for obj in oh.name_to_obj_dict.values():
+                obj.to_json_dict(True, True)
+            best = min(best or 1e9, time.perf_counter() - start)
+        times.append(best)
+    print("Instrumentation: load and export, best of {}, s".format(repeats))
+    print("{:>10} {:>10}".format("disabled", "enabled"))
+    print("{:>10.3f} {:>10.3f}".format(*times))
+    print(instrumentation.dump())
+    instrumentation.disable()
+
+
+def write_scaled_xml(source_file: str, target_file: str, copies: int):
+    """ repeats root children of source file with suffixed tags, bytes are kept as is to save encoding """
+    with open(source_file, "rb") as f:
+        text = f.read().decode("latin-1")
+    body_start = text.index(">", re.search(r"<(?!\?|!)", text).start()) + 1
+    body_end = text.rindex("</")
+    body = text[body_start:body_end]
+    with open(target_file, "wb") as f:
+        f.write(text[:body_start].encode("latin-1"))
+        for i in range(copies):
+            f.write(re.sub(r'Tag="([^"]*)"', r'Tag="\1_{}"'.format(i), body).encode("latin-1"))
+        f.write(text[body_end:].encode("latin-1"))
+
+
+def bench_tpl_obj_id_reconciliation(example_dir: str = os.path.join("config_examples", "novosokol_json"),
+                                    entries_counts=(370, 5000, 20000, 50000)):
+    """ read and reconcile time should grow linearly with entries count """
+    print("TPL and ObjectsId reconciliation time, ms")
+    print("{:>8} {:>10} {:>10} {:>10}".format("obj_id", "read tpl", "read id", "reconcile"))
+    obj_id_source = os.path.join(example_dir, "PpoObjectsId.xml")
+    tpl_source = os.path.join(example_dir, "TPL.xml")
+    source_count = sum(1 for _ in iter_source_entries(obj_id_source))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for entries_count in entries_counts:
+            copies = max(1, round(entries_count / source_count))
+            obj_id_file = os.path.join(tmp_dir, "PpoObjectsId.xml")
+            tpl_file = os.path.join(tmp_dir, "TPL.xml")
+            write_scaled_xml(obj_id_source, obj_id_file, copies)
+            write_scaled_xml(tpl_source, tpl_file, copies)
+            start = time.perf_counter()
+            tpl_entries = list(iter_tpl_records(tpl_file))
+            tpl_time = time.perf_counter() - start
+            start = time.perf_counter()
+            obj_id_entries = list(iter_obj_id_records(obj_id_file))
+            obj_id_time = time.perf_counter() - start
+            start = time.perf_counter()
+            reconcile(tpl_entries, obj_id_entries)
+            reconcile_time = time.perf_counter() - start
+            print("{:>8} {:>10.1f} {:>10.1f} {:>10.1f}".format(len(obj_id_entries), tpl_time * 1e3,
+                                                               obj_id_time * 1e3, reconcile_time * 1e3))
+
+
+def bench_export_engine(station_size: int = 10000, repeats: int = 3):
+    """ export of all file groups: sequential export in caller thread vs export engine,
+        blocked is time till caller thread is free, best of repeats """
+    release_previous_station()
+    oh = ObjectsHandler()
+    oh.auto_add_io = False
+    populate_station(oh, station_size)
+    print("Export engine: {} objects, best of {}, s".format(station_size, repeats))
+    print("{:>12} {:>10} {:>10}".format("mode", "blocked", "total"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for file_name in FILE_NAME_TO_CLASSES:
+                obj_jsons = [obj.to_json_dict(True, True) for obj in group_objects(oh.objects_tree, file_name)]
+                with open(os.path.join(tmp_dir, "{}.json".format(file_name)), "w") as write_file:
+                    json.dump(obj_jsons, write_file, indent=4)
+            best = min(best or 1e9, time.perf_counter() - start)
+        print("{:>12} {:>10.3f} {:>10.3f}".format("sequential", best, best))
+        engine = ExportEngine(incremental=False)
+        best_blocked = best_total = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            summary = engine.export(oh.objects_tree, FILE_NAME_TO_CLASSES, tmp_dir)
+            blocked = time.perf_counter() - start
+            engine.wait()
+            best_blocked = min(best_blocked or 1e9, blocked)
+            best_total = min(best_total or 1e9, summary.total_time)
+        print("{:>12} {:>10.3f} {:>10.3f}".format("engine", best_blocked, best_total))
+
+
+def bench_incremental_export(station_size: int = 10000, repeats: int = 3):
+    """ export of all file groups after one object change, full vs incremental export, best of repeats """
+    release_previous_station()
+    oh = ObjectsHandler()
+    oh.auto_add_io = False
+    populate_station(oh, station_size)
+    obj = next(iter(oh.objects_tree["PpoTrackSection"].values()))
+    print("Incremental export: {} objects, one object changed, best of {}".format(station_size, repeats))
+    print("{:>12} {:>10} {:>10}".format("mode", "time, s", "written"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for incremental in (False, True):
+            engine = ExportEngine(incremental=incremental)
+            engine.export(oh.objects_tree, FILE_NAME_TO_CLASSES, tmp_dir)
+            engine.wait()
+            best = None
+            for i in range(repeats):
+                set_tag(obj, "bench_changed_{}_{}".format(incremental, i))
+                start = time.perf_counter()
+                summary = engine.export(oh.objects_tree, FILE_NAME_TO_CLASSES, tmp_dir)
+                engine.wait()
+                best = min(best or 1e9, time.perf_counter() - start)
+            print("{:>12} {:>10.3f} {:>10}".format("incremental" if incremental else "full", best,
+                                                   len(summary.written)))
+
+
+def bench_file_data_cache(station_size: int = 10000, repeats: int = 3):
+    """ file output of all objects: first export, export after one object change and export of cold cache,
+        cache is made cold by resetting cached versions, best of repeats """
+    release_previous_station()
+    oh = ObjectsHandler()
+    oh.auto_add_io = False
+    populate_station(oh, station_size)
+    objs = list(oh.name_to_obj_dict.values())
+    changed_obj = objs[0]
+
+    def export_time() -> float:
+        start = time.perf_counter()
+        for obj in objs:
+            obj.to_json_dict(True, True)
+        return time.perf_counter() - start
+
+    first_time = export_time()
+    cold_time = warm_time = None
+    for i in range(repeats):
+        for obj in objs:
+            obj._file_data_version = -1
+        cold_time = min(cold_time or 1e9, export_time())
+        set_tag(changed_obj, "bench_changed_{}".format(i))
+        warm_time = min(warm_time or 1e9, export_time())
+    print("File data cache: {} objects, best of {}, s".format(station_size, repeats))
+    print("{:>10} {:>10} {:>10}".format("first", "cold", "one change"))
+    print("{:>10.3f} {:>10.3f} {:>10.3f}".format(first_time, cold_time, warm_time))
+
+
+def bench_xml_export(config_dir: str = os.path.join("config_examples", "ribatskoe_json"), groups_count: int = 3,
+                     repeats: int = 20):
+    """ encoding and writing of largest file groups of example config in json and xml, best of repeats """
+    release_previous_station()
+    oh = ObjectsHandler()
+    with contextlib.redirect_stdout(io.StringIO()):
+        oh.input_config_files_opened([config_dir])
+    snapshots = sorted((snapshot_group(oh.objects_tree, file_name) for file_name in FILE_NAME_TO_CLASSES),
+                       key=lambda snapshot: len(snapshot.obj_jsons), reverse=True)[:groups_count]
+    print("XML export: largest groups of {}, best of {}".format(os.path.basename(config_dir), repeats))
+    print("{:>24} {:>8} {:>10} {:>10} {:>10} {:>10}".format("group", "objects", "json, ms", "xml, ms",
+                                                            "json, kB", "xml, kB"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for snapshot in snapshots:
+            times, sizes = [], []
+            for export_format in ("json", "xml"):
+                best = None
+                for _ in range(repeats):
+                    file_path = group_file_path(tmp_dir, snapshot.file_name, export_format)
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                    best = min(best or 1e9, write_group(snapshot, tmp_dir, export_format=export_format).write_time)
+                times.append(best * 1e3)
+                sizes.append(os.path.getsize(file_path) / 1024)
+            print("{:>24} {:>8} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f}".format(
+                snapshot.file_name, len(snapshot.obj_jsons), *times, *sizes))
+
+
+def bench_streaming_json(station_size: int = 10000, repeats: int = 3):
+    """ encoding and writing of largest file group: whole list dump vs streamed indented and compact json,
+        peak is memory traced during writing of already snapshotted group, time is best of repeats """
+    release_previous_station()
+    oh = ObjectsHandler()
+    oh.auto_add_io = False
+    populate_station(oh, station_size)
+    snapshot = max((snapshot_group(oh.objects_tree, file_name) for file_name in FILE_NAME_TO_CLASSES),
+                   key=lambda group_snapshot: len(group_snapshot.obj_jsons))
+
+    def dump_whole_list(tmp_dir: str):
+        with open(group_file_path(tmp_dir, snapshot.file_name), "w") as write_file:
+            write_file.write(json.dumps(snapshot.obj_jsons, indent=4))
+
+    def write_streamed(tmp_dir: str, compact: bool):
+        file_path = group_file_path(tmp_dir, snapshot.file_name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        write_group(snapshot, tmp_dir, compact=compact)
+
+    print("Streaming json: {} group, {} objects, best of {}".format(snapshot.file_name, len(snapshot.obj_jsons),
+                                                                  repeats))
+    print("{:>12} {:>10} {:>10} {:>10}".format("mode", "time, ms", "peak, kB", "size, kB"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode, write in (("whole list", dump_whole_list),
+                            ("streamed", partial(write_streamed, compact=False)),
+                            ("compact", partial(write_streamed, compact=True))):
+            best = None
+            for _ in range(repeats):
+                start = time.perf_counter()
+                write(tmp_dir)
+                best = min(best or 1e9, time.perf_counter() - start)
+            tracemalloc.start()
+            write(tmp_dir)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = os.path.getsize(group_file_path(tmp_dir, snapshot.file_name))
+            print("{:>12} {:>10.1f} {:>10.0f} {:>10.0f}".format(mode, best * 1e3, peak / 1024, size / 1024))
+
+
+def bench_project_save(station_size: int = 10000, repeats: int = 3):
+    """ whole project save to staging directory with one batch of fsyncs and swap vs files written and synced
+        one by one in place, time is best of repeats, file data of objects is cached after first save """
+    release_previous_station()
+    oh = ObjectsHandler()
+    oh.auto_add_io = False
+    populate_station(oh, station_size)
+
+    def save_per_file(directory: str):
+        for file_name in FILE_NAME_TO_CLASSES:
+            write_group(snapshot_group(oh.objects_tree, file_name), directory)
+            fsync_file(group_file_path(directory, file_name))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = os.path.join(tmp_dir, "station")
+        os.makedirs(directory)
+        best_per_file = None
+        for _ in range(repeats):
+            for file_name in os.listdir(directory):
+                os.remove(os.path.join(directory, file_name))
+            start = time.perf_counter()
+            save_per_file(directory)
+            best_per_file = min(best_per_file or 1e9, time.perf_counter() - start)
+        best = None
+        for _ in range(repeats):
+            summary = save_project(oh.objects_tree, directory)
+            if (best is None) or (summary.total_time < best.total_time):
+                best = summary
+    print("Project save: {} objects, {} files, best of {}".format(best.objects_count, len(best.groups), repeats))
+    print("    per file write and fsync in place: {:.3f} s".format(best_per_file))
+    print("    staged project save: {:.3f} s, snapshot {:.3f} s, fsync {:.3f} s, swap {:.3f} s".format(
+        best.total_time, best.snapshot_time, best.fsync_time, best.swap_time))
+
+
+def bench_config_diff(station_sizes=(1000, 2500, 5000, 10000), changed_share: int = 100):
+    """ diff of saved station and its copy with every changed_share-th object renamed and another one changed,
+        time grows linearly with station size """
+    print("Config diff: one of {} objects renamed, one changed".format(changed_share))
+    print("{:>10} {:>8} {:>8} {:>8} {:>10} {:>10}".format("objects", "added", "removed", "changed", "load, s",
+                                                         "diff, s"))
+    for station_size in station_sizes:
+        release_previous_station()
+        oh = ObjectsHandler()
+        oh.auto_add_io = False
+        populate_station(oh, station_size)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            old_directory, new_directory = os.path.join(tmp_dir, "old"), os.path.join(tmp_dir, "new")
+            save_project(oh.objects_tree, old_directory)
+            for i, obj in enumerate(list(oh.name_to_obj_dict.values())[::changed_share]):
+                set_tag(obj, "bench_renamed_{}".format(i))
+            save_project(oh.objects_tree, new_directory)
+            for file_path in config_files(new_directory):
+                with open(file_path) as read_file:
+                    obj_jsons = json.load(read_file)
+                for obj_json in obj_jsons[1::changed_share]:
+                    obj_json["data"]["benchChanged"] = "1"
+                with open(file_path, "w") as write_file:
+                    json.dump(obj_jsons, write_file)
+            diff = diff_configs(old_directory, new_directory)
+        print("{:>10} {:>8} {:>8} {:>8} {:>10.3f} {:>10.3f}".format(station_size, len(diff.added),
+                                                                 len(diff.removed), len(diff.changed),
+                                                                 diff.load_time, diff.diff_time))
+
+
+if __name__ == '__main__':
+    bench_objects_handler_indexes()
+    bench_value_in_set_check()
+    bench_tpl_obj_id_reconciliation()
+    bench_sparse_attributes()
+    bench_config_load_memory()
+    bench_list_element_removal()
+    bench_batch_commands()
+    bench_trusted_load()
+    bench_address_validation()
+    bench_instrumentation()
+    bench_export_engine()
+    bench_incremental_export()
+    bench_file_data_cache()
+    bench_xml_export()
+    bench_streaming_json()
+    bench_project_save()
+    bench_config_diff()
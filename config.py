@@ -174,11 +174,34 @@ TPL_TO_OBJ_ID = OrderedDict([('PpoPoint', "Str"),
                              ('PpoLineEnd', "Tpk"),
                              ('PpoControlAreaBorder', "GRU")])
 
+CLASS_NAME_ALIASES = {"PpoTrackAnD": "PpoAnDtrack"}  # objects tree class name: ppo_object class name
+
+# technology class name: (interface policy, {interface type: interface class name}), empty policy - single type
+INTERFACE_CLASSES = OrderedDict([("PpoTrainSignal", ("signal", {"Ci": "PpoLightSignalCi",
+                                                                "Ri": "PpoLightSignalRi"})),
+                                 ("PpoShuntingSignal", ("signal", {"Ci": "PpoLightSignalCi",
+                                                                   "Ri": "PpoLightSignalRi"})),
+                                 ("PpoRoutePointer", ("", {"Ri": "PpoRoutePointerRi"})),
+                                 ("PpoPoint", ("", {"Ci": "PpoPointMachineCi"})),
+                                 ("PpoAutomaticBlockingSystem", ("", {"Ri": "PpoAutomaticBlockingSystemRi"})),
+                                 ("PpoSemiAutomaticBlockingSystem", ("", {"Ri": "PpoSemiAutomaticBlockingSystemRi"})),
+                                 ("PpoRailCrossing", ("", {"Ri": "PpoRailCrossingRi"}))])
+
 DEFAULT_AUTO_ADD_IO = True
 DEFAULT_SIGNAL_I_TYPE = "Ci"
 DEFAULT_POINT_I_TYPE = "Ci"
 DEFAULT_DERAIL_I_TYPE = "Ci"
 
+DEFAULT_CHECK_INDEXES = False  # full objects tree vs name indexes comparison after every change
+DEFAULT_SPARSE_ATTRIBUTES = True  # not written attributes are not stored in object, defaults are made on read
+DEFAULT_TRUSTED_LOAD = False  # json config files exported by this tool are loaded without commands
+DEFAULT_TRUSTED_LOAD_CHECKS = True  # values of trusted load are checked after all files are loaded
+DEFAULT_LOG_LEVEL = "INFO"  # "DEBUG" shows per click and per edit messages
+DEFAULT_INSTRUMENTATION = False  # call counters and timers of descriptors, checkers, suggesters and serialization
+DEFAULT_EXPORT_WORKERS = 4  # threads encoding and writing export files, objects are snapshotted in GUI thread
+DEFAULT_INCREMENTAL_EXPORT = True  # not changed file groups are not serialized and their files are not rewritten
+DEFAULT_EXPORT_COMPACT = False  # json files without indents and spaces, for machine consumers
+
 ONE_LINE_HEIGHT = 28
 
 SINGLE_ATTRIBUTE_PROPERTIES = "SINGLE_ATTRIBUTE_PROPERTIES"
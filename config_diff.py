@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterator, NamedTuple
+
+from export_engine import MANIFEST_FILE_NAME
+
+ObjectKey = tuple[str, str]  # class name, tag, objects without tag like StationOperatorWorkset have empty one
+# file attribute name and list index pairs, as in AttributeAddress.to_list, plain tuples are used,
+# because interned AttributeAddress would keep every compared path for the life of the process
+DiffAddress = tuple[tuple[str, int], ...]
+
+
+class ConfigObject(NamedTuple):
+    cls_name: str
+    tag: str
+    data: dict
+    file_name: str
+
+    @property
+    def key(self) -> ObjectKey:
+        return self.cls_name, self.tag
+
+
+@dataclass
+class AttributeChange:
+    """ old or new value is None if attribute or list element is missing on that side """
+    address: DiffAddress
+    old_value: Any
+    new_value: Any
+
+    def address_list(self) -> list[list]:
+        return [[attr_name, index] for attr_name, index in self.address]
+
+    def to_dict(self) -> dict:
+        return {"address": self.address_list(), "old": self.old_value, "new": self.new_value}
+
+
+@dataclass
+class ObjectChange:
+    cls_name: str
+    tag: str
+    changes: list[AttributeChange] = field(default_factory=list)
+    occurrence: int = 0  # number of object among objects repeating class and tag
+
+
+@dataclass
+class ConfigDiff:
+    old_directory: str
+    new_directory: str
+    added: list[ConfigObject] = field(default_factory=list)
+    removed: list[ConfigObject] = field(default_factory=list)
+    changed: list[ObjectChange] = field(default_factory=list)
+    old_duplicates: list[ConfigObject] = field(default_factory=list)  # repeated class and tag, compared by occurrence
+    new_duplicates: list[ConfigObject] = field(default_factory=list)
+    unchanged_count: int = 0
+    load_time: float = 0.
+    diff_time: float = 0.
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def to_dict(self) -> dict:
+        return {"old_directory": self.old_directory,
+                "new_directory": self.new_directory,
+                "added": [{"class": obj.cls_name, "tag": obj.tag, "file": obj.file_name} for obj in self.added],
+                "removed": [{"class": obj.cls_name, "tag": obj.tag, "file": obj.file_name} for obj in self.removed],
+                "changed": [{"class": change.cls_name, "tag": change.tag, "occurrence": change.occurrence,
+                             "changes": [attr_change.to_dict() for attr_change in change.changes]}
+                            for change in self.changed],
+                "old_duplicates": [{"class": obj.cls_name, "tag": obj.tag, "file": obj.file_name}
+                                   for obj in self.old_duplicates],
+                "new_duplicates": [{"class": obj.cls_name, "tag": obj.tag, "file": obj.file_name}
+                                   for obj in self.new_duplicates],
+                "unchanged_count": self.unchanged_count}
+
+    def to_json_file(self, file_name: str):
+        with open(file_name, "w") as write_file:
+            json.dump(self.to_dict(), write_file, indent=4)
+
+    def __str__(self):
+        lines = ["Differences between {} and {}: {} added, {} removed, {} changed, {} unchanged objects, "
+                 "load {:.3f} s, diff {:.3f} s".format(self.old_directory, self.new_directory, len(self.added),
+                                                       len(self.removed), len(self.changed), self.unchanged_count,
+                                                       self.load_time, self.diff_time)]
+        lines.append("Added:")
+        lines.extend("    {} {} ({})".format(obj.cls_name, obj.tag, obj.file_name) for obj in self.added)
+        lines.append("Removed:")
+        lines.extend("    {} {} ({})".format(obj.cls_name, obj.tag, obj.file_name) for obj in self.removed)
+        lines.append("Changed:")
+        for change in self.changed:
+            lines.append("    {} {}{}".format(change.cls_name, change.tag,
+                                              " (occurrence {})".format(change.occurrence) if change.occurrence else ""))
+            lines.extend("        {}: {} -> {}".format(attr_change.address_list(), attr_change.old_value,
+                                                       attr_change.new_value) for attr_change in change.changes)
+        for side, duplicates in [("old", self.old_duplicates), ("new", self.new_duplicates)]:
+            if duplicates:
+                lines.append("Duplicates in {}:".format(side))
+                lines.extend("    {} {} ({})".format(obj.cls_name, obj.tag, obj.file_name) for obj in duplicates)
+        return "\n".join(lines)
+
+
+def config_files(directory: str) -> list[str]:
+    """ json group files of config directory, export manifest is skipped """
+    return [os.path.join(directory, file_name) for file_name in sorted(os.listdir(directory))
+            if file_name.endswith(".json") and file_name != MANIFEST_FILE_NAME]
+
+
+def load_config(directory: str) -> tuple[dict[ObjectKey, list[ConfigObject]], list[ConfigObject]]:
+    """ hash index of objects by class and tag in files order, and objects repeating class and tag """
+    index: dict[ObjectKey, list[ConfigObject]] = {}
+    duplicates: list[ConfigObject] = []
+    for file_path in config_files(directory):
+        file_name = os.path.basename(file_path)
+        with open(file_path) as read_file:
+            for obj_json in json.load(read_file):
+                obj = ConfigObject(obj_json["class"], obj_json.get("tag", ""), obj_json.get("data", {}), file_name)
+                if obj.key in index:
+                    index[obj.key].append(obj)
+                    duplicates.append(obj)
+                else:
+                    index[obj.key] = [obj]
+    return index, duplicates
+
+
+def iter_value_changes(address: DiffAddress, attr_name: str, old_value: Any,
+                       new_value: Any) -> Iterator[AttributeChange]:
+    """ lists are compared element by element at their indexes, nested objects attribute by attribute,
+        values of other kinds or of different kinds are compared as a whole """
+    if isinstance(old_value, list) and isinstance(new_value, list):
+        for i in range(max(len(old_value), len(new_value))):
+            old_element = old_value[i] if i < len(old_value) else None
+            new_element = new_value[i] if i < len(new_value) else None
+            if old_element != new_element:
+                yield from iter_element_changes(address + ((attr_name, i),), old_element, new_element)
+    else:
+        yield from iter_element_changes(address + ((attr_name, 0),), old_value, new_value)
+
+
+def iter_element_changes(address: DiffAddress, old_value: Any, new_value: Any) -> Iterator[AttributeChange]:
+    if isinstance(old_value, dict) and isinstance(new_value, dict):
+        yield from iter_data_changes(address, old_value, new_value)
+    else:
+        yield AttributeChange(address, old_value, new_value)
+
+
+def iter_data_changes(address: DiffAddress, old_data: dict, new_data: dict) -> Iterator[AttributeChange]:
+    """ changed and added attributes in order of new data, then removed ones in order of old data """
+    for attr_name, new_value in new_data.items():
+        old_value = old_data.get(attr_name)
+        if old_value != new_value:
+            yield from iter_value_changes(address, attr_name, old_value, new_value)
+    for attr_name, old_value in old_data.items():
+        if attr_name not in new_data:
+            yield from iter_value_changes(address, attr_name, old_value, None)
+
+
+def diff_configs(old_directory: str, new_directory: str) -> ConfigDiff:
+    """ linear time comparison, objects are matched by class and tag, objects repeating class and tag are matched
+        by their occurrence, attributes of matched objects are compared only if their data differ """
+    start = time.perf_counter()
+    old_index, old_duplicates = load_config(old_directory)
+    new_index, new_duplicates = load_config(new_directory)
+    diff = ConfigDiff(old_directory, new_directory, old_duplicates=old_duplicates, new_duplicates=new_duplicates)
+    diff.load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key, new_objs in new_index.items():
+        old_objs = old_index.get(key, [])
+        for occurrence, new_obj in enumerate(new_objs):
+            if occurrence >= len(old_objs):
+                diff.added.append(new_obj)
+            elif old_objs[occurrence].data == new_obj.data:
+                diff.unchanged_count += 1
+            else:
+                diff.changed.append(ObjectChange(new_obj.cls_name, new_obj.tag,
+                                                 list(iter_data_changes((), old_objs[occurrence].data, new_obj.data)),
+                                                 occurrence))
+    for key, old_objs in old_index.items():
+        diff.removed.extend(old_objs[len(new_index.get(key, ())):])
+    diff.diff_time = time.perf_counter() - start
+    return diff
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 4):
+        print("usage: python config_diff.py old_config_directory new_config_directory [report.json]")
+        sys.exit(2)
+    config_diff = diff_configs(sys.argv[1], sys.argv[2])
+    print(config_diff)
+    if len(sys.argv) == 4:
+        config_diff.to_json_file(sys.argv[3])
+    sys.exit(0 if config_diff.is_empty else 1)
@@ -1,19 +1,56 @@
-from typing import Any, Iterable
-import re
+from typing import Any, Iterable, Optional
+
+from ppo_address import parse_address, ADDRESS_FORMAT_MESSAGE
+from instrumentation import instrumented
 
 
 class ValueChecker:
 
+    @instrumented("checker.check_value")
     def check_value(self, value: Any) -> str:
         pass
 
 
+class MembershipIndex:
+    """ values of domain made of constants and object names of some classes, e.g. all tracks,
+        names are added and discarded by ObjectsHandler, so membership check needs no set rebuild """
+    __slots__ = ("constants", "name_counts")
+
+    def __init__(self, constants: Iterable[str] = ()):
+        self.constants: frozenset[str] = frozenset(constants)
+        self.name_counts: dict[str, int] = {}  # name: count of classes of domain having object with this name
+
+    def __contains__(self, value: Any) -> bool:
+        return (value in self.name_counts) or (value in self.constants)
+
+    def add(self, name: str):
+        self.name_counts[name] = self.name_counts.get(name, 0) + 1
+
+    def discard(self, name: str):
+        count = self.name_counts.get(name, 0)
+        if count > 1:
+            self.name_counts[name] = count - 1
+        elif count:
+            del self.name_counts[name]
+
+    def clear(self):
+        self.name_counts.clear()
+
+    @property
+    def values(self) -> set[str]:
+        return set(self.name_counts) | self.constants
+
+
 class ValueInSetChecker(ValueChecker):
-    def __init__(self, storages: Iterable[Any] = None):
+    def __init__(self, storages: Iterable[Any] = None, index: MembershipIndex = None):
         if storages is None:
             self.storages = set()
         else:
             self.storages = storages
+        if (index is None) and isinstance(self.storages, (list, tuple, set)) and \
+                all(isinstance(storage, str) for storage in self.storages):
+            index = MembershipIndex(self.storages)
+        self.index: Optional[MembershipIndex] = index  # without index possible values are rebuilt on every check
 
     @property
     def storages(self):  #  -> set
@@ -41,8 +78,7 @@ class ValueInSetChecker(ValueChecker):
             return ""
         if isinstance(value, str):
             value = value.strip()
-        print("possible_values", self.possible_values)
-        if value in self.possible_values:
+        if value in (self.possible_values if self.index is None else self.index):
             return ""
         else:
             return "Value is not in set of possible values"
@@ -104,11 +140,10 @@ class ValueElectricHeatingOnOffChecker(ValueInSetChecker):
 class ValueAddressChecker(ValueChecker):
 
     def check_value(self, value: str) -> str:
-        template = r"(?:USO|CPU|PPO)(?::\d{1,2}){2,3}"
-        if re.fullmatch(template, value):
+        if parse_address(value):
             return ""
         else:
-            return "Address should be in format USO/CPU/PPO : NN : NN : NN"
+            return ADDRESS_FORMAT_MESSAGE
         # RE-SOLUTION: r"(?:USO|CPU|PPO)(?::\d{1,2}){2,3}"
         # if value.isdigit() and (int(value) != 0):
         #     return ""
@@ -1,14 +1,18 @@
-from typing import Any
+from __future__ import annotations
+
+from typing import Any, Optional, Union
 
 from attribute_management import AttributeAddress, AttributeIndex
 from attribute_address_access import get_str_attr
 from config import DEFAULT_ADDRESS_SUGGESTION
+from instrumentation import instrumented
 
 
 class Suggester:
     def __init__(self):
         self._possible_values = list()
 
+    @instrumented("suggester.suggest")
     def suggest(self, *args, **kwargs) -> str:
         pass
 
@@ -16,26 +20,21 @@ class Suggester:
     def possible_values(self) -> list:
         return self._possible_values
 
-    def eval_possible_values(self, *args, **kwargs) -> None:
-        pass
+    def eval_possible_values(self, suggested_value: str = "") -> list[str]:
+        return self._possible_values
 
 
 class ConstSuggester(Suggester):
     def __init__(self, const_value: str):
         super().__init__()
         self.const_value = const_value
+        self._possible_values = [const_value]
 
     def suggest(self) -> str:
         return self.const_value
 
-    def eval_possible_values(self, *args, **kwargs):
-        self._possible_values.clear()
-        self._possible_values.append(self.const_value)
-
 
 class InterstationDirectiveSuggester(Suggester):
-    attr_dependencies = {}  # {"output_DSO": "tag", ...}
-
     def __init__(self, attr_name: str):
         super().__init__()
         self.attr_name = attr_name
@@ -54,15 +53,11 @@ class InterstationDirectiveSuggester(Suggester):
         result = "{}_{}".format(self.descr_name.split("_")[1], tag.split("_")[0])
         return result
 
-    def eval_possible_values(self, instance) -> None:
-        self._possible_values.clear()
-        self._possible_values.append("NoAddr")
-        self._possible_values.append(self.suggest(instance))
+    def eval_possible_values(self, suggested_value: str = "") -> list[str]:
+        return ["NoAddr", suggested_value]
 
 
 class EqualOtherAttributeSuggester(Suggester):
-    attr_dependencies = {}  # {"id_": "tag", ...}
-
     def __init__(self, attr_name: str):
         super().__init__()
         self.attr_name = attr_name
@@ -70,9 +65,8 @@ class EqualOtherAttributeSuggester(Suggester):
     def suggest(self, instance):
         return get_str_attr(instance, AttributeAddress([AttributeIndex(self.attr_name, 0)]))
 
-    def eval_possible_values(self, instance) -> None:
-        self._possible_values.clear()
-        self._possible_values.append(self.suggest(instance))
+    def eval_possible_values(self, suggested_value: str = "") -> list[str]:
+        return [suggested_value]
 
 
 class AddressSuggester(Suggester):
@@ -85,4 +79,36 @@ class AddressSuggester(Suggester):
         return DEFAULT_ADDRESS_SUGGESTION
 
 
+class CachedSuggestion:
+    """ suggestion of attribute depending on other attribute of same object,
+        value and possible values are evaluated on first use after invalidation """
+    __slots__ = ("suggester", "instance", "descr_name", "_value", "_possible_values")
+
+    def __init__(self, suggester: Union[EqualOtherAttributeSuggester, InterstationDirectiveSuggester], instance: Any,
+                 descr_name: str):
+        self.suggester = suggester
+        self.instance = instance
+        self.descr_name = descr_name
+        self._value: Optional[str] = None
+        self._possible_values: Optional[list[str]] = None
+
+    def invalidate(self):
+        self._value = None
+        self._possible_values = None
+
+    @property
+    def value(self) -> str:
+        if self._value is None:
+            if isinstance(self.suggester, InterstationDirectiveSuggester):
+                self.suggester.descr_name = self.descr_name
+            self._value = self.suggester.suggest(self.instance)
+        return self._value
+
+    def __iter__(self):
+        """ possible values storage of StrSingleAttribute """
+        if self._possible_values is None:
+            self._possible_values = self.suggester.eval_possible_values(self.value)
+        return iter(self._possible_values)
+
+
 DEFAULT_VALUE_SUGGESTER = Suggester()
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator, Optional, Any
+
+from config import FILE_NAME_TO_CLASSES, DEFAULT_EXPORT_WORKERS, DEFAULT_INCREMENTAL_EXPORT, DEFAULT_EXPORT_COMPACT
+from xml_export import iter_xml_chunks
+
+MANIFEST_FILE_NAME = "manifest.json"
+JSON_CHUNK_SIZE = 1 << 16
+INDENT_JSON_ENCODER = json.JSONEncoder(indent=4)  # python encoder, makes text by small pieces
+COMPACT_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+WRITTEN, UNCHANGED, SKIPPED = "written", "unchanged", "skipped"  # group export statuses
+
+
+GroupState = list[tuple[Any, int]]  # objects of group in output order with their versions
+
+
+@dataclass
+class GroupSnapshot:
+    """ file output dicts of objects of one file group, made of plain containers and strings only,
+        so it is independent of later changes of objects """
+    file_name: str
+    obj_jsons: list[dict]
+    snapshot_time: float = 0.
+    state: GroupState = field(default_factory=list)
+
+
+@dataclass
+class GroupExport:
+    file_name: str
+    objects_count: int
+    snapshot_time: float = 0.
+    write_time: float = 0.
+    status: str = WRITTEN
+    error: str = ""
+    manifest_entry: Optional[dict] = None
+
+
+@dataclass
+class ExportSummary:
+    directory: str
+    groups: list[GroupExport] = field(default_factory=list)  # in order of completion
+    snapshot_time: float = 0.  # objects tree is blocked only for this time
+    total_time: float = 0.
+
+    @property
+    def objects_count(self) -> int:
+        return sum(group.objects_count for group in self.groups)
+
+    @property
+    def failed(self) -> list[GroupExport]:
+        return [group for group in self.groups if group.error]
+
+    @property
+    def written(self) -> list[GroupExport]:
+        return [group for group in self.groups if (group.status == WRITTEN) and not group.error]
+
+    def to_dict(self) -> dict:
+        return {"directory": self.directory,
+                "objects_count": self.objects_count,
+                "snapshot_time": self.snapshot_time,
+                "total_time": self.total_time,
+                "groups": [{"file_name": group.file_name, "objects_count": group.objects_count,
+                            "snapshot_time": group.snapshot_time, "write_time": group.write_time,
+                            "status": group.status, "error": group.error} for group in self.groups]}
+
+    def __str__(self):
+        lines = ["Exported {} objects, {} of {} files written in {:.3f} s, snapshot {:.3f} s".format(
+            self.objects_count, len(self.written), len(self.groups), self.total_time, self.snapshot_time)]
+        for group in self.groups:
+            lines.append("    {}: {} objects, {}, snapshot {:.3f} s, write {:.3f} s{}".format(
+                group.file_name, group.objects_count, group.status, group.snapshot_time, group.write_time,
+                ", failed: {}".format(group.error) if group.error else ""))
+        return "\n".join(lines)
+
+
+def group_objects(objects_tree: OrderedDict[str, OrderedDict[str, Any]], file_name: str) -> list:
+    """ objects of file group in output order """
+    objs = []
+    for cls_name in FILE_NAME_TO_CLASSES[file_name]:
+        objs.extend(reversed(objects_tree[cls_name].values()))
+    return objs
+
+
+def group_state(objs: list) -> GroupState:
+    return [(obj, obj.version) for obj in objs]
+
+
+def snapshot_group(objects_tree: OrderedDict[str, OrderedDict[str, Any]], file_name: str) -> GroupSnapshot:
+    """ must be called from the thread owning objects, reads of sparse attributes are not thread safe """
+    start = time.perf_counter()
+    objs = group_objects(objects_tree, file_name)
+    obj_jsons = [obj.to_json_dict(True, True) for obj in objs]
+    return GroupSnapshot(file_name, obj_jsons, time.perf_counter() - start, group_state(objs))
+
+
+def temp_file_for(file_path: str) -> tuple[int, str]:
+    """ temporary file in directory of file_path, so it can be renamed to file_path atomically,
+        it is created with mode 0666 masked by umask like files of open(), not 0600 like mkstemp ones """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    while True:
+        temp_path = os.path.join(directory, ".{}.{}.tmp".format(os.path.basename(file_path), secrets.token_hex(4)))
+        try:
+            return os.open(temp_path, flags, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
+def atomic_write_text(file_path: str, text: str):
+    """ text is written to temporary file in the same directory and renamed,
+        so readers see either old or complete new file """
+    fd, temp_path = temp_file_for(file_path)
+    try:
+        with os.fdopen(fd, "w") as write_file:
+            write_file.write(text)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def atomic_write_json(file_path: str, data: Any):
+    atomic_write_text(file_path, json.dumps(data, indent=4))
+
+
+def output_file_name(file_name: str, export_format: str = "json") -> str:
+    return "{}.{}".format(file_name, export_format)
+
+
+def group_file_path(directory: str, file_name: str, export_format: str = "json") -> str:
+    return os.path.join(directory, output_file_name(file_name, export_format))
+
+
+def read_manifest(directory: str) -> dict[str, dict]:
+    """ output file name: entry with content hash and stat of written file, empty for missing or broken manifest """
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE_NAME)) as read_file:
+            files = json.load(read_file)["files"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+    return files if isinstance(files, dict) else {}
+
+
+def write_manifest(directory: str, files: dict[str, dict]):
+    atomic_write_json(os.path.join(directory, MANIFEST_FILE_NAME),
+                      {"files": {file_name: files[file_name] for file_name in sorted(files)}})
+
+
+def file_matches_entry(file_path: str, entry: Optional[dict], compact: bool = False) -> bool:
+    """ file was not changed or removed since it was written with this manifest entry in same json mode """
+    if not entry or entry.get("compact", False) != compact:
+        return False
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    return (stat.st_size == entry.get("size")) and (stat.st_mtime_ns == entry.get("mtime_ns"))
+
+
+def file_sha256(file_path: str) -> Optional[str]:
+    sha256 = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as read_file:
+            for block in iter(lambda: read_file.read(1 << 16), b""):
+                sha256.update(block)
+    except OSError:
+        return None
+    return sha256.hexdigest()
+
+
+def manifest_entry(file_path: str, sha256: str, objects_count: int, compact: bool = False) -> dict:
+    stat = os.stat(file_path)
+    return {"sha256": sha256, "objects": objects_count, "compact": compact, "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns}
+
+
+def iter_json_chunks(obj_jsons: Iterable[dict], compact: bool = False) -> Iterator[str]:
+    """ same text as json.dumps of objects list with indent 4, or without spaces if compact,
+        whole text is never in memory: indented text is collected from encoder pieces into chunks of
+        JSON_CHUNK_SIZE, compact text is encoded by C encoder one object per chunk """
+    if compact:
+        empty = True
+        for obj_json in obj_jsons:
+            yield ("[" if empty else ",") + COMPACT_JSON_ENCODER.encode(obj_json)
+            empty = False
+        yield "[]" if empty else "]"
+        return
+    pieces, size = [], 0
+    for piece in INDENT_JSON_ENCODER.iterencode(obj_jsons if isinstance(obj_jsons, list) else list(obj_jsons)):
+        pieces.append(piece)
+        size += len(piece)
+        if size >= JSON_CHUNK_SIZE:
+            yield "".join(pieces)
+            pieces, size = [], 0
+    if pieces:
+        yield "".join(pieces)
+
+
+def encode_group(obj_jsons: list[dict], export_format: str, compact: bool = False) -> Iterator[str]:
+    if export_format == "xml":
+        return iter_xml_chunks(obj_jsons)
+    return iter_json_chunks(obj_jsons, compact)
+
+
+def write_group(snapshot: GroupSnapshot, directory: str, entry: Optional[dict] = None,
+                export_format: str = "json", compact: bool = False) -> GroupExport:
+    """ encoded chunks are written to temporary file and hashed on the way, temporary file replaces
+        output file only if content hash differs from one of manifest entry or of existing file """
+    start = time.perf_counter()
+    result = GroupExport(snapshot.file_name, len(snapshot.obj_jsons), snapshot.snapshot_time)
+    file_path = group_file_path(directory, snapshot.file_name, export_format)
+    temp_path = None
+    try:
+        fd, temp_path = temp_file_for(file_path)
+        sha256 = hashlib.sha256()
+        with os.fdopen(fd, "wb") as write_file:
+            for chunk in encode_group(snapshot.obj_jsons, export_format, compact):
+                data = chunk.encode("utf-8")
+                write_file.write(data)
+                sha256.update(data)
+        digest = sha256.hexdigest()
+        if file_matches_entry(file_path, entry, compact):
+            is_unchanged = entry.get("sha256") == digest
+        else:
+            is_unchanged = file_sha256(file_path) == digest
+        if is_unchanged:
+            os.remove(temp_path)
+            result.status = UNCHANGED
+        else:
+            os.replace(temp_path, file_path)
+        temp_path = None
+        result.manifest_entry = manifest_entry(file_path, digest, len(snapshot.obj_jsons), compact)
+    except Exception as e:  # any serializer error fails only this group
+        result.error = str(e) or type(e).__name__
+    finally:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+    result.write_time = time.perf_counter() - start
+    return result
+
+
+class ExportEngine:
+    """ groups are snapshotted in caller thread, then encoded and written by worker threads,
+        progress and finished callbacks are called from worker threads,
+        in incremental mode groups with same objects and object versions as at last export are not serialized,
+        manifest of content hashes is written next to files after every export """
+
+    def __init__(self, workers: int = DEFAULT_EXPORT_WORKERS, incremental: bool = DEFAULT_INCREMENTAL_EXPORT,
+                 compact: bool = DEFAULT_EXPORT_COMPACT):
+        self.workers = workers
+        self.incremental = incremental
+        self.compact = compact  # json without indents and spaces
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._exported_states: dict[tuple[str, str], GroupState] = {}  # (directory, output file): state when written
+        self._generation = 0  # changed by forget, states of exports started before are not kept
+
+    @property
+    def busy(self) -> bool:
+        return self._pending > 0
+
+    def is_dirty(self, objs: list, directory: str, output_name: str) -> bool:
+        """ objects of group, their order or versions differ from last export to output file """
+        exported_state = self._exported_states.get((os.path.abspath(directory), output_name))
+        if exported_state is None or len(exported_state) != len(objs):
+            return True
+        for obj, (exported_obj, exported_version) in zip(objs, exported_state):
+            if not (obj is exported_obj) or obj.version != exported_version:
+                return True
+        return False
+
+    def forget(self):
+        """ next export serializes all groups, exported objects are not referenced any more,
+            called when objects are cleared or imported """
+        with self._lock:
+            self._exported_states.clear()
+            self._generation += 1
+
+    def export(self, objects_tree: OrderedDict[str, OrderedDict[str, Any]], file_names: Iterable[str],
+               directory: str,
+               progress: Callable[[GroupExport, int, int], None] = None,
+               finished: Callable[[ExportSummary], None] = None,
+               export_format: str = "json") -> ExportSummary:
+        """ returns summary filled by workers, progress gets group result, done and total groups count """
+        start = time.perf_counter()
+        compact = self.compact and (export_format == "json")
+        directory_key = os.path.abspath(directory)
+        manifest = read_manifest(directory)
+        summary = ExportSummary(directory)
+        snapshots = []
+        for file_name in file_names:
+            output_name = output_file_name(file_name, export_format)
+            entry = manifest.get(output_name)
+            if self.incremental:
+                objs = group_objects(objects_tree, file_name)
+                if not self.is_dirty(objs, directory, output_name) and \
+                        file_matches_entry(group_file_path(directory, file_name, export_format), entry, compact):
+                    summary.groups.append(GroupExport(file_name, len(objs), status=SKIPPED, manifest_entry=entry))
+                    continue
+            snapshots.append((snapshot_group(objects_tree, file_name), entry))
+        summary.snapshot_time = time.perf_counter() - start
+        total = len(summary.groups) + len(snapshots)
+
+        def write_summary_manifest():
+            manifest.update((output_file_name(group.file_name, export_format), group.manifest_entry)
+                            for group in summary.groups if group.manifest_entry is not None)
+            try:
+                write_manifest(directory, manifest)
+            except OSError as e:
+                summary.groups.append(GroupExport(MANIFEST_FILE_NAME, 0, error=str(e)))
+            summary.total_time = time.perf_counter() - start
+
+        if progress:
+            for i, group in enumerate(summary.groups):
+                progress(group, i + 1, total)
+        if not snapshots:
+            write_summary_manifest()
+            if finished:
+                finished(summary)
+            return summary
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="export")
+        with self._lock:
+            self._pending += len(snapshots)
+            generation = self._generation
+
+        def group_done(future: Future, snapshot: GroupSnapshot):
+            """ group counts as done even if its worker raised, otherwise engine would stay busy """
+            error = future.exception()
+            if error is None:
+                group_written(future.result(), snapshot.state)
+            else:
+                group_written(GroupExport(snapshot.file_name, len(snapshot.obj_jsons), snapshot.snapshot_time,
+                                          error=str(error) or type(error).__name__), snapshot.state)
+
+        def group_written(group: GroupExport, state: GroupState):
+            with self._lock:
+                summary.groups.append(group)
+                done = len(summary.groups)
+                state_key = (directory_key, output_file_name(group.file_name, export_format))
+                if group.error:
+                    self._exported_states.pop(state_key, None)
+                elif generation == self._generation:
+                    self._exported_states[state_key] = state
+                if done < total:
+                    self._pending -= 1
+            if progress:
+                progress(group, done, total)
+            if done == total:
+                write_summary_manifest()
+                with self._lock:
+                    self._pending -= 1  # engine is not busy when finished is called
+                if finished:
+                    finished(summary)
+
+        for snapshot, entry in snapshots:
+            self._executor.submit(write_group, snapshot, directory, entry, export_format, compact).add_done_callback(
+                lambda future, group_snapshot=snapshot: group_done(future, group_snapshot))
+        return summary
+
+    def wait(self):
+        """ blocks till all submitted groups are written """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import functools
+import logging
+import time
+from typing import Callable, Any
+
+from config import DEFAULT_LOG_LEVEL
+
+LOGGER_NAME = "ppo_config"
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def get_logger(module_name: str) -> logging.Logger:
+    """ child of tool logger, so level of all modules is set at one place """
+    return logging.getLogger("{}.{}".format(LOGGER_NAME, module_name))
+
+
+def setup_logging(level: str = DEFAULT_LOG_LEVEL):
+    logging.basicConfig(format="%(levelname)s %(name)s: %(message)s")
+    logger.setLevel(level)
+
+
+class Probe:
+    """ calls count and cumulative time of instrumented method, time of nested calls is included """
+    __slots__ = ("name", "calls", "total_time")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.total_time = 0.
+
+    def reset(self):
+        self.calls = 0
+        self.total_time = 0.
+
+
+class PatchPoint:
+    __slots__ = ("owner", "method_name", "probe")
+
+    def __init__(self, owner: type, method_name: str, probe: Probe):
+        self.owner = owner
+        self.method_name = method_name
+        self.probe = probe
+
+
+probes: dict[str, Probe] = {}
+_patch_points: list[PatchPoint] = []
+_enabled = False
+
+
+def timed(func: Callable, probe: Probe) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            probe.calls += 1
+            probe.total_time += time.perf_counter() - start
+    wrapper.probe = probe
+    return wrapper
+
+
+class instrumented:
+    """ method decorator: method stays as is while instrumentation is disabled, enable replaces it and
+        its overrides in subclasses by timing wrappers counted in one probe, enable after classes are defined """
+
+    def __init__(self, probe_name: str):
+        self.probe_name = probe_name
+        self.func = None
+
+    def __call__(self, func: Callable) -> instrumented:
+        self.func = func
+        return self
+
+    def __set_name__(self, owner: type, name: str):
+        setattr(owner, name, self.func)
+        if self.probe_name not in probes:
+            probes[self.probe_name] = Probe(self.probe_name)
+        _patch_points.append(PatchPoint(owner, name, probes[self.probe_name]))
+        if _enabled:
+            patch(_patch_points[-1])
+
+
+def overriding_classes(patch_point: PatchPoint) -> list[type]:
+    result, classes = [], [patch_point.owner]
+    while classes:
+        cls = classes.pop()
+        if patch_point.method_name in cls.__dict__:
+            result.append(cls)
+        classes.extend(cls.__subclasses__())
+    return result
+
+
+def patch(patch_point: PatchPoint):
+    for cls in overriding_classes(patch_point):
+        func = cls.__dict__[patch_point.method_name]
+        if not hasattr(func, "probe"):
+            setattr(cls, patch_point.method_name, timed(func, patch_point.probe))
+
+
+def unpatch(patch_point: PatchPoint):
+    for cls in overriding_classes(patch_point):
+        func = cls.__dict__[patch_point.method_name]
+        if hasattr(func, "probe"):
+            setattr(cls, patch_point.method_name, func.__wrapped__)
+
+
+def enable():
+    global _enabled
+    if not _enabled:
+        _enabled = True
+        for patch_point in _patch_points:
+            patch(patch_point)
+
+
+def disable():
+    global _enabled
+    if _enabled:
+        _enabled = False
+        for patch_point in _patch_points:
+            unpatch(patch_point)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    for probe in probes.values():
+        probe.reset()
+
+
+def dump() -> str:
+    """ probes table sorted by cumulative time """
+    lines = ["{:<32} {:>10} {:>12} {:>10}".format("probe", "calls", "total, ms", "mean, us")]
+    for probe in sorted(probes.values(), key=lambda p: p.total_time, reverse=True):
+        lines.append("{:<32} {:>10} {:>12.2f} {:>10.2f}".format(
+            probe.name, probe.calls, probe.total_time * 1e3,
+            probe.total_time / probe.calls * 1e6 if probe.calls else 0.))
+    return "\n".join(lines)
+
+
+def snapshot() -> dict[str, dict[str, Any]]:
+    return {probe.name: {"calls": probe.calls, "total_time": probe.total_time} for probe in probes.values()}
+
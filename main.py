@@ -1,3 +1,4 @@
+import atexit
 import sys
 import traceback
 
@@ -9,6 +10,8 @@ from file_tpl_handler import FileTPLHandler
 from file_id_handler import FileIdHandler
 # from objects_handler import ObjectsHandler
 from nv_oh import ObjectsHandler  # nv_oh_backup nv_oh
+import instrumentation
+from config import DEFAULT_INSTRUMENTATION
 
 
 def excepthook(exc_type, exc_value, exc_tb):
@@ -40,8 +43,11 @@ class Director(QObject):
         self.mw.ppd.radio_point_interface_type.connect(self.objects_handler.set_point_interface_type)
         self.mw.ppd.radio_derail_interface_type.connect(self.objects_handler.set_derail_interface_type)
 
+        self.file_tpl_handler.entries_formed.connect(self.objects_handler.tpl_entries_got)
         self.file_tpl_handler.dict_formed.connect(self.objects_handler.file_tpl_got)
         self.objects_handler.send_objects_tree.connect(self.mw.tree_toolbar.tree_view.from_dict)
+        self.objects_handler.send_objects_tree_delta.connect(self.mw.tree_toolbar.tree_view.apply_delta)
+        self.file_id_handler.entries_formed.connect(self.objects_handler.obj_id_entries_got)
         self.file_id_handler.dict_formed.connect(self.objects_handler.file_obj_id_got)
         self.mw.attribute_toolbar.column_wgt.attr_edited.connect(self.objects_handler.attr_changed)
         self.mw.attribute_toolbar.column_wgt.add_element_request.connect(self.objects_handler.add_attrib_list_element)
@@ -49,17 +55,36 @@ class Director(QObject):
         self.mw.attribute_toolbar.column_wgt.get_suggested_value.connect(self.objects_handler.get_suggested_value)
 
         self.mw.generate_file.connect(self.objects_handler.generate_file)
+        self.mw.generate_all_files.connect(self.objects_handler.generate_all_files)
+        self.objects_handler.export_progress.connect(self.mw.show_export_progress)
+        self.objects_handler.export_finished.connect(self.mw.show_export_finished)
+        self.objects_handler.export_rejected.connect(self.mw.show_export_rejected)
         self.mw.export_format.connect(self.objects_handler.set_export_format)
+        self.mw.export_compact.connect(self.objects_handler.set_export_compact)
+        self.mw.config_directory_selected.connect(self.objects_handler.save_config)
+        self.mw.template_directory_selected.connect(self.objects_handler.save_template)
+        self.mw.tpl_opened.connect(self.objects_handler.tpl_file_opened)
+        self.mw.obj_id_opened.connect(self.objects_handler.obj_id_file_opened)
+        self.objects_handler.project_saved.connect(self.mw.show_project_saved)
         self.mw.input_config_file_opened.connect(self.objects_handler.input_config_file_opened)
+        self.mw.input_config_files_opened.connect(self.objects_handler.input_config_files_opened)
         self.mw.clear_objects.connect(self.objects_handler.clear_objects)
 
         # self.mw.auto_open_tpl()
-        self.objects_handler.send_objects_tree.emit(self.objects_handler.str_objects_tree)
+        self.objects_handler.emit_objects_tree()
         self.mw.ppd.init_buttons_state()
         # self.mw.open_prop_window()
 
 
+def dump_instrumentation():
+    instrumentation.logger.info("Instrumentation probes\n%s", instrumentation.dump())
+
+
 if __name__ == '__main__':
+    instrumentation.setup_logging()
+    if DEFAULT_INSTRUMENTATION:
+        instrumentation.enable()
+        atexit.register(dump_instrumentation)
     app = QApplication(sys.argv)
     d = Director()
     sys.exit(app.exec_())
@@ -11,12 +11,15 @@ from PyQt5.QtCore import pyqtSignal, Qt, QObject, QModelIndex
 from PyQt5.Qt import QStandardItemModel, QStandardItem, QMouseEvent, QContextMenuEvent
 
 from file_object_conversions import attr_name_from_object_to_file
+from tree_delta import TreeDeltaKind, ObjectsTreeDelta
 from project_properties_dialog import ProjectPropertiesDialog
 from config import MAIN_CLASSES_TREE, SPACED_STARTS, ONE_LINE_HEIGHT, SINGLE_ATTRIBUTE_PROPERTIES, \
     NAMED_ATTRIBUTE_PROPERTIES, ADDRESS, PROPERTIES, INTERNAL_STRUCTURE, LINE_EDIT_STYLESHEET, \
-    FILE_NAME_TO_CLASSES, DEFAULT_EXPORT_FORMAT
+    FILE_NAME_TO_CLASSES, DEFAULT_EXPORT_FORMAT, DEFAULT_EXPORT_COMPACT
+from instrumentation import get_logger
 
 CONFIG_FILE_XML_NAMES = ["TrainRoute", "ShuntingRoute", "PpoSystemEnv"]
+logger = get_logger(__name__)
 
 
 def camelcase_to_downcase(s: str, skip_first_underscore: bool = True):
@@ -33,12 +36,15 @@ def camelcase_to_downcase(s: str, skip_first_underscore: bool = True):
 
 class MainWindow(QMainWindow):
     input_config_file_opened = pyqtSignal(str)
+    input_config_files_opened = pyqtSignal(list)
     tpl_opened = pyqtSignal(str)
     obj_id_opened = pyqtSignal(str)
     template_directory_selected = pyqtSignal(str)
     config_directory_selected = pyqtSignal(str)
     generate_file = pyqtSignal(str)
+    generate_all_files = pyqtSignal()
     export_format = pyqtSignal(str)
+    export_compact = pyqtSignal(bool)
     clear_objects = pyqtSignal()
 
     def __init__(self):
@@ -79,10 +85,16 @@ class MainWindow(QMainWindow):
             ag.addAction(act)
             if format_str == DEFAULT_EXPORT_FORMAT:
                 act.setChecked(True)
+        format_menu.addSeparator()
+        compact_action = format_menu.addAction("Compact json")
+        compact_action.setCheckable(True)
+        compact_action.setChecked(DEFAULT_EXPORT_COMPACT)
+        compact_action.toggled.connect(self.export_compact)
 
         gen_menu.addSeparator()
 
         gen_menu.addAction("&Import...").triggered.connect(self.import_config_file)
+        gen_menu.addAction("Import &directory...").triggered.connect(self.import_config_directory)
         gen_menu.addAction("&Clear objects").triggered.connect(self.clear_objects)
         # import_menu = gen_menu.addMenu("Import")
 
@@ -98,10 +110,16 @@ class MainWindow(QMainWindow):
         self.ppd.show()
 
     def import_config_file(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, 'Open File', './config_examples/ribatskoe_json', 'json, xml Files (*.xml *.json)')
-        if not file_name:
+        file_names, _ = QFileDialog.getOpenFileNames(self, 'Open File', './config_examples/ribatskoe_json', 'json, xml Files (*.xml *.json)')
+        if not file_names:
+            return
+        self.input_config_files_opened.emit(file_names)
+
+    def import_config_directory(self):
+        dir_name = QFileDialog.getExistingDirectory(self, 'Open Directory', './config_examples/')
+        if not dir_name:
             return
-        self.input_config_file_opened.emit(file_name)
+        self.input_config_files_opened.emit([dir_name])
 
     def open_tpl(self):
         file_name, _ = QFileDialog.getOpenFileName(self, 'Open File', './input/', 'xml Files (*.xml)')
@@ -135,8 +153,29 @@ class MainWindow(QMainWindow):
         self.generate_file.emit(obj_group_name)
 
     def gen_all_files(self):
-        for file_name in FILE_NAME_TO_CLASSES:
-            self.generate_file.emit(file_name)
+        self.statusBar().showMessage("Exporting...")
+        self.generate_all_files.emit()
+
+    def show_export_progress(self, file_name: str, done: int, total: int):
+        self.statusBar().showMessage("Exported {} ({}/{})".format(file_name, done, total))
+
+    def show_export_finished(self, summary):
+        if summary.failed:
+            self.statusBar().showMessage("Export failed: {}".format(
+                ", ".join(group.file_name for group in summary.failed)))
+        else:
+            self.statusBar().showMessage("Exported {} objects, {} of {} files written in {:.2f} s".format(
+                summary.objects_count, len(summary.written), len(summary.groups), summary.total_time), 10000)
+
+    def show_export_rejected(self, reason: str):
+        self.statusBar().showMessage("Export rejected: {}".format(reason), 10000)
+
+    def show_project_saved(self, summary, error: str):
+        if error:
+            self.statusBar().showMessage("Save to {} failed: {}".format(summary.directory, error))
+        else:
+            self.statusBar().showMessage("Saved {} objects, {} files to {} in {:.2f} s".format(
+                summary.objects_count, len(summary.groups), summary.directory, summary.total_time), 10000)
 
 
 class TreeToolBarWidget(QTreeView):
@@ -158,7 +197,7 @@ class TreeToolBarWidget(QTreeView):
         self.simple_shunting_names: set[str] = set()
         self.adj_point_shunting_names: set[str] = set()
         self.obj_names: set[str] = set()
-        self.index_to_obj_name: dict[QModelIndex, str] = {}
+        self.applying_delta = False
         self.cls_name_to_index: dict[str, QModelIndex] = {}
         self.expanded_indexes: set[QModelIndex] = set()
         self.expanded.connect(self.add_expanded_index)
@@ -167,6 +206,7 @@ class TreeToolBarWidget(QTreeView):
         self.old_slider_range = (0, 0)
         # self.verticalScrollBar().setTracking(False)
         self.class_items: dict[str, QStandardItem] = {}
+        self.obj_items: dict[tuple[str, str], QStandardItem] = {}  # class and object name: item
         self.init_classes_tree()
 
     def add_expanded_index(self, idx: QModelIndex):
@@ -206,21 +246,71 @@ class TreeToolBarWidget(QTreeView):
         self.obj_names.clear()
         self.simple_shunting_names.clear()
         self.adj_point_shunting_names.clear()
+        self.obj_items.clear()
         for class_name in d:
             class_item = self.class_items[class_name]
             class_item.removeRows(0, class_item.rowCount())
             for obj_name in d[class_name]:
-                if class_name == "PpoShuntingSignal":
-                    self.simple_shunting_names.add(obj_name)
-                if class_name == "PpoShuntingSignalWithTrackAnD":
-                    self.adj_point_shunting_names.add(obj_name)
-                self.obj_names.add(obj_name)
-                item_obj = QStandardItem(obj_name)
-                class_item.appendRow(item_obj)
-                self.index_to_obj_name[item_obj.index()] = obj_name
+                self.register_obj_name(class_name, obj_name)
+                class_item.appendRow(self.make_obj_item(class_name, obj_name))
         for idx in self.expanded_indexes:
             self.expand(idx)
 
+    def apply_delta(self, deltas: list[ObjectsTreeDelta]):
+        """ only affected rows are changed, item_changed is not emitted for them,
+            removed and renamed rows are found by their items, not by scan of class rows """
+        self.applying_delta = True
+        for delta in deltas:
+            if delta.kind == TreeDeltaKind.added:
+                self.insert_obj_item(delta.cls_name, delta.obj_name, delta.position)
+            elif delta.kind == TreeDeltaKind.removed:
+                self.remove_obj_item(delta.cls_name, delta.obj_name)
+            elif delta.kind == TreeDeltaKind.renamed:
+                item_obj = self.obj_items.pop((delta.cls_name, delta.obj_name))
+                self.obj_items[(delta.cls_name, delta.new_obj_name)] = item_obj
+                item_obj.setText(delta.new_obj_name)
+                item_obj.setData(delta.new_obj_name, Qt.UserRole)
+                self.unregister_obj_name(delta.cls_name, delta.obj_name)
+                self.register_obj_name(delta.cls_name, delta.new_obj_name)
+            elif delta.kind == TreeDeltaKind.moved:
+                self.remove_obj_item(delta.cls_name, delta.obj_name)
+                self.insert_obj_item(delta.new_cls_name, delta.obj_name, delta.new_position)
+            else:
+                self.applying_delta = False
+                raise ValueError("Unknown tree delta kind {}".format(delta.kind))
+        self.applying_delta = False
+        for idx in self.expanded_indexes:
+            self.expand(idx)
+
+    def make_obj_item(self, class_name: str, obj_name: str) -> QStandardItem:
+        """ name before editing is kept in UserRole for rename request """
+        item_obj = QStandardItem(obj_name)
+        item_obj.setData(obj_name, Qt.UserRole)
+        self.obj_items[(class_name, obj_name)] = item_obj
+        return item_obj
+
+    def insert_obj_item(self, class_name: str, obj_name: str, position: int):
+        self.register_obj_name(class_name, obj_name)
+        self.class_items[class_name].insertRow(position, self.make_obj_item(class_name, obj_name))
+
+    def remove_obj_item(self, class_name: str, obj_name: str):
+        self.unregister_obj_name(class_name, obj_name)
+        self.class_items[class_name].removeRow(self.obj_items.pop((class_name, obj_name)).row())
+
+    def register_obj_name(self, class_name: str, obj_name: str):
+        if class_name == "PpoShuntingSignal":
+            self.simple_shunting_names.add(obj_name)
+        if class_name == "PpoShuntingSignalWithTrackAnD":
+            self.adj_point_shunting_names.add(obj_name)
+        self.obj_names.add(obj_name)
+
+    def unregister_obj_name(self, class_name: str, obj_name: str):
+        if class_name == "PpoShuntingSignal":
+            self.simple_shunting_names.discard(obj_name)
+        if class_name == "PpoShuntingSignalWithTrackAnD":
+            self.adj_point_shunting_names.discard(obj_name)
+        self.obj_names.discard(obj_name)
+
     def old_from_dict(self, d: OrderedDict[str, list[str]]):
         self.class_names.clear()
         self.obj_names.clear()
@@ -242,9 +332,7 @@ class TreeToolBarWidget(QTreeView):
                 if class_name == "PpoShuntingSignalWithTrackAnD":
                     self.adj_point_shunting_names.add(obj_name)
                 self.obj_names.add(obj_name)
-                item_obj = QStandardItem(obj_name)
-                item_class.appendRow(item_obj)
-                self.index_to_obj_name[item_obj.index()] = obj_name
+                item_class.appendRow(self.make_obj_item(class_name, obj_name))
         for idx in self.expanded_indexes:
             self.expand(idx)
         self.restore_scrollbar_state()
@@ -282,8 +370,10 @@ class TreeToolBarWidget(QTreeView):
             contextMenu.exec_(self.mapToGlobal(a0.pos()))
 
     def item_changed(self, item: QStandardItem):
+        if self.applying_delta:
+            return
         self.save_scrollbar_state()
-        self.send_rename.emit(self.index_to_obj_name[item.index()], item.text())
+        self.send_rename.emit(item.data(Qt.UserRole), item.text())
 
     def send_add_new_(self, val: str):
         self.add_expanded_index(self.cls_name_to_index[val])
@@ -498,7 +588,7 @@ class AttributeWidget(QWidget):
         button.clicked.connect(partial(self.remove_element, address))
 
     def decorate_line_edit_and_label_by_properties(self, le: QLineEdit, label: QLabel, prop: dict):
-        print("decor_line_edit_by_properties", prop)
+        logger.debug("decor_line_edit_by_properties %s", prop)
         text = prop['displaying_value']
         is_suggested = prop['is_suggested']
         error_message = prop['error_message']
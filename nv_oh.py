@@ -1,62 +1,138 @@
 from __future__ import annotations
 
 import os.path
+import time
 from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from typing import Type, Iterable, Optional, Any, Callable, Union
 import json
 
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtCore import QObject
 
-from config import FILE_NAME_TO_CLASSES, MAIN_CLASSES_TREE, TPL_TO_OBJ_ID, \
-    DEFAULT_SIGNAL_I_TYPE, DEFAULT_POINT_I_TYPE, DEFAULT_DERAIL_I_TYPE, DEFAULT_AUTO_ADD_IO, DEFAULT_EXPORT_FORMAT
+from config import FILE_NAME_TO_CLASSES, MAIN_CLASSES_TREE, \
+    DEFAULT_SIGNAL_I_TYPE, DEFAULT_POINT_I_TYPE, DEFAULT_DERAIL_I_TYPE, DEFAULT_AUTO_ADD_IO, DEFAULT_EXPORT_FORMAT, \
+    DEFAULT_CHECK_INDEXES, DEFAULT_TRUSTED_LOAD, DEFAULT_TRUSTED_LOAD_CHECKS
 from attribute_management import AttributeAddress, AttributeCommand, \
-    ComplexAttributeManagementCommand, StrSingleAttribute, UnaryAttribute
+    ComplexAttributeManagementCommand
 from aar_descriptor import AttributeAccessRulesDescriptor
-from descr_value_checkers import ValueInSetChecker
-from ppo_object import set_tag, get_tag, PpoObject, PpoAnDtrack, PpoLightSignalCi, PpoLightSignalRi, PpoRoutePointer, \
-    PpoRoutePointerRi, PpoPoint, PpoPointMachineCi, PpoAutomaticBlockingSystem, PpoAutomaticBlockingSystemRi, \
-    PpoSemiAutomaticBlockingSystem, PpoSemiAutomaticBlockingSystemRi, PpoRailCrossing, PpoRailCrossingRi, \
-    PpoTrackCrossroad, PpoTrackUnit, PpoTrackEncodingPoint, PpoTrainSignal, PpoWarningSignal, PpoRepeatSignal, PpoTrack, \
-    PpoTrackAnDwithPoint, PpoLineEnd, AdditionalSwitch, SectionAndIgnoreCondition, PpoControlDeviceDerailmentStockCi, \
-    PpoCodeEnablingRelayALS, PpoCabinetUsoBk, PpoInsulationResistanceMonitoring, PpoPointMachinesCurrentMonitoring, \
-    PpoControlAreaBorder, PpoShuntingSignal, PpoPointSection, PpoTrackSection, PpoShuntingSignalWithTrackAnD, \
-    PpoFictionalRepeatingShuntingSignal, PpoGroupTrainSignal, StartWarningArea, PpoFictionalSignal, \
-    PpoInterstationWaySignal, PpoIndicationSignal, PpoInterstationWayFictionalSignal, \
-    PpoInterstationWayTrack, PpoIndicationTrack, \
-    PpoCodeGeneratorALS, \
-    PpoGeneralPurposeRelayInput, PpoGeneralPurposeRelayOutput, PpoGeneralPurposeRelayTranslator, \
-    PpoSignalRelayRepeater, PpoTrackRelayRepeater, PpoGeneralPurposeGroupRelayInput, \
-    PpoTrackReceiverRi, PpoTrackReceiverCi, \
-    PpoAdjacentStationTrainSignal, PpoInterstationWayBorder, PpoAdjacentStationTrainSignalRi, PpoInterstationWayBorderRi, \
-    PpoControlDeviceDerailmentStock, \
-    StationOperatorWorkset, ControlArea, \
-    PpoTrainNotificationRi, PpoGroupRailFittersWarningArea, PpoRailFittersWarningAreaRi, PpoRailFittersWarningArea, \
-    PpoInterstationWayCrossroad, \
-    PpoTelesignalization, PpoFireAndSecurityAlarm, PpoPointsMonitoring, PpoDieselGenerator, PpoLightMode, PpoLightModeRi, \
-    PpoEncodingUnitsMonitoring, PpoTrackSensorsMonitoring, PpoIndicationGroupTrackSensors
+from attribute_address_access import stored_str_attr
+from descr_value_checkers import ValueInSetChecker, MembershipIndex
+from ppo_class_registry import class_info, make_ppo_object
+from tree_delta import TreeDeltaKind, ObjectsTreeDelta, compress_tree_deltas
+from tpl_obj_id_reconciliation import ReconciliationReport, reconcile
+from xml_records import SourceEntry, TplRecord, ObjectIdRecord
+from ppo_address import AddressReport, validate_addresses
+from export_engine import ExportEngine, ExportSummary, GroupExport, MANIFEST_FILE_NAME
+from project_save import ProjectSaveError, ProjectSaveSummary, save_project
+from instrumentation import get_logger
+from ppo_object import set_tag, get_tag, PpoObject, PpoRoutePointer, PpoPoint, PpoAutomaticBlockingSystemRi, \
+    PpoRailCrossing, PpoTrackCrossroad, PpoTrackUnit, PpoTrackEncodingPoint, PpoTrainSignal, PpoWarningSignal, \
+    PpoRepeatSignal, PpoTrack, PpoTrackAnDwithPoint, PpoLineEnd, AdditionalSwitch, SectionAndIgnoreCondition, \
+    PpoControlDeviceDerailmentStockCi, PpoCodeEnablingRelayALS, PpoCabinetUsoBk, PpoInsulationResistanceMonitoring, \
+    PpoPointMachinesCurrentMonitoring, PpoFictionalRepeatingShuntingSignal, PpoGroupTrainSignal, StartWarningArea, \
+    PpoFictionalSignal
 
 """ ------------------------------------- Globals ------------------------------------ """
 
-RELATED_INTERFACE_CLASSES = {"PpoTrainSignal": "PpoLightSignal",
-                             "PpoShuntingSignal": "PpoLightSignal",
-                             "PpoRoutePointer": "PpoRoutePointer",
-                             "PpoAutomaticBlockingSystem": "PpoAutomaticBlockingSystem",
-                             "PpoSemiAutomaticBlockingSystem": "PpoSemiAutomaticBlockingSystem"}
+logger = get_logger(__name__)
+
+ALL_TRACKS = ("PpoTrackSection", "PpoPointSection", "PpoTrackAnDwithPoint", "PpoTrackAnD")
+ALL_PHYSICAL_SIGNALS = ("PpoTrainSignal", "PpoGroupTrainSignal", "PpoWarningSignal", "PpoRepeatSignal",
+                        "PpoShuntingSignal", "PpoShuntingSignalWithTrackAnD")
 
 
 class TagRepeatingError(Exception):
     pass
 
 
+class IndexConsistencyError(Exception):
+    pass
+
+
+@dataclass
+class ImportSummary:
+    files: list[tuple[str, int, float]] = field(default_factory=list)  # file name, objects count, seconds
+    checks_count: int = 0
+    checks_time: float = 0.
+    notification_time: float = 0.
+    total_time: float = 0.
+
+    @property
+    def objects_count(self) -> int:
+        return sum(count for _, count, _ in self.files)
+
+    def __str__(self):
+        lines = ["Imported {} objects from {} files in {:.3f} s".format(self.objects_count, len(self.files),
+                                                                        self.total_time)]
+        for file_name, count, seconds in self.files:
+            lines.append("    {}: {} objects, {:.3f} s".format(os.path.basename(file_name), count, seconds))
+        lines.append("    deferred checks: {}, {:.3f} s".format(self.checks_count, self.checks_time))
+        lines.append("    tree notification: {:.3f} s".format(self.notification_time))
+        return "\n".join(lines)
+
+
+def expand_config_paths(paths: Iterable[str]) -> list[str]:
+    """ directories are replaced by json group files in them, export manifest is skipped """
+    file_names = []
+    for path in paths:
+        if os.path.isdir(path):
+            file_names.extend(os.path.join(path, file_name) for file_name in sorted(os.listdir(path))
+                              if file_name.endswith("json") and file_name != MANIFEST_FILE_NAME)
+        else:
+            file_names.append(path)
+    return file_names
+
+
+def rename_key_in_place(odict: OrderedDict, old_key: Any, new_key: Any) -> int:
+    """ replaces key keeping its position, moves only keys from the nearest end of odict, returns position,
+        cost is O(min(position, len(odict) - position)), so renames in the middle of big class are slowest """
+    forward_keys, backward_keys = [], []
+    forward_iter, backward_iter = iter(odict), reversed(odict)
+    last_position = len(odict) - 1
+    while True:
+        key = next(forward_iter)
+        if key == old_key:
+            value = odict.pop(old_key)
+            odict[new_key] = value
+            odict.move_to_end(new_key, False)
+            for prefix_key in reversed(forward_keys):
+                odict.move_to_end(prefix_key, False)
+            return len(forward_keys)
+        forward_keys.append(key)
+        key = next(backward_iter)
+        if key == old_key:
+            value = odict.pop(old_key)
+            odict[new_key] = value
+            for suffix_key in reversed(backward_keys):
+                odict.move_to_end(suffix_key)
+            return last_position - len(backward_keys)
+        backward_keys.append(key)
+
+
 class ObjectsHandler(QObject):
     send_objects_tree = pyqtSignal(dict)
+    send_objects_tree_delta = pyqtSignal(list)
     send_attrib_dict = pyqtSignal(dict)
+    export_progress = pyqtSignal(str, int, int)  # written file group, done and total groups count
+    export_finished = pyqtSignal(object)  # ExportSummary
+    export_rejected = pyqtSignal(str)  # reason, export was not started
+    project_saved = pyqtSignal(object, str)  # ProjectSaveSummary, error message
 
     def __init__(self):
         super().__init__()
 
         self.objects_tree: OrderedDict[str, OrderedDict[str, PpoObject]] = OrderedDict()  # output structure
+        self._name_to_obj: dict[str, PpoObject] = {}
+        self._obj_name_to_cls_name: dict[str, str] = {}
+        self._name_to_cls_names: dict[str, list[str]] = {}  # all classes having object with name
+        self._cls_positions: dict[str, int] = {}  # class position in objects_tree
+        self.check_indexes: bool = DEFAULT_CHECK_INDEXES
+        self._tree_deltas: list[ObjectsTreeDelta] = []
+        self._bulk_depth: int = 0
+        self.membership_indexes: dict[tuple[str, ...], MembershipIndex] = {}  # checkers domain: names in domain
+        self._cls_name_to_indexes: dict[str, list[MembershipIndex]] = {}
         self.init_obj_tree()
         self.bind_checkers_storages()
 
@@ -69,31 +145,82 @@ class ObjectsHandler(QObject):
         self.bool_obj_id_got = False
         self.tpl_dict: OrderedDict[str, list[str]] = OrderedDict()  # input structure from tpl
         self.obj_id_dict: OrderedDict[str, list[str]] = OrderedDict()
+        self.tpl_entries: list[TplRecord] = []  # tpl and obj_id records with source lines
+        self.obj_id_entries: list[ObjectIdRecord] = []
+        self.reconciliation_report: Optional[ReconciliationReport] = None
+        self.address_report: Optional[AddressReport] = None
 
         self.auto_add_io: bool = DEFAULT_AUTO_ADD_IO
+        self.trusted_load: bool = DEFAULT_TRUSTED_LOAD
+        self.trusted_load_checks: bool = DEFAULT_TRUSTED_LOAD_CHECKS
         self.signal_itype: str = DEFAULT_SIGNAL_I_TYPE
         self.point_itype: str = DEFAULT_POINT_I_TYPE
         self.derail_itype: str = DEFAULT_DERAIL_I_TYPE
 
         self.export_format = DEFAULT_EXPORT_FORMAT
+        self.export_directory: str = os.path.join("output", "config")
+        self.export_engine = ExportEngine()
+        self.export_summary: Optional[ExportSummary] = None
+        self.template_files: dict[str, str] = {}  # template source kind: opened file, saved with template
 
     def set_export_format(self, format_str: str):
         self.export_format = format_str
 
+    def set_export_compact(self, ch: bool):
+        self.export_engine.compact = ch
+
+    @contextmanager
+    def bulk_update(self, summary: ImportSummary = None):
+        """ tree notifications and value checks are suspended till the outermost block exits,
+            then checks are run once and whole tree is emitted """
+        self._bulk_depth += 1
+        if self._bulk_depth == 1:
+            AttributeAccessRulesDescriptor.defer_checks()
+        try:
+            yield
+        finally:
+            self._bulk_depth -= 1
+            if not self._bulk_depth:
+                start = time.perf_counter()
+                checks_count = AttributeAccessRulesDescriptor.run_deferred_checks()
+                checks_end = time.perf_counter()
+                if self.check_indexes:
+                    self.check_indexes_consistency()
+                self.emit_objects_tree()
+                if summary:
+                    summary.checks_count = checks_count
+                    summary.checks_time = checks_end - start
+                    summary.notification_time = time.perf_counter() - checks_end
+
     def input_config_file_opened(self, file_name: str):
-        if file_name.endswith("json"):
-            with open(file_name, "r") as f:
-                d = json.load(f)
-                # print("d=", d)
-                for obj_d in d:
-                    self.make_ppo_obj_from_dict(obj_d)
+        self.input_config_files_opened([file_name])
+
+    def input_config_files_opened(self, paths: list[str]) -> ImportSummary:
+        summary = ImportSummary()
+        start = time.perf_counter()
+        self.export_engine.forget()
+        with self.bulk_update(summary):
+            for file_name in expand_config_paths(paths):
+                if file_name.endswith("json"):
+                    file_start = time.perf_counter()
+                    with open(file_name, "r") as f:
+                        d = json.load(f)
+                    for obj_d in d:
+                        self.make_ppo_obj_from_dict(obj_d)
+                    summary.files.append((file_name, len(d), time.perf_counter() - file_start))
+        summary.total_time = time.perf_counter() - start
+        logger.info("%s", summary)
+        return summary
 
     def make_ppo_obj_from_dict(self, d: dict):
         cls_name = d["class"]
-        obj: PpoObject = eval(cls_name)()
-        obj.from_dict(d)
+        obj = make_ppo_object(cls_name)
+        if self.trusted_load:
+            obj.from_trusted_dict(d, self.trusted_load_checks)
+        else:
+            obj.from_dict(d)
         self.insert_to_objects_tree(cls_name, get_tag(obj), obj)
-        self.send_objects_tree.emit(self.str_objects_tree)
+        self.emit_tree_delta()
 
     def init_obj_tree(self):
         for partition in MAIN_CLASSES_TREE:
@@ -101,85 +228,93 @@ class ObjectsHandler(QObject):
                 class_names_list = MAIN_CLASSES_TREE[partition][class_group]
                 for cls_name in class_names_list:
                     self.objects_tree[cls_name] = OrderedDict()
+                    self._cls_positions.setdefault(cls_name, len(self._cls_positions))
 
     def clear_objects(self):
+        """ dicts are cleared in place, because checkers storages are bound to them """
         for cls_name in self.objects_tree:
-            self.objects_tree[cls_name] = OrderedDict()
-        self.send_objects_tree.emit(self.str_objects_tree)
+            self.objects_tree[cls_name].clear()
+        for index in self.membership_indexes.values():
+            index.clear()
+        self._name_to_obj.clear()
+        self._obj_name_to_cls_name.clear()
+        self._name_to_cls_names.clear()
+        self.tech_to_interf_dict.clear()
+        self.interf_to_tech_dict.clear()
+        self.export_engine.forget()
+        self.emit_objects_tree()
 
     def bind_checkers_storages(self):
-        all_tracks = [self.objects_tree["PpoTrackSection"],
-                      self.objects_tree["PpoPointSection"],
-                      self.objects_tree["PpoTrackAnDwithPoint"],
-                      self.objects_tree["PpoTrackAnD"]]
-        all_physical_signals = [self.objects_tree["PpoTrainSignal"],
-                                self.objects_tree["PpoGroupTrainSignal"],
-                                self.objects_tree["PpoWarningSignal"],
-                                self.objects_tree["PpoRepeatSignal"],
-                                self.objects_tree["PpoShuntingSignal"],
-                                self.objects_tree["PpoShuntingSignalWithTrackAnD"]]
-        PpoRoutePointer.routePointer.value_checkers = ValueInSetChecker(self.objects_tree["PpoRoutePointerRi"])
-        StartWarningArea.obj.value_checkers = ValueInSetChecker(all_tracks)
-        PpoTrainSignal.routePointer.value_checkers = ValueInSetChecker(self.objects_tree["PpoRoutePointerRi"])
-        PpoTrainSignal.groupRoutePointers.value_checkers = ValueInSetChecker(self.objects_tree["PpoRoutePointerRi"])
-        PpoTrainSignal.uksps.value_checkers = ValueInSetChecker(self.objects_tree["PpoControlDeviceDerailmentStock"])
-        PpoGroupTrainSignal.routePointer.value_checkers = ValueInSetChecker(self.objects_tree["PpoRoutePointerRi"])
-        PpoFictionalSignal.groupSignal.value_checkers = ValueInSetChecker(self.objects_tree["PpoGroupTrainSignal"])
-        PpoWarningSignal.signalTag.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrainSignal"])
-        PpoRepeatSignal.signalTag.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrainSignal"])
-        PpoFictionalRepeatingShuntingSignal.groupSignal.value_checkers = ValueInSetChecker(
-            self.objects_tree["PpoGroupTrainSignal"])
-        PpoTrack.trackUnit.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrackUnit"])
-        PpoTrackAnDwithPoint.oppositeTrackAnDwithPoint.value_checkers = ValueInSetChecker(
-            self.objects_tree["PpoTrackAnDwithPoint"])
-        PpoLineEnd.trackUnit.value_checkers = ValueInSetChecker([self.objects_tree["PpoTrackUnit"], "nullptr"])
-        AdditionalSwitch.point.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        SectionAndIgnoreCondition.section.value_checkers = ValueInSetChecker(self.objects_tree["PpoPointSection"])
-        SectionAndIgnoreCondition.point.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoPoint.section.value_checkers = ValueInSetChecker(self.objects_tree["PpoPointSection"])
-        PpoPoint.guardPlusPlus.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoPoint.guardPlusMinus.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoPoint.guardMinusPlus.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoPoint.guardMinusMinus.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoPoint.lockingPlus.value_checkers = ValueInSetChecker(self.objects_tree["PpoPointSection"])
-        PpoPoint.lockingPlusSignal.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrainSignal"])
-        PpoPoint.lockingMinus.value_checkers = ValueInSetChecker(self.objects_tree["PpoPointSection"])
-        PpoPoint.lockingMinusSignal.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrainSignal"])
-        PpoPoint.pairPoint.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoAutomaticBlockingSystemRi.adjEnterSig.value_checkers = ValueInSetChecker(
-            self.objects_tree["PpoLightSignalRi"])
-        PpoTrackCrossroad.iObjTag.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrainNotificationRi"])
-        PpoTrackCrossroad.railCrossing.value_checkers = ValueInSetChecker(self.objects_tree["PpoRailCrossingRi"])
-        PpoRailCrossing.crossroad.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrackCrossroad"])
-        PpoControlDeviceDerailmentStockCi.enterSignal.value_checkers = ValueInSetChecker(
-            self.objects_tree["PpoTrainSignal"])
-        PpoTrackUnit.iObjsTag.value_checkers = ValueInSetChecker(all_tracks)
-        PpoTrackUnit.evenTag.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrackEncodingPoint"])
-        PpoTrackUnit.oddTag.value_checkers = ValueInSetChecker(self.objects_tree["PpoTrackEncodingPoint"])
-        PpoCodeEnablingRelayALS.okv.value_checkers = ValueInSetChecker(
-            self.objects_tree["PpoGeneralPurposeRelayOutput"])
-        PpoTrackEncodingPoint.encUnitALS.value_checkers = ValueInSetChecker(
-            self.objects_tree["PpoCodeEnablingRelayALS"])
-        PpoTrackEncodingPoint.own.value_checkers = ValueInSetChecker(all_tracks)
-        PpoTrackEncodingPoint.freeState.value_checkers = ValueInSetChecker(all_tracks)
-        PpoTrackEncodingPoint.plusPoints.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoTrackEncodingPoint.minusPoints.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoCabinetUsoBk.lightSignals.value_checkers = ValueInSetChecker(all_physical_signals)
-        PpoCabinetUsoBk.hiCratePointMachines.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
-        PpoCabinetUsoBk.loCratePointMachines.value_checkers = ValueInSetChecker(self.objects_tree["PpoPoint"])
+        """ checkers of one domain share membership index """
+        self.membership_indexes.clear()
+        self._cls_name_to_indexes.clear()
+        PpoRoutePointer.routePointer.value_checkers = self.in_set_checker("PpoRoutePointerRi")
+        StartWarningArea.obj.value_checkers = self.in_set_checker(*ALL_TRACKS)
+        PpoTrainSignal.routePointer.value_checkers = self.in_set_checker("PpoRoutePointerRi")
+        PpoTrainSignal.groupRoutePointers.value_checkers = self.in_set_checker("PpoRoutePointerRi")
+        PpoTrainSignal.uksps.value_checkers = self.in_set_checker("PpoControlDeviceDerailmentStock")
+        PpoGroupTrainSignal.routePointer.value_checkers = self.in_set_checker("PpoRoutePointerRi")
+        PpoFictionalSignal.groupSignal.value_checkers = self.in_set_checker("PpoGroupTrainSignal")
+        PpoWarningSignal.signalTag.value_checkers = self.in_set_checker("PpoTrainSignal")
+        PpoRepeatSignal.signalTag.value_checkers = self.in_set_checker("PpoTrainSignal")
+        PpoFictionalRepeatingShuntingSignal.groupSignal.value_checkers = self.in_set_checker("PpoGroupTrainSignal")
+        PpoTrack.trackUnit.value_checkers = self.in_set_checker("PpoTrackUnit")
+        PpoTrackAnDwithPoint.oppositeTrackAnDwithPoint.value_checkers = self.in_set_checker("PpoTrackAnDwithPoint")
+        PpoLineEnd.trackUnit.value_checkers = self.in_set_checker("PpoTrackUnit", "nullptr")
+        AdditionalSwitch.point.value_checkers = self.in_set_checker("PpoPoint")
+        SectionAndIgnoreCondition.section.value_checkers = self.in_set_checker("PpoPointSection")
+        SectionAndIgnoreCondition.point.value_checkers = self.in_set_checker("PpoPoint")
+        PpoPoint.section.value_checkers = self.in_set_checker("PpoPointSection")
+        PpoPoint.guardPlusPlus.value_checkers = self.in_set_checker("PpoPoint")
+        PpoPoint.guardPlusMinus.value_checkers = self.in_set_checker("PpoPoint")
+        PpoPoint.guardMinusPlus.value_checkers = self.in_set_checker("PpoPoint")
+        PpoPoint.guardMinusMinus.value_checkers = self.in_set_checker("PpoPoint")
+        PpoPoint.lockingPlus.value_checkers = self.in_set_checker("PpoPointSection")
+        PpoPoint.lockingPlusSignal.value_checkers = self.in_set_checker("PpoTrainSignal")
+        PpoPoint.lockingMinus.value_checkers = self.in_set_checker("PpoPointSection")
+        PpoPoint.lockingMinusSignal.value_checkers = self.in_set_checker("PpoTrainSignal")
+        PpoPoint.pairPoint.value_checkers = self.in_set_checker("PpoPoint")
+        PpoAutomaticBlockingSystemRi.adjEnterSig.value_checkers = self.in_set_checker("PpoLightSignalRi")
+        PpoTrackCrossroad.iObjTag.value_checkers = self.in_set_checker("PpoTrainNotificationRi")
+        PpoTrackCrossroad.railCrossing.value_checkers = self.in_set_checker("PpoRailCrossingRi")
+        PpoRailCrossing.crossroad.value_checkers = self.in_set_checker("PpoTrackCrossroad")
+        PpoControlDeviceDerailmentStockCi.enterSignal.value_checkers = self.in_set_checker("PpoTrainSignal")
+        PpoTrackUnit.iObjsTag.value_checkers = self.in_set_checker(*ALL_TRACKS)
+        PpoTrackUnit.evenTag.value_checkers = self.in_set_checker("PpoTrackEncodingPoint")
+        PpoTrackUnit.oddTag.value_checkers = self.in_set_checker("PpoTrackEncodingPoint")
+        PpoCodeEnablingRelayALS.okv.value_checkers = self.in_set_checker("PpoGeneralPurposeRelayOutput")
+        PpoTrackEncodingPoint.encUnitALS.value_checkers = self.in_set_checker("PpoCodeEnablingRelayALS")
+        PpoTrackEncodingPoint.own.value_checkers = self.in_set_checker(*ALL_TRACKS)
+        PpoTrackEncodingPoint.freeState.value_checkers = self.in_set_checker(*ALL_TRACKS)
+        PpoTrackEncodingPoint.plusPoints.value_checkers = self.in_set_checker("PpoPoint")
+        PpoTrackEncodingPoint.minusPoints.value_checkers = self.in_set_checker("PpoPoint")
+        PpoCabinetUsoBk.lightSignals.value_checkers = self.in_set_checker(*ALL_PHYSICAL_SIGNALS)
+        PpoCabinetUsoBk.hiCratePointMachines.value_checkers = self.in_set_checker("PpoPoint")
+        PpoCabinetUsoBk.loCratePointMachines.value_checkers = self.in_set_checker("PpoPoint")
         PpoCabinetUsoBk.controlDeviceDerailmentStocks.value_checkers = \
-            ValueInSetChecker(self.objects_tree["PpoControlDeviceDerailmentStockCi"])
+            self.in_set_checker("PpoControlDeviceDerailmentStockCi")
         PpoInsulationResistanceMonitoring.cabinets.value_checkers = \
-            ValueInSetChecker(self.objects_tree["PpoCabinetUsoBk"])
+            self.in_set_checker("PpoCabinetUsoBk")
         PpoPointMachinesCurrentMonitoring.cabinets.value_checkers = \
-            ValueInSetChecker(self.objects_tree["PpoCabinetUsoBk"])
+            self.in_set_checker("PpoCabinetUsoBk")
+
+    def in_set_checker(self, *domain: str) -> ValueInSetChecker:
+        """ domain items are class names of objects tree or constant values,
+            storages are class dicts for possible values, membership index is for checks """
+        if domain not in self.membership_indexes:
+            index = MembershipIndex(item for item in domain if item not in self.objects_tree)
+            for item in domain:
+                if item in self.objects_tree:
+                    for obj_name in self.objects_tree[item]:
+                        index.add(obj_name)
+                    self._cls_name_to_indexes.setdefault(item, []).append(index)
+            self.membership_indexes[domain] = index
+        storages = [self.objects_tree.get(item, item) for item in domain]
+        return ValueInSetChecker(storages if len(storages) > 1 else storages[0], self.membership_indexes[domain])
 
     @property
-    def obj_name_to_cls_name_dict(self):
-        result: OrderedDict[str, str] = OrderedDict()
-        for cls_name in self.objects_tree:
-            result.update(OrderedDict.fromkeys(self.objects_tree[cls_name], cls_name))
-        return result
+    def obj_name_to_cls_name_dict(self) -> dict[str, str]:
+        return self._obj_name_to_cls_name
 
     @property
     def str_objects_tree(self) -> OrderedDict[str, list[str]]:
@@ -189,123 +324,137 @@ class ObjectsHandler(QObject):
         return result
 
     @property
-    def name_to_obj_dict(self) -> OrderedDict[str, PpoObject]:
-        result: OrderedDict[str, PpoObject] = OrderedDict()
-        for cls_name in self.objects_tree:
-            result.update(self.objects_tree[cls_name])
-        return result
+    def name_to_obj_dict(self) -> dict[str, PpoObject]:
+        return self._name_to_obj
+
+    def emit_objects_tree(self):
+        """ full tree for view reset, pending deltas are included in it """
+        self._tree_deltas = []
+        self.send_objects_tree.emit(self.str_objects_tree)
+
+    def emit_tree_delta(self):
+        if self._bulk_depth or not self._tree_deltas:
+            return
+        deltas = compress_tree_deltas(self._tree_deltas)
+        self._tree_deltas = []
+        self.send_objects_tree_delta.emit(deltas)
+
+    def resolve_name(self, obj_name: str):
+        """ name indexes point to object of the last class in objects_tree having the name, as full rebuild
+            of name dicts did, objects with same name in other classes are kept in _name_to_cls_names """
+        cls_names = self._name_to_cls_names.get(obj_name)
+        if not cls_names:
+            self._name_to_cls_names.pop(obj_name, None)
+            self._name_to_obj.pop(obj_name, None)
+            self._obj_name_to_cls_name.pop(obj_name, None)
+            return
+        cls_name = max(cls_names, key=self._cls_positions.__getitem__)
+        self._name_to_obj[obj_name] = self.objects_tree[cls_name][obj_name]
+        self._obj_name_to_cls_name[obj_name] = cls_name
+
+    def cls_name_of(self, obj_name: str, obj: PpoObject) -> Optional[str]:
+        """ class of objects_tree holding this object under obj_name """
+        for cls_name in self._name_to_cls_names.get(obj_name, ()):
+            if self.objects_tree[cls_name][obj_name] is obj:
+                return cls_name
+        return None
 
     def insert_to_objects_tree(self, cls_name: str, obj_name: str, obj: PpoObject, to_begin: bool = True):
         if cls_name not in self.objects_tree:
             self.objects_tree[cls_name] = OrderedDict()
-        self.objects_tree[cls_name][obj_name] = obj
-        self.objects_tree[cls_name].move_to_end(obj_name, not to_begin)
+            self._cls_positions[cls_name] = len(self._cls_positions)
+        cls_dict = self.objects_tree[cls_name]
+        if obj_name in cls_dict:
+            self._tree_deltas.append(ObjectsTreeDelta(TreeDeltaKind.removed, cls_name, obj_name))
+        else:
+            for index in self._cls_name_to_indexes.get(cls_name, ()):
+                index.add(obj_name)
+            self._name_to_cls_names.setdefault(obj_name, []).append(cls_name)
+        cls_dict[obj_name] = obj
+        cls_dict.move_to_end(obj_name, not to_begin)
+        self._tree_deltas.append(ObjectsTreeDelta(TreeDeltaKind.added, cls_name, obj_name,
+                                                  0 if to_begin else len(cls_dict) - 1))
+        self.resolve_name(obj_name)
+        if self.check_indexes and not self._bulk_depth:
+            self.check_indexes_consistency()
+
+    def remove_from_objects_tree(self, obj_name: str, cls_name: str = "") -> PpoObject:
+        """ object of cls_name, or object found by name if class is not given """
+        cls_name = cls_name or self._obj_name_to_cls_name[obj_name]
+        cls_dict = self.objects_tree[cls_name]
+        self._tree_deltas.append(ObjectsTreeDelta(TreeDeltaKind.removed, cls_name, obj_name))
+        obj = cls_dict.pop(obj_name)
+        self._name_to_cls_names[obj_name].remove(cls_name)
+        self.resolve_name(obj_name)
+        for index in self._cls_name_to_indexes.get(cls_name, ()):
+            index.discard(obj_name)
+        if self.check_indexes and not self._bulk_depth:
+            self.check_indexes_consistency()
+        return obj
+
+    def rename_in_objects_tree(self, old_name: str, new_name: str):
+        """ object found by old_name is renamed, new_name must not be used in any class """
+        cls_name = self._obj_name_to_cls_name[old_name]
+        rename_key_in_place(self.objects_tree[cls_name], old_name, new_name)
+        for index in self._cls_name_to_indexes.get(cls_name, ()):
+            index.discard(old_name)
+            index.add(new_name)
+        self._tree_deltas.append(ObjectsTreeDelta(TreeDeltaKind.renamed, cls_name, old_name, new_obj_name=new_name))
+        self._name_to_cls_names[old_name].remove(cls_name)
+        self._name_to_cls_names.setdefault(new_name, []).append(cls_name)
+        self.resolve_name(old_name)
+        self.resolve_name(new_name)
+        if self.check_indexes and not self._bulk_depth:
+            self.check_indexes_consistency()
+
+    def check_indexes_consistency(self):
+        """ full rebuild of name indexes from objects_tree, O(station size) - only for debug """
+        name_to_obj: dict[str, PpoObject] = {}
+        obj_name_to_cls_name: dict[str, str] = {}
+        name_to_cls_names: dict[str, set[str]] = {}
+        for cls_name in self.objects_tree:
+            for obj_name, obj in self.objects_tree[cls_name].items():
+                name_to_obj[obj_name] = obj
+                obj_name_to_cls_name[obj_name] = cls_name
+                name_to_cls_names.setdefault(obj_name, set()).add(cls_name)
+        if name_to_obj != self._name_to_obj:
+            raise IndexConsistencyError("Name to object index differs from objects tree")
+        if obj_name_to_cls_name != self._obj_name_to_cls_name:
+            raise IndexConsistencyError("Name to class name index differs from objects tree")
+        if name_to_cls_names != {obj_name: set(cls_names) for obj_name, cls_names in self._name_to_cls_names.items()}:
+            raise IndexConsistencyError("Name to class names index differs from objects tree")
+        for domain, index in self.membership_indexes.items():
+            domain_values = {item for item in domain if item not in self.objects_tree}
+            for item in domain:
+                if item in self.objects_tree:
+                    domain_values.update(self.objects_tree[item])
+            if domain_values != index.values:
+                raise IndexConsistencyError("Membership index of {} differs from objects tree".format(domain))
 
     def init_object(self, cls_name, obj_name):
-        if cls_name == "PpoTrackAnD":
-            cls_ = PpoAnDtrack
-            obj = cls_()
-            set_tag(obj, obj_name)
-            self.insert_to_objects_tree(cls_name, obj_name, obj)
-
-        elif cls_name in ["PpoTrainSignal", "PpoShuntingSignal"]:
-            tpo_cls_ = eval(cls_name)
-            tpo_obj = tpo_cls_()
-            set_tag(tpo_obj, obj_name)
-            self.insert_to_objects_tree(cls_name, obj_name, tpo_obj)
-
-            if self.auto_add_io:
-                if self.signal_itype == "Ci":
-                    inter_cls_ = PpoLightSignalCi
-                    inter_obj = inter_cls_()
-                    set_tag(inter_obj, obj_name + "_Ci")
-                    self.insert_to_objects_tree("PpoLightSignalCi", get_tag(inter_obj), inter_obj)
-                    self.tech_to_interf_dict[tpo_obj] = inter_obj
-                elif self.signal_itype == "Ri":
-                    inter_cls_ = PpoLightSignalRi
-                    inter_obj = inter_cls_()
-                    set_tag(inter_obj, obj_name + "_Ri")
-                    self.insert_to_objects_tree("PpoLightSignalRi", get_tag(inter_obj), inter_obj)
-                    self.tech_to_interf_dict[tpo_obj] = inter_obj
-                else:
-                    assert False
-
-        elif cls_name == "PpoRoutePointer":
-            tpo_cls_ = PpoRoutePointer
-            tpo_obj = tpo_cls_()
-            set_tag(tpo_obj, obj_name)
-            self.insert_to_objects_tree(cls_name, obj_name, tpo_obj)
-
-            if self.auto_add_io:
-                inter_cls_ = PpoRoutePointerRi
-                inter_obj = inter_cls_()
-                set_tag(inter_obj, obj_name + "_Ri")
-                self.insert_to_objects_tree("PpoRoutePointerRi", get_tag(inter_obj), inter_obj)
-                self.tech_to_interf_dict[tpo_obj] = inter_obj
-
-        elif cls_name == "PpoPoint":
-            tpo_cls_ = PpoPoint
-            tpo_obj = tpo_cls_()
-            set_tag(tpo_obj, obj_name)
-            self.insert_to_objects_tree(cls_name, obj_name, tpo_obj)
-
-            if self.auto_add_io:
-                inter_cls_ = PpoPointMachineCi
-                inter_obj = inter_cls_()
-                set_tag(inter_obj, obj_name + "_Ci")
-                self.insert_to_objects_tree("PpoPointMachineCi", get_tag(inter_obj), inter_obj)
-                self.tech_to_interf_dict[tpo_obj] = inter_obj
-
-        elif cls_name == "PpoAutomaticBlockingSystem":
-            tpo_cls_ = PpoAutomaticBlockingSystem
-            tpo_obj = tpo_cls_()
-            set_tag(tpo_obj, obj_name)
-            self.insert_to_objects_tree(cls_name, obj_name, tpo_obj)
-
-            if self.auto_add_io:
-                inter_cls_ = PpoAutomaticBlockingSystemRi
-                inter_obj = inter_cls_()
-                set_tag(inter_obj, obj_name + "_Ri")
-                self.insert_to_objects_tree("PpoAutomaticBlockingSystemRi", get_tag(inter_obj), inter_obj)
-                self.tech_to_interf_dict[tpo_obj] = inter_obj
-
-        elif cls_name == "PpoSemiAutomaticBlockingSystem":
-            tpo_cls_ = PpoSemiAutomaticBlockingSystem
-            tpo_obj = tpo_cls_()
-            set_tag(tpo_obj, obj_name)
-            self.insert_to_objects_tree(cls_name, obj_name, tpo_obj)
-
-            if self.auto_add_io:
-                inter_cls_ = PpoSemiAutomaticBlockingSystemRi
-                inter_obj = inter_cls_()
-                set_tag(inter_obj, obj_name + "_Ri")
-                self.insert_to_objects_tree("PpoSemiAutomaticBlockingSystemRi", get_tag(inter_obj), inter_obj)
-                self.tech_to_interf_dict[tpo_obj] = inter_obj
-
-        elif cls_name == "PpoTrackCrossroad":
-            first_symbols = obj_name[:2]
-            if first_symbols not in self.name_to_obj_dict:
-                crossing_cls_ = PpoRailCrossing
-                crossing_obj = crossing_cls_()
-                set_tag(crossing_obj, first_symbols)
-                self.insert_to_objects_tree("PpoRailCrossing", get_tag(crossing_obj), crossing_obj)
-
-                if self.auto_add_io:
-                    ri_crossing_cls_ = PpoRailCrossingRi
-                    ri_crossing_obj = ri_crossing_cls_()
-                    set_tag(ri_crossing_obj, first_symbols + "_Ri")
-                    self.insert_to_objects_tree("PpoRailCrossingRi", get_tag(ri_crossing_obj), ri_crossing_obj)
-                    self.tech_to_interf_dict[crossing_obj] = ri_crossing_obj
-
-            cls_ = PpoTrackCrossroad
-            obj = cls_()
-            set_tag(obj, obj_name)
-            self.insert_to_objects_tree("PpoTrackCrossroad", obj_name, obj)
-        else:
-            cls_: Type[PpoObject] = eval(cls_name)
-            obj = cls_()
-            set_tag(obj, obj_name)
-            self.insert_to_objects_tree(cls_name, obj_name, obj)
+        if cls_name == "PpoTrackCrossroad":
+            crossing_name = obj_name[:2]
+            if crossing_name not in self._name_to_obj:
+                self.init_object("PpoRailCrossing", crossing_name)
+        obj = make_ppo_object(cls_name)
+        set_tag(obj, obj_name)
+        self.insert_to_objects_tree(cls_name, obj_name, obj)
+        if self.auto_add_io:
+            self.init_interface_object(cls_name, obj_name, obj)
+
+    def init_interface_object(self, cls_name: str, obj_name: str, tpo_obj: PpoObject):
+        policy_itypes = {"signal": self.signal_itype,
+                         "point": self.point_itype,
+                         "derail": self.derail_itype}
+        info = class_info(cls_name)
+        interface_class = info.interface_class(policy_itypes.get(info.interface_policy, ""))
+        if not interface_class:
+            return
+        itype, inter_cls_name = interface_class
+        inter_obj = make_ppo_object(inter_cls_name)
+        set_tag(inter_obj, "{}_{}".format(obj_name, itype))
+        self.insert_to_objects_tree(inter_cls_name, get_tag(inter_obj), inter_obj)
+        self.tech_to_interf_dict[tpo_obj] = inter_obj
 
     def attr_changed(self, address: list, new_attr_value: str):
         # print("attr changed", address, new_attr_value)
@@ -334,108 +483,169 @@ class ObjectsHandler(QObject):
 
     def got_change_cls_request(self, obj_name: str, to_cls_name: str):
         # 1. create new obj in new class
-        new_name = self.got_add_new(to_cls_name)
+        new_name = self.new_object_name(to_cls_name)
+        self.init_object(to_cls_name, new_name)
         # 2. remove obj in old class
-        self.got_remove_object_request(obj_name)
+        self.remove_object(obj_name)
         # 3. rename obj in new class
-        self.got_rename(new_name, obj_name)
+        self.rename_object(new_name, obj_name)
 
-        self.send_objects_tree.emit(self.str_objects_tree)
+        self.emit_tree_delta()
+        self.send_attrib_dict.emit({})
+        if self.current_object:
+            self.got_object_name(get_tag(self.current_object))
 
     def got_remove_object_request(self, name: str):
-        cls_name = self.obj_name_to_cls_name_dict[name]
-        tpo_obj = self.name_to_obj_dict[name]
-        self.objects_tree[cls_name].pop(name)
+        self.remove_object(name)
+        self.emit_tree_delta()
+        self.send_attrib_dict.emit({})
+
+    def remove_object(self, name: str):
+        tpo_obj = self.remove_from_objects_tree(name)
         if tpo_obj in self.tech_to_interf_dict:
-            i_obj = self.tech_to_interf_dict[tpo_obj]
+            i_obj = self.tech_to_interf_dict.pop(tpo_obj)
             i_obj_name = get_tag(i_obj)
-            cls_i_name = self.obj_name_to_cls_name_dict[i_obj_name]
-            self.objects_tree[cls_i_name].pop(i_obj_name)
-
-        self.send_objects_tree.emit(self.str_objects_tree)
-        self.send_attrib_dict.emit({})
+            i_cls_name = self.cls_name_of(i_obj_name, i_obj)
+            if i_cls_name:
+                self.remove_from_objects_tree(i_obj_name, i_cls_name)
 
     def got_add_new(self, cls_name: str) -> str:
+        name_candidate = self.new_object_name(cls_name)
+        self.init_object(cls_name, name_candidate)
+        self.emit_tree_delta()
+        return name_candidate
+
+    def new_object_name(self, cls_name: str) -> str:
         i = 1
         while True:
             name_candidate = "{}_{}".format(cls_name, i)
-            if name_candidate not in self.name_to_obj_dict:
-                break
+            if name_candidate not in self._name_to_obj:
+                return name_candidate
             i += 1
-        self.init_object(cls_name, name_candidate)
-        self.send_objects_tree.emit(self.str_objects_tree)
-        return name_candidate
 
     def got_rename(self, old_name: str, new_name: str):
         if (not new_name) or new_name.isspace():
             self.rename_rejected_empty(old_name, new_name)
-            self.send_objects_tree.emit(self.str_objects_tree)
+            self.restore_name_in_view(old_name)
             return
-        if new_name in self.name_to_obj_dict:
+        if new_name in self._name_to_obj:
             self.rename_rejected_existing(old_name, new_name)
-            self.send_objects_tree.emit(self.str_objects_tree)
+            self.restore_name_in_view(old_name)
         else:
-            obj = self.name_to_obj_dict[old_name]
-            set_tag(obj, new_name)
-
-            cls_name = self.obj_name_to_cls_name_dict[old_name]
-            keys_list = list(self.objects_tree[cls_name].keys())
-            index = keys_list.index(old_name)
-            self.objects_tree[cls_name][new_name] = obj
-            for key_index in range(index, len(keys_list)):
-                self.objects_tree[cls_name].move_to_end(keys_list[key_index])
-            self.objects_tree[cls_name].pop(old_name)
-            self.send_objects_tree.emit(self.str_objects_tree)
-            if obj in self.tech_to_interf_dict:
-                interf_obj = self.tech_to_interf_dict[obj]
-                str_tag = get_tag(interf_obj)
-                if old_name in str_tag:
-                    new_interf_name = str_tag.replace(old_name, new_name)
-                    self.got_rename(str_tag, new_interf_name)
-
-            # print("here")
+            self.rename_object(old_name, new_name)
+            self.emit_tree_delta()
         self.got_object_name(get_tag(self.current_object))
 
+    def rename_object(self, old_name: str, new_name: str):
+        obj = self._name_to_obj[old_name]
+        set_tag(obj, new_name)
+        self.rename_in_objects_tree(old_name, new_name)
+        if obj in self.tech_to_interf_dict:
+            interf_obj = self.tech_to_interf_dict[obj]
+            str_tag = get_tag(interf_obj)
+            if old_name in str_tag:
+                new_interf_name = str_tag.replace(old_name, new_name)
+                if new_interf_name in self._name_to_obj:
+                    self.rename_rejected_existing(str_tag, new_interf_name)
+                else:
+                    self.rename_object(str_tag, new_interf_name)
+
+    def restore_name_in_view(self, name: str):
+        """ view item was already edited by user, so rename to the same name returns old text """
+        cls_name = self._obj_name_to_cls_name[name]
+        self._tree_deltas.append(ObjectsTreeDelta(TreeDeltaKind.renamed, cls_name, name, new_obj_name=name))
+        self.emit_tree_delta()
+
     def rename_rejected_existing(self, old_name: str, new_name: str):
-        print("Rename from {} to {} rejected, name already exists".format(old_name, new_name))
+        logger.warning("Rename from %s to %s rejected, name already exists", old_name, new_name)
 
     def rename_rejected_empty(self, old_name: str, new_name: str):
-        print("Rename from {} to {} rejected, name is empty".format(old_name, new_name))
-
-    def generate_file(self, file_name: str):
-        objs = []
-        for cls_name in FILE_NAME_TO_CLASSES[file_name]:
-            objs.extend(reversed(self.objects_tree[cls_name].values()))
-        obj_jsons = [obj.to_json_dict(True, True) for obj in objs]
-        with open(os.path.join("output", "config", "{}.json".format(file_name)), "w") as write_file:
-            json.dump(obj_jsons, write_file, indent=4)
+        logger.warning("Rename from %s to %s rejected, name is empty", old_name, new_name)
+
+    def generate_file(self, file_name: str) -> Optional[ExportSummary]:
+        return self.export_files([file_name])
+
+    def generate_all_files(self) -> Optional[ExportSummary]:
+        return self.export_files(list(FILE_NAME_TO_CLASSES))
+
+    def export_files(self, file_names: list[str]) -> Optional[ExportSummary]:
+        """ objects are snapshotted here, files are written by export engine workers,
+            export_finished is emitted when all groups are written, export_rejected if export was not started """
+        if self.export_engine.busy:
+            logger.warning("Export rejected, previous export is not finished")
+            self.export_rejected.emit("previous export is not finished")
+            return None
+        self.export_summary = self.export_engine.export(self.objects_tree, file_names, self.export_directory,
+                                                        self.group_exported, self.all_files_exported,
+                                                        self.export_format)
+        return self.export_summary
+
+    def tpl_file_opened(self, file_name: str):
+        self.template_files["tpl"] = file_name
+
+    def obj_id_file_opened(self, file_name: str):
+        self.template_files["obj_id"] = file_name
+
+    def save_config(self, directory: str) -> Optional[ProjectSaveSummary]:
+        return self.save_project(directory)
+
+    def save_template(self, directory: str) -> Optional[ProjectSaveSummary]:
+        """ config with tpl and objects id files it was made from """
+        return self.save_project(directory, [file_name for file_name in self.template_files.values()
+                                             if os.path.isfile(file_name)])
+
+    def save_project(self, directory: str, extra_files: list[str] = ()) -> Optional[ProjectSaveSummary]:
+        """ all file groups are written in GUI thread to staging directory and swapped in,
+            target directory is left as it was if save fails """
+        try:
+            summary = save_project(self.objects_tree, directory, self.export_format, self.export_engine.compact,
+                                   extra_files)
+        except ProjectSaveError as e:
+            logger.error("Project save to %s failed: %s", directory, e)
+            self.project_saved.emit(e.summary, str(e))
+            return None
+        except OSError as e:
+            logger.error("Project save to %s failed: %s", directory, e)
+            self.project_saved.emit(ProjectSaveSummary(directory), str(e))
+            return None
+        logger.info("%s", summary)
+        self.project_saved.emit(summary, "")
+        return summary
+
+    def group_exported(self, group: GroupExport, done: int, total: int):
+        """ called from export worker thread """
+        if group.error:
+            logger.error("Export of %s failed: %s", group.file_name, group.error)
+        self.export_progress.emit(group.file_name, done, total)
+
+    def all_files_exported(self, summary: ExportSummary):
+        """ called from export worker thread """
+        logger.info("%s", summary)
+        self.export_finished.emit(summary)
 
     def got_object_name(self, name: str):
-        print(f"got_object_name {name}")
-        if name in self.obj_name_to_cls_name_dict:
-            obj = self.name_to_obj_dict[name]
+        logger.debug("got_object_name %s", name)
+        if name in self._name_to_obj:
+            obj = self._name_to_obj[name]
             self.current_object = obj
             self.send_attrib_dict.emit(obj.to_json_dict(to_file=False, is_base_object=True))
 
     def get_suggested_value(self, address: list):
-        print("get_suggested_value", address)
+        logger.debug("get_suggested_value %s", address)
         obj = self.current_object
-        attr_name = address[0][0]
-        named_attr: UnaryAttribute = getattr(obj, attr_name)
-        single_attr: StrSingleAttribute = named_attr.single_attribute
-        single_attr.needs_in_suggestion = True
-        setattr(obj, attr_name, ComplexAttributeManagementCommand(AttributeCommand.set_single,
-                                                                  AttributeAddress.from_list(address),
-                                                                  ""))
+        attr_address = AttributeAddress.from_list(address)
+        stored_str_attr(obj, attr_address).needs_in_suggestion = True
+        setattr(obj, attr_address.get_first_attr_name(),
+                ComplexAttributeManagementCommand(AttributeCommand.set_single, attr_address, ""))
         self.got_object_name(get_tag(self.current_object))
 
     ''' --------------------- TPL and OBJ-ID files operations --------------------- '''
 
     def init_objects_from_tpl(self):
-        for cls_name in self.tpl_dict:
-            for obj_name in self.tpl_dict[cls_name]:
-                self.init_object(cls_name, obj_name)
-        self.send_objects_tree.emit(self.str_objects_tree)
+        with self.bulk_update():
+            for cls_name in self.tpl_dict:
+                for obj_name in self.tpl_dict[cls_name]:
+                    self.init_object(cls_name, obj_name)
 
     def init_bounded_tpl_descriptors(self):
         pass
@@ -445,12 +655,18 @@ class ObjectsHandler(QObject):
 
     @staticmethod
     def check_not_repeating_names(odict):
-        names = []
+        names = set()
         for cls_name in odict:
             for obj_name in odict[cls_name]:
                 if obj_name in names:
                     raise TagRepeatingError("Tag {} repeats".format(obj_name))
-                names.append(obj_name)
+                names.add(obj_name)
+
+    def tpl_entries_got(self, entries: list[TplRecord]):
+        self.tpl_entries = entries
+
+    def obj_id_entries_got(self, entries: list[ObjectIdRecord]):
+        self.obj_id_entries = entries
 
     def file_tpl_got(self, d: OrderedDict[str, list[str]]):
         # print("tpl_got")
@@ -474,40 +690,27 @@ class ObjectsHandler(QObject):
         if self.current_object:
             self.got_object_name(get_tag(self.current_object))
 
-    def compare_tpl_and_obj_id_file(self):
-        differences = {'tpl': [], 'obj_id': []}
-
-        # cycle of append
-        for cls_name in self.tpl_dict:
-            if cls_name in TPL_TO_OBJ_ID:
-                tpl_list = self.tpl_dict[cls_name]
-                obj_id_list = self.obj_id_dict[TPL_TO_OBJ_ID[cls_name]]
-                for tag in tpl_list:
-                    if (cls_name, tag) not in differences['tpl']:
-                        differences['tpl'].append((cls_name, tag))
-                for tag in obj_id_list:
-                    if (TPL_TO_OBJ_ID[cls_name], tag) not in differences['obj_id']:
-                        differences['obj_id'].append((TPL_TO_OBJ_ID[cls_name], tag))
-
-        # cycle of remove
-        for cls_name in self.tpl_dict:
-            if cls_name in TPL_TO_OBJ_ID:
-                tpl_list = self.tpl_dict[cls_name]
-                obj_id_list = self.obj_id_dict[TPL_TO_OBJ_ID[cls_name]]
-                for tag in tpl_list:
-                    if (TPL_TO_OBJ_ID[cls_name], tag) in differences['obj_id']:
-                        differences['obj_id'].remove((TPL_TO_OBJ_ID[cls_name], tag))
-                for tag in obj_id_list:
-                    if (cls_name, tag) in differences['tpl']:
-                        differences['tpl'].remove((cls_name, tag))
-
-        print("Differences between tpl and objects_id")
-        print("Tpl:")
-        for elem in differences['tpl']:
-            print(elem)
-        print("Obj_id:")
-        for elem in differences['obj_id']:
-            print(elem)
+    @staticmethod
+    def entries_from_dict(odict: OrderedDict[str, list[str]]) -> list[SourceEntry]:
+        """ for dicts received without source entries, line numbers are unknown """
+        return [SourceEntry(type_, tag) for type_ in odict for tag in odict[type_]]
+
+    def compare_tpl_and_obj_id_file(self) -> ReconciliationReport:
+        tpl_entries = self.tpl_entries or self.entries_from_dict(self.tpl_dict)
+        obj_id_entries = self.obj_id_entries or self.entries_from_dict(self.obj_id_dict)
+        self.reconciliation_report = reconcile(tpl_entries, obj_id_entries)
+        logger.info("%s", self.reconciliation_report)
+        os.makedirs("output", exist_ok=True)
+        self.reconciliation_report.to_json_file(os.path.join("output", "tpl_obj_id_report.json"))
+        return self.reconciliation_report
+
+    def validate_addresses(self) -> AddressReport:
+        self.address_report = validate_addresses((obj_name, obj) for cls_dict in self.objects_tree.values()
+                                                 for obj_name, obj in cls_dict.items())
+        logger.info("%s", self.address_report)
+        os.makedirs("output", exist_ok=True)
+        self.address_report.to_json_file(os.path.join("output", "address_report.json"))
+        return self.address_report
 
     ''' ------------------------ Config menu properties setters ------------------------ '''
 
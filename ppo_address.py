@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterator, Iterable, NamedTuple, Optional, Any
+
+from attribute_management import AttributeAddress, StrSingleAttribute, ObjSingleAttribute
+from descr_value_presentation import AddressPresentation
+
+ADDRESS_KINDS = ("USO", "CPU", "PPO")
+NO_CHANNEL = -1
+ADDRESS_RE = re.compile(r"(USO|CPU|PPO):(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?")
+ADDRESS_LINES_RE = re.compile(r"^(?:(USO|CPU|PPO):(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?|.*)$", re.MULTILINE)
+ADDRESS_FORMAT_MESSAGE = "Address should be in format USO/CPU/PPO : NN : NN : NN"
+# address attributes by name, some of them have default descriptors without AddressPresentation
+ADDRESS_ATTR_NAME_RE = re.compile(r"addrKI_.*|addrUI_.*|outputAddrs")
+
+
+class PpoAddress(NamedTuple):
+    """ kind is index in ADDRESS_KINDS, channel is NO_CHANNEL for two numbers address """
+    kind: int
+    node: int
+    module: int
+    channel: int = NO_CHANNEL
+
+    def __str__(self):
+        numbers = [self.node, self.module] + ([] if self.channel == NO_CHANNEL else [self.channel])
+        return ":".join([ADDRESS_KINDS[self.kind]] + [str(number) for number in numbers])
+
+
+def address_from_groups(kind: str, node: str, module: str, channel: Optional[str]) -> PpoAddress:
+    return PpoAddress(ADDRESS_KINDS.index(kind), int(node), int(module),
+                      NO_CHANNEL if channel is None else int(channel))
+
+
+def parse_address(value: str) -> Optional[PpoAddress]:
+    """ None for malformed address """
+    match = ADDRESS_RE.fullmatch(value)
+    if match is None:
+        return None
+    return address_from_groups(*match.groups())
+
+
+class AddressRecords:
+    """ parsed addresses in columns, owners[i] is object tag and attribute address of i-th record """
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.nodes = array("b")
+        self.modules = array("b")
+        self.channels = array("b")
+        self.owners: list[tuple[str, AttributeAddress]] = []
+
+    def __len__(self):
+        return len(self.owners)
+
+    @property
+    def columns(self) -> tuple[array, ...]:
+        return self.kinds, self.nodes, self.modules, self.channels
+
+    def __getitem__(self, i: int) -> PpoAddress:
+        return PpoAddress(self.kinds[i], self.nodes[i], self.modules[i], self.channels[i])
+
+    def append(self, owner: tuple[str, AttributeAddress], address: PpoAddress):
+        self.kinds.append(address.kind)
+        self.nodes.append(address.node)
+        self.modules.append(address.module)
+        self.channels.append(address.channel)
+        self.owners.append(owner)
+
+
+@dataclass
+class MalformedAddress:
+    tag: str
+    address: AttributeAddress
+    value: str
+
+
+@dataclass
+class AddressReport:
+    records: AddressRecords = field(default_factory=AddressRecords)
+    malformed: list[MalformedAddress] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.malformed
+
+    def to_dict(self) -> dict:
+        return {"checked": len(self.records) + len(self.malformed),
+                "malformed": [{"tag": item.tag, "address": item.address.to_list(), "value": item.value}
+                              for item in self.malformed]}
+
+    def to_json_file(self, file_name: str):
+        with open(file_name, "w") as write_file:
+            json.dump(self.to_dict(), write_file, indent=4)
+
+    def __str__(self):
+        lines = ["Addresses checked: {}, malformed: {}".format(len(self.records) + len(self.malformed),
+                                                                len(self.malformed))]
+        lines.extend("    {} {}: '{}'".format(item.tag, item.address.to_list(), item.value) for item in self.malformed)
+        return "\n".join(lines)
+
+
+def address_layout(cls: type) -> tuple[list, list]:
+    """ descriptors of address attributes and of nested objects attributes, cached per class,
+        address attributes are addrKI_*, addrUI_*, outputAddrs and other ones with AddressPresentation """
+    if cls not in _address_layouts:
+        address_descriptors, nested_descriptors = [], []
+        for schema_item in cls.attr_schema:
+            if not issubclass(schema_item.single_attribute_type, str):
+                nested_descriptors.append(schema_item.descriptor)
+            elif ADDRESS_ATTR_NAME_RE.fullmatch(schema_item.name) or \
+                    isinstance(schema_item.descriptor.presentation, AddressPresentation):
+                address_descriptors.append(schema_item.descriptor)
+        _address_layouts[cls] = address_descriptors, nested_descriptors
+    return _address_layouts[cls]
+
+
+_address_layouts: dict[type, tuple[list, list]] = {}
+
+
+def iter_address_attributes(obj: Any) -> Iterator[StrSingleAttribute]:
+    """ stored address attributes, nested objects included,
+        not stored attributes hold only default suggestion """
+    address_descriptors, nested_descriptors = address_layout(type(obj))
+    for descriptor in address_descriptors:
+        if descriptor.is_materialized(obj):
+            yield from descriptor.materialized(obj).single_attributes
+    for descriptor in nested_descriptors:
+        if descriptor.is_materialized(obj):
+            for single_attribute in descriptor.materialized(obj).single_attributes:
+                single_attribute: ObjSingleAttribute
+                yield from iter_address_attributes(single_attribute.obj)
+
+
+def validate_addresses(tagged_objects: Iterable[tuple[str, Any]]) -> AddressReport:
+    """ input values of address attributes of all objects are parsed by one regex pass over joined text,
+        empty values are not checked as in ValueAddressChecker """
+    owners: list[tuple[str, AttributeAddress]] = []
+    values: list[str] = []
+    for tag, obj in tagged_objects:
+        if address_layout(type(obj)) == ([], []):
+            continue
+        for str_sa in iter_address_attributes(obj):
+            value = str_sa.last_input_value
+            if value and not value.isspace():
+                owners.append((tag, str_sa.address))
+                values.append(value)
+    report = AddressReport()
+    if not values:
+        return report
+    text = "\n".join(value.replace("\n", "\0") for value in values)
+    columns: tuple[list[int], ...] = ([], [], [], [])
+    for i, (kind, node, module, channel) in enumerate(ADDRESS_LINES_RE.findall(text)):
+        if not kind:
+            report.malformed.append(MalformedAddress(owners[i][0], owners[i][1], values[i]))
+            continue
+        report.records.owners.append(owners[i])
+        columns[0].append(ADDRESS_KINDS.index(kind))
+        columns[1].append(int(node))
+        columns[2].append(int(module))
+        columns[3].append(int(channel) if channel else NO_CHANNEL)
+    for column, values_column in zip(report.records.columns, columns):
+        column.extend(values_column)
+    return report
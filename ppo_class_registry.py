@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Type, Optional
+
+import ppo_object
+from ppo_object import PpoObject
+from config import FILE_NAME_TO_CLASSES, MAIN_CLASSES_TREE, CLASS_NAME_ALIASES, INTERFACE_CLASSES
+
+
+class UnknownClassError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class PpoClassInfo:
+    cls_name: str  # name in objects tree and config files
+    cls: Type[PpoObject]
+    file_group: str = ""
+    tree_group: str = ""
+    interface_policy: str = ""
+    interface_classes: dict[str, str] = field(default_factory=dict)  # interface type: class name
+
+    def interface_class(self, itype: str) -> Optional[tuple[str, str]]:
+        """ returns interface type and class name, for empty policy the only interface class is used """
+        if not self.interface_policy:
+            return next(iter(self.interface_classes.items()), None)
+        if itype in self.interface_classes:
+            return itype, self.interface_classes[itype]
+        return None
+
+
+def build_class_registry() -> dict[str, PpoClassInfo]:
+    classes: dict[str, Type[PpoObject]] = {name: value for name, value in vars(ppo_object).items()
+                                           if isinstance(value, type) and issubclass(value, PpoObject)}
+    for alias, cls_name in CLASS_NAME_ALIASES.items():
+        classes[alias] = classes[cls_name]
+    file_groups = {cls_name: file_name for file_name, cls_names in FILE_NAME_TO_CLASSES.items()
+                   for cls_name in cls_names}
+    tree_groups = {cls_name: class_group for partition in MAIN_CLASSES_TREE
+                   for class_group, cls_names in MAIN_CLASSES_TREE[partition].items() for cls_name in cls_names}
+    registry: dict[str, PpoClassInfo] = {}
+    for cls_name, cls in classes.items():
+        interface_policy, interface_classes = INTERFACE_CLASSES.get(cls_name, ("", {}))
+        registry[cls_name] = PpoClassInfo(cls_name=cls_name,
+                                          cls=cls,
+                                          file_group=file_groups.get(cls_name, ""),
+                                          tree_group=tree_groups.get(cls_name, ""),
+                                          interface_policy=interface_policy,
+                                          interface_classes=interface_classes)
+    return registry
+
+
+PPO_CLASSES: dict[str, PpoClassInfo] = build_class_registry()
+
+
+def class_info(cls_name: str) -> PpoClassInfo:
+    try:
+        return PPO_CLASSES[cls_name]
+    except KeyError:
+        raise UnknownClassError("Class {} not found".format(cls_name)) from None
+
+
+def make_ppo_object(cls_name: str) -> PpoObject:
+    return class_info(cls_name).cls()
@@ -1,23 +1,26 @@
 from __future__ import annotations
 
 from copy import copy
-from typing import Type, Iterable, Optional, Any, Callable, Union
+from typing import Type, Iterable, Optional, Any, Callable, Union, NamedTuple
 from functools import partial
 from collections import OrderedDict
+from types import MappingProxyType
 
 from descr_value_checkers import ValueChecker, ValueInSetChecker, ValueAddressUIChecker, ValueAddressKIChecker, \
     ValuePlusMinusChecker, ValueYesNoChecker, ValueZeroOneChecker, ValueStrIsPositiveNumberChecker, \
     ValueTimeAutoReturnChecker, ValueElectricHeatingOnOffChecker, ValueStrIsNonNegNumberChecker, \
     ValueABInvitSignalOpeningBeforeChecker, ValuePABInvitSignalOpeningBeforeChecker
 from descr_value_suggesters import Suggester, ConstSuggester, AddressSuggester, \
-    EqualOtherAttributeSuggester, InterstationDirectiveSuggester
+    EqualOtherAttributeSuggester, InterstationDirectiveSuggester, CachedSuggestion
 from descr_value_presentation import Presentation, IntPresentation, AddressPresentation, IfZeroThenIntPresentation
 from attr_manage_group import AMG_ADR_UI, AMG_ADR_KI
 from attribute_address_access import set_str_attr, get_str_attr
 from attribute_management import AttributeAddress, NamedAttribute, SingleAttribute, AttributeCommand, \
-    ComplexAttributeManagementCommand, StrSingleAttribute, ObjSingleAttribute, AttributeIndex, UnaryAttribute
+    ComplexAttributeManagementCommand, StrSingleAttribute, ObjSingleAttribute, AttributeIndex, UnaryAttribute, \
+    ListAttribute
 from aar_descriptor import AttributeAccessRulesDescriptor, cyclic_find
 from file_object_conversions import attr_name_from_file_to_object, attr_name_from_object_to_file
+from instrumentation import instrumented
 
 
 class ClassNameDescriptor:
@@ -25,13 +28,90 @@ class ClassNameDescriptor:
         return owner.__name__
 
 
-def extract_data_attr_names(obj: PpoObject) -> list[str]:
-    data_attr_names = []
-    for cls in list(reversed(obj.__class__.__mro__[:-2])):  # last = PpoObject, object
-        for attr_name in cls.__dict__:
-            if not attr_name.startswith("__"):
-                data_attr_names.append(attr_name)
-    return data_attr_names
+class AttributeSchemaItem(NamedTuple):
+    name: str
+    file_name: str
+    descriptor: AttributeAccessRulesDescriptor
+    is_list: bool
+    single_attribute_type: Type  # str or PpoObject subclass
+
+
+class AttributeSchema:
+    """ ordered data attributes of class, compiled once when class is created """
+    def __init__(self, items: Iterable[AttributeSchemaItem] = ()):
+        self.items: tuple[AttributeSchemaItem, ...] = tuple(items)
+        self.names: tuple[str, ...] = tuple(item.name for item in self.items)
+        self.by_name: MappingProxyType[str, AttributeSchemaItem] = MappingProxyType({item.name: item
+                                                                                     for item in self.items})
+        # attribute name: all attributes suggested from it, directly or not, in topological order
+        self.dependents: MappingProxyType[str, tuple[str, ...]] = MappingProxyType(compile_dependents(self.items))
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class DependencyCycleError(Exception):
+    pass
+
+
+def compile_dependents(items: Iterable[AttributeSchemaItem]) -> dict[str, tuple[str, ...]]:
+    """ dependency graph of suggesters depending on other attribute of same object """
+    direct: dict[str, list[str]] = {}  # base attribute can be not data attribute, e.g. tag
+    for item in items:
+        suggester = item.descriptor.value_suggester
+        if isinstance(suggester, (EqualOtherAttributeSuggester, InterstationDirectiveSuggester)):
+            direct.setdefault(suggester.attr_name, []).append(item.name)
+
+    order: list[str] = []  # reversed post order of depth first search = topological order
+    state: dict[str, bool] = {}  # False - in progress, True - done
+
+    def visit(name: str):
+        if name in state:
+            if not state[name]:
+                raise DependencyCycleError("Suggestion of attribute {} depends on itself".format(name))
+            return
+        state[name] = False
+        for dependent in direct.get(name, []):
+            visit(dependent)
+        state[name] = True
+        order.append(name)
+
+    for name in direct:
+        visit(name)
+    order.reverse()
+    position = {name: i for i, name in enumerate(order)}
+
+    dependents: dict[str, tuple[str, ...]] = {}
+    for name in direct:
+        reached: set[str] = set()
+        stack = list(direct[name])
+        while stack:
+            dependent = stack.pop()
+            if dependent not in reached:
+                reached.add(dependent)
+                stack.extend(direct.get(dependent, []))
+        dependents[name] = tuple(sorted(reached, key=position.__getitem__))
+    return dependents
+
+
+def compile_attr_schema(cls: Type[PpoObject]) -> AttributeSchema:
+    """ base classes attributes go first, redefined attribute keeps position of first definition """
+    items: dict[str, AttributeSchemaItem] = {}
+    for base in reversed(cls.__mro__[:-2]):  # last = PpoObject, object
+        for attr_name in base.__dict__:
+            if attr_name.startswith("__") or not isinstance(base.__dict__[attr_name], AttributeAccessRulesDescriptor):
+                continue
+            descriptor: AttributeAccessRulesDescriptor = getattr(cls, attr_name)
+            template = descriptor.named_attribute_template
+            items[attr_name] = AttributeSchemaItem(name=attr_name,
+                                                   file_name=attr_name_from_object_to_file(attr_name),
+                                                   descriptor=descriptor,
+                                                   is_list=isinstance(template, ListAttribute),
+                                                   single_attribute_type=template.single_attribute_type)
+    return AttributeSchema(items.values())
 
 
 set_tag = partial(set_str_attr, attr_address=AttributeAddress([AttributeIndex("tag", 0)]))
@@ -72,48 +152,193 @@ def address_expansion(input_dict: dict, input_address: AttributeAddress) -> list
 class PpoObject:
     class_ = ClassNameDescriptor()
     tag = AttributeAccessRulesDescriptor()
+    attr_schema: AttributeSchema = AttributeSchema()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.attr_schema = compile_attr_schema(cls)
 
     def __init__(self, obj_addr: AttributeAddress = None):
         self.obj_addr = obj_addr or AttributeAddress()
+        self.suggestions: dict[str, CachedSuggestion] = {}  # attribute name: suggestion depending on other attribute
+        self.sa_index: dict[AttributeAddress, StrSingleAttribute] = {}  # address relative to object: stored attribute
+        self.stale_lists: Optional[list[ListAttribute]] = None  # lists with removed elements, renumbered on next use
+        self.version: int = 0  # changed by every attribute command, nested objects changes included
+        self._file_data: Optional[dict] = None
+        self._file_data_version: int = -1  # version of cached file data
 
     @property
-    def data_attr_names(self) -> list[str]:
-        return extract_data_attr_names(self)
-
-    def to_json_dict(self, to_file: bool = True, is_base_object: bool = False) -> dict:
-        """ to file output format is much smaller, because not includes attributes metadata """
-        json_dict = {}
-        data_dict = {}
-        if is_base_object:
-            json_dict["class"] = self.class_
-            json_dict["tag"] = get_tag(self)  # self.tag
-            json_dict["data"] = data_dict
-        data_attr_names = extract_data_attr_names(self)
-        for data_attr_name in data_attr_names:
-            named_attr: NamedAttribute = getattr(self, data_attr_name)
-            if to_file:
+    def data_attr_names(self) -> tuple[str, ...]:
+        return self.attr_schema.names
+
+    def relative_address(self, address: AttributeAddress) -> AttributeAddress:
+        depth = len(self.obj_addr.attribute_indexes)
+        return address.suffix(depth) if depth else address
+
+    def register_str_attr(self, str_sa: StrSingleAttribute):
+        self.sa_index[self.relative_address(str_sa.address)] = str_sa
+
+    def str_attr(self, address: AttributeAddress) -> Optional[StrSingleAttribute]:
+        """ stored string attribute of this object, None for not stored and nested objects attributes """
+        if self.stale_lists:
+            self.renumber_lists()
+        return self.sa_index.get(address)
+
+    def list_element_removed(self, list_attr: ListAttribute, removed_sa: SingleAttribute):
+        """ index keys of stale elements are their not renumbered addresses, so removed one is found by its own """
+        if isinstance(removed_sa, StrSingleAttribute):
+            self.sa_index.pop(self.relative_address(removed_sa.address), None)
+        if self.stale_lists is None:
+            self.stale_lists = []
+        if list_attr not in self.stale_lists:
+            self.stale_lists.append(list_attr)
+
+    def renumber_lists(self):
+        """ deferred renumbering of list elements after removals """
+        if not self.stale_lists:
+            return
+        renumbered = []
+        for list_attr in self.stale_lists:
+            renumbered.extend(list_attr.renumber())
+        self.stale_lists = None
+        for old_address, sa in renumbered:
+            if isinstance(sa, StrSingleAttribute):
+                self.sa_index.pop(self.relative_address(old_address), None)
+        for _, sa in renumbered:
+            if isinstance(sa, StrSingleAttribute):
+                self.register_str_attr(sa)
+
+    def readdress(self, obj_addr: AttributeAddress):
+        """ for object in renumbered list, index keys are relative and stay the same """
+        self.renumber_lists()
+        self.obj_addr = obj_addr
+        for named_attr in list(self.__dict__.values()):
+            if isinstance(named_attr, NamedAttribute):
+                named_attr.readdress(obj_addr.expand(named_attr.address.attribute_indexes[-1]))
+
+    def file_data(self) -> dict:
+        """ file output of data attributes, cached till version is changed, must not be changed """
+        if self._file_data_version != self.version:
+            self.renumber_lists()
+            data_dict = {}
+            for schema_item in self.attr_schema:
+                named_attr: NamedAttribute = getattr(self, schema_item.name)
                 result = named_attr.file_representation
                 if not (result is None):
-                    data_dict[attr_name_from_object_to_file(data_attr_name)] = result
-            else:
-                result = named_attr.attr_exchange_representation
-                data_dict[attr_name_from_object_to_file(data_attr_name)] = result
+                    data_dict[schema_item.file_name] = result
+            self._file_data = data_dict
+            self._file_data_version = self.version
+        return self._file_data
+
+    @instrumented("object.to_json_dict")
+    def to_json_dict(self, to_file: bool = True, is_base_object: bool = False) -> dict:
+        """ to file output format is much smaller, because not includes attributes metadata,
+            to file data dict is cached and shared by calls, it must not be changed """
+        if to_file:
+            data_dict = self.file_data()
+        else:
+            data_dict = {}
+            self.renumber_lists()
+            for schema_item in self.attr_schema:
+                named_attr: NamedAttribute = getattr(self, schema_item.name)
+                data_dict[schema_item.file_name] = named_attr.attr_exchange_representation
         if is_base_object:
-            return json_dict
+            return {"class": self.class_, "tag": get_tag(self), "data": data_dict}
         else:
             return data_dict
 
+    @instrumented("object.from_dict")
     def from_dict(self, d: dict):
+        command_list = []
         if "tag" in d:
-            set_tag(self, d["tag"])
+            command_list.append(ComplexAttributeManagementCommand(AttributeCommand(AttributeCommand.set_single),
+                                                                  AttributeAddress([AttributeIndex("tag", 0)]),
+                                                                  d["tag"]))
         if "data" in d:
             data = d["data"]
-            command_list = address_expansion(data, self.obj_addr)
+            command_list.extend(address_expansion(data, self.obj_addr))
             # print("command list = ", len(command_list),
-            #       [[idx.to_list() for idx in com.attrib_address.attribute_index_list] for com in command_list])
-            for command in command_list:
-                attr_name = command.attrib_address.attribute_index_list[0].attr_name
+            #       [[idx.to_list() for idx in com.attrib_address.attribute_indexes] for com in command_list])
+        self.apply_batch(command_list)
+
+    @instrumented("object.from_trusted_dict")
+    def from_trusted_dict(self, d: dict, check: bool = False):
+        """ for files exported by this tool: attributes are made from file values without commands,
+            suggestions of loaded values are renewed after all values are loaded, values stay explicit as in from_dict,
+            values are checked only if check, unknown attributes are skipped """
+        self.version += 1
+        loaded: list[tuple[AttributeAccessRulesDescriptor, StrSingleAttribute]] = []
+        if "tag" in d:
+            loaded.extend((PpoObject.tag, str_sa) for str_sa in PpoObject.tag.trusted_load(self, [d["tag"]], check))
+        for file_attr_name, file_value in d.get("data", {}).items():
+            descriptor = getattr(type(self), attr_name_from_file_to_object(file_attr_name), None)
+            if not isinstance(descriptor, AttributeAccessRulesDescriptor):
+                continue
+            values = file_value if isinstance(file_value, list) else [file_value]
+            loaded.extend((descriptor, str_sa) for str_sa in descriptor.trusted_load(self, values, check))
+        for suggestion in self.suggestions.values():
+            suggestion.invalidate()
+        for descriptor, str_sa in loaded:
+            descriptor.set_loaded_suggestion(self, str_sa)
+
+    def apply_batch(self, commands: Iterable[ComplexAttributeManagementCommand]):
+        """ same result as setattr of every command: lists are extended up to addressed elements and values
+            are stored in one pass, then checks, suggestions and dependents handling run once per touched
+            attribute, removes split batch because they change positions of next elements """
+        self.version += 1
+        segment: list[ComplexAttributeManagementCommand] = []
+        for command in commands:
+            if command.command == AttributeCommand.remove:
+                self.apply_batch_segment(segment)
+                segment = []
+                setattr(self, command.attrib_address.get_first_attr_name(), command)
+            else:
+                segment.append(command)
+        self.apply_batch_segment(segment)
+
+    def apply_batch_segment(self, commands: list[ComplexAttributeManagementCommand]):
+        inputs: dict[StrSingleAttribute, AttributeAccessRulesDescriptor] = {}
+        touched: dict[str, AttributeAccessRulesDescriptor] = {}
+        nested_commands: dict[int, tuple[PpoObject, list[ComplexAttributeManagementCommand]]] = {}
+        for command in commands:
+            attr_name = command.attrib_address.get_first_attr_name()
+            descriptor: AttributeAccessRulesDescriptor = getattr(type(self), attr_name, None)
+            if (command.command == AttributeCommand.append) or not isinstance(descriptor,
+                                                                              AttributeAccessRulesDescriptor):
                 setattr(self, attr_name, command)
+                continue
+            str_sa = self.str_attr(command.attrib_address)
+            if str_sa is None:
+                str_sa, obj, slice_address = self.batch_target(descriptor, command.attrib_address)
+                if not (obj is self):
+                    nested_commands.setdefault(id(obj), (obj, []))[1].append(
+                        ComplexAttributeManagementCommand(command.command, slice_address, command.value))
+                    continue
+            assert isinstance(str_sa, StrSingleAttribute)
+            descriptor.input_value(str_sa, command.value)
+            for dependent_name in self.attr_schema.dependents.get(attr_name, ()):
+                if dependent_name in self.suggestions:
+                    self.suggestions[dependent_name].invalidate()
+            inputs[str_sa] = descriptor
+            touched[descriptor.name] = descriptor
+        for str_sa, descriptor in inputs.items():
+            descriptor.complete_input(self, str_sa)
+        for descriptor in touched.values():
+            descriptor.dependents_handling(self)
+        for obj, obj_commands in nested_commands.values():
+            obj.apply_batch(obj_commands)
+
+    def batch_target(self, descriptor: AttributeAccessRulesDescriptor, address: AttributeAddress) -> \
+            tuple[Optional[SingleAttribute], PpoObject, AttributeAddress]:
+        """ list elements up to addressed one are appended to stored attribute """
+        descriptor.materialized(self)
+        cycle_named_attr, single_attrib, obj, slice_address = cyclic_find(self, address, True)
+        if (single_attrib is None) and (obj is self):
+            index = slice_address.attribute_indexes[0].index
+            while cycle_named_attr.sa_count <= index:
+                descriptor.new_stored_attr_operations(self, cycle_named_attr)
+            cycle_named_attr, single_attrib, obj, slice_address = cyclic_find(self, address, True)
+        return single_attrib, obj, slice_address
 
 
 class PpoObject2i(PpoObject):
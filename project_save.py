@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import secrets
+import shutil
+import stat
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Any
+
+from config import FILE_NAME_TO_CLASSES
+from export_engine import ExportSummary, GroupExport, MANIFEST_FILE_NAME, snapshot_group, write_group, \
+    output_file_name, read_manifest, write_manifest, manifest_entry, file_sha256
+
+
+class ProjectSaveError(Exception):
+    """ project was not saved, target directory is left as it was """
+    def __init__(self, message: str, summary: ProjectSaveSummary):
+        super().__init__(message)
+        self.summary = summary
+
+
+@dataclass
+class ProjectSaveSummary(ExportSummary):
+    fsync_time: float = 0.
+    swap_time: float = 0.
+
+    def to_dict(self) -> dict:
+        d = super().to_dict()
+        d.update({"fsync_time": self.fsync_time, "swap_time": self.swap_time})
+        return d
+
+    def __str__(self):
+        lines = super().__str__().split("\n")
+        lines[0] = "Saved {} objects, {} files to {} in {:.3f} s, snapshot {:.3f} s, fsync {:.3f} s, swap {:.3f} s"\
+            .format(self.objects_count, len(self.groups), self.directory, self.total_time, self.snapshot_time,
+                    self.fsync_time, self.swap_time)
+        return "\n".join(lines)
+
+
+def fsync_file(file_path: str):
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_directory(directory: str):
+    """ makes renames in directory durable, directories cannot be opened for fsync on some platforms """
+    try:
+        fsync_file(directory)
+    except OSError:
+        pass
+
+
+def sibling_path(directory: str, kind: str) -> str:
+    """ not existing hidden path next to directory, e.g. .station.staging-1f2e3d4c """
+    parent, name = os.path.split(directory)
+    while True:
+        path = os.path.join(parent, ".{}.{}-{}".format(name, kind, secrets.token_hex(4)))
+        if not os.path.lexists(path):
+            return path
+
+
+def make_staging_directory(directory: str) -> str:
+    """ staging directory gets mode of target directory, or default mode of new directory if there is no target,
+        so swapped in project is not left with 0700 of mkdtemp """
+    staging = sibling_path(directory, "staging")
+    os.mkdir(staging, 0o777)
+    if os.path.isdir(directory):
+        os.chmod(staging, stat.S_IMODE(os.stat(directory).st_mode))
+    return staging
+
+
+def check_project_directory(directory: str, summary: ProjectSaveSummary):
+    """ whole target directory is replaced, so only directory made of plain files, like config directory,
+        is accepted, directories with subdirectories or links are refused """
+    if not os.path.lexists(directory):
+        return
+    if not os.path.isdir(directory) or os.path.islink(directory):
+        raise ProjectSaveError("{} is not a directory".format(directory), summary)
+    for entry in os.scandir(directory):
+        if not entry.is_file(follow_symlinks=False):
+            raise ProjectSaveError("{} is not a project directory, it has {}".format(directory, entry.name),
+                                   summary)
+
+
+def preserve_files(directory: str, staging: str, produced_names: set[str]) -> list[str]:
+    """ top level files of target directory not produced by save are copied into staging directory,
+        so swap does not lose files user keeps next to config, returns preserved names """
+    preserved = []
+    if not os.path.isdir(directory):
+        return preserved
+    for entry in os.scandir(directory):
+        if entry.name not in produced_names:
+            shutil.copy2(entry.path, os.path.join(staging, entry.name))
+            preserved.append(entry.name)
+    return preserved
+
+
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+_libc = None
+
+
+def exchange_paths(path_1: str, path_2: str) -> bool:
+    """ atomic exchange of two existing paths by renameat2 RENAME_EXCHANGE (Linux 3.15+, glibc 2.28+),
+        returns False if platform or filesystem does not support it """
+    global _libc
+    if not hasattr(os, "uname") or os.uname().sysname != "Linux":
+        return False
+    if _libc is None:
+        _libc = ctypes.CDLL(None, use_errno=True)
+    renameat2 = getattr(_libc, "renameat2", None)
+    if renameat2 is None:
+        return False
+    if renameat2(AT_FDCWD, os.fsencode(path_1), AT_FDCWD, os.fsencode(path_2), RENAME_EXCHANGE) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP):
+        return False
+    raise OSError(error, os.strerror(error), path_1)
+
+
+def swap_directory(staging: str, directory: str):
+    """ staging directory takes place of target directory:
+        - where RENAME_EXCHANGE is supported both are exchanged atomically, target path always has a project
+        - otherwise old directory is renamed aside and staging one renamed to target, old one is restored if second
+          rename fails, but after a crash between two renames target path is missing and old project stays
+          in .<name>.old-* next to it """
+    parent = os.path.dirname(directory)
+    if not os.path.exists(directory):
+        os.rename(staging, directory)
+    elif exchange_paths(staging, directory):
+        shutil.rmtree(staging, ignore_errors=True)  # old project now
+    else:
+        backup = sibling_path(directory, "old")
+        os.rename(directory, backup)
+        try:
+            os.rename(staging, directory)
+        except BaseException:
+            os.rename(backup, directory)
+            raise
+        fsync_directory(parent)
+        shutil.rmtree(backup, ignore_errors=True)
+        return
+    fsync_directory(parent)
+
+
+def save_project(objects_tree: OrderedDict[str, OrderedDict[str, Any]], directory: str,
+                 export_format: str = "json", compact: bool = False,
+                 extra_files: Iterable[str] = ()) -> ProjectSaveSummary:
+    """ all file groups, extra files (template sources) and manifest are written to staging directory next to
+        target one, synced by one batch of fsyncs and swapped in (see swap_directory for crash guarantees),
+        target must be missing or contain only files, raises ProjectSaveError or OSError if project was not saved """
+    start = time.perf_counter()
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    compact = compact and (export_format == "json")
+    summary = ProjectSaveSummary(directory)
+    snapshots = [snapshot_group(objects_tree, file_name) for file_name in FILE_NAME_TO_CLASSES]
+    summary.snapshot_time = time.perf_counter() - start
+
+    extra_files = [os.path.abspath(file_path) for file_path in extra_files]
+    produced_names = {output_file_name(snapshot.file_name, export_format) for snapshot in snapshots}
+    produced_names.update(os.path.basename(file_path) for file_path in extra_files)
+    produced_names.add(MANIFEST_FILE_NAME)
+
+    check_project_directory(directory, summary)
+    os.makedirs(parent, exist_ok=True)
+    staging = make_staging_directory(directory)
+    try:
+        old_manifest = read_manifest(directory)
+        preserved = preserve_files(directory, staging, produced_names)
+        manifest = {name: old_manifest[name] for name in preserved if name in old_manifest}
+        written_paths = [os.path.join(staging, name) for name in preserved]
+        for snapshot in snapshots:
+            group = write_group(snapshot, staging, None, export_format, compact)
+            summary.groups.append(group)
+            if group.error:
+                raise ProjectSaveError("{} was not written: {}".format(group.file_name, group.error), summary)
+            manifest[output_file_name(group.file_name, export_format)] = group.manifest_entry
+            written_paths.append(os.path.join(staging, output_file_name(group.file_name, export_format)))
+        for file_path in extra_files:
+            group_start = time.perf_counter()
+            staged_path = os.path.join(staging, os.path.basename(file_path))
+            shutil.copy2(file_path, staged_path)
+            manifest[os.path.basename(file_path)] = manifest_entry(staged_path, file_sha256(staged_path), 0)
+            written_paths.append(staged_path)
+            summary.groups.append(GroupExport(os.path.basename(file_path), 0,
+                                              write_time=time.perf_counter() - group_start))
+        write_manifest(staging, manifest)
+        written_paths.append(os.path.join(staging, MANIFEST_FILE_NAME))
+
+        fsync_start = time.perf_counter()
+        for file_path in written_paths:
+            fsync_file(file_path)
+        fsync_directory(staging)
+        summary.fsync_time = time.perf_counter() - fsync_start
+
+        swap_start = time.perf_counter()
+        swap_directory(staging, directory)
+        summary.swap_time = time.perf_counter() - swap_start
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    summary.total_time = time.perf_counter() - start
+    return summary
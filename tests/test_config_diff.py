@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+
+from conftest import CONFIG_EXAMPLES
+from attribute_management import AttributeAddress
+from config_diff import diff_configs
+
+
+def copy_station(tmp_path, station: str = "ribatskoe_json") -> str:
+    directory = str(tmp_path / station)
+    shutil.copytree(os.path.join(CONFIG_EXAMPLES, station), directory)
+    return directory
+
+
+def edit_group(directory: str, file_name: str, edit):
+    file_path = os.path.join(directory, file_name)
+    with open(file_path) as read_file:
+        obj_jsons = json.load(read_file)
+    edit(obj_jsons)
+    with open(file_path, "w") as write_file:
+        json.dump(obj_jsons, write_file)
+
+
+def test_same_config_is_empty(tmp_path):
+    directory = copy_station(tmp_path)
+    assert diff_configs(os.path.join(CONFIG_EXAMPLES, "ribatskoe_json"), directory).is_empty
+
+
+def test_attribute_changes(tmp_path):
+    directory = copy_station(tmp_path)
+
+    def edit(obj_jsons):
+        obj_jsons[0]["data"]["delayOpenSignalShRoute"] = 5
+        obj_jsons[0]["data"]["startWarningArea"] = {"obj": "X"}
+
+    edit_group(directory, "TObjectsSignal.json", edit)
+    interned_count = len(AttributeAddress._interned)
+    diff = diff_configs(os.path.join(CONFIG_EXAMPLES, "ribatskoe_json"), directory)
+    assert len(AttributeAddress._interned) == interned_count
+    assert [change.address for change in diff.changed[0].changes] == [(("delayOpenSignalShRoute", 0),),
+                                                                      (("startWarningArea", 0), ("obj", 0))]
+    assert diff.to_dict()["changed"][0]["changes"][1]["address"] == [["startWarningArea", 0], ["obj", 0]]
+
+
+def test_repeated_class_and_tag_are_compared(tmp_path):
+    old_directory = copy_station(tmp_path / "old")
+    new_directory = copy_station(tmp_path / "new")
+    duplicate = {"class": "PpoTrainSignal", "tag": "N6", "data": {"id": "N6"}}
+    edit_group(old_directory, "TObjectsSignal.json", lambda obj_jsons: obj_jsons.append(dict(duplicate)))
+    changed_duplicate = dict(duplicate, data={"id": "N6_changed"})
+    edit_group(new_directory, "TObjectsSignal.json", lambda obj_jsons: obj_jsons.append(changed_duplicate))
+    diff = diff_configs(old_directory, new_directory)
+    assert not diff.is_empty
+    assert [(change.tag, change.occurrence) for change in diff.changed] == [("N6", 1)]
+
+    edit_group(new_directory, "TObjectsSignal.json", lambda obj_jsons: obj_jsons.pop())
+    diff = diff_configs(old_directory, new_directory)
+    assert [(obj.tag, obj.data) for obj in diff.removed] == [("N6", {"id": "N6"})]
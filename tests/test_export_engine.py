@@ -0,0 +1,80 @@
+import gc
+import os
+import stat
+import weakref
+
+import export_engine
+from export_engine import ExportEngine, MANIFEST_FILE_NAME
+from config import FILE_NAME_TO_CLASSES
+from nv_oh import ObjectsHandler
+
+
+def make_station() -> ObjectsHandler:
+    oh = ObjectsHandler()
+    oh.auto_add_io = False
+    for i in range(20):
+        oh.init_object("PpoTrackSection", "S{}".format(i))
+    return oh
+
+
+def file_mode(file_path: str) -> int:
+    return stat.S_IMODE(os.stat(file_path).st_mode)
+
+
+def test_exported_files_mode(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        engine = ExportEngine()
+        engine.export(make_station().objects_tree, FILE_NAME_TO_CLASSES, str(tmp_path))
+        engine.wait()
+    finally:
+        os.umask(umask)
+    for file_name in os.listdir(tmp_path):
+        assert file_mode(os.path.join(tmp_path, file_name)) == 0o644, file_name
+    assert MANIFEST_FILE_NAME in os.listdir(tmp_path)
+
+
+def test_worker_error_does_not_leave_engine_busy(tmp_path, monkeypatch):
+    def failing_write_group(snapshot, *args):
+        raise KeyError(snapshot.file_name)
+
+    monkeypatch.setattr(export_engine, "write_group", failing_write_group)
+    summaries = []
+    engine = ExportEngine()
+    engine.export(make_station().objects_tree, FILE_NAME_TO_CLASSES, str(tmp_path), finished=summaries.append)
+    engine.wait()
+    assert not engine.busy
+    assert len(summaries) == 1
+    assert len(summaries[0].failed) == len(FILE_NAME_TO_CLASSES)
+
+
+def test_busy_engine_rejects_export(tmp_path, monkeypatch):
+    oh = make_station()
+    oh.export_directory = str(tmp_path)
+    monkeypatch.setattr(ExportEngine, "busy", property(lambda self: True))
+    reasons = []
+    oh.export_rejected.connect(reasons.append)
+    assert oh.generate_all_files() is None
+    assert reasons == ["previous export is not finished"]
+    assert not os.listdir(tmp_path)
+
+
+def test_cleared_objects_are_not_kept_by_engine(tmp_path):
+    oh = make_station()
+    oh.export_directory = str(tmp_path)
+    oh.generate_all_files()
+    oh.export_engine.wait()
+    obj_ref = weakref.ref(oh.objects_tree["PpoTrackSection"]["S0"])
+
+    oh.clear_objects()
+    gc.collect()
+    assert obj_ref() is None
+
+
+def test_forget_during_export(tmp_path):
+    oh = make_station()
+    engine = ExportEngine()
+    engine.export(oh.objects_tree, FILE_NAME_TO_CLASSES, str(tmp_path))
+    engine.forget()
+    engine.wait()
+    assert not engine._exported_states
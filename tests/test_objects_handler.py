@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from attribute_address_access import set_str_attr, stored_str_attr
+from attribute_management import AttributeAddress
+from conftest import CONFIG_EXAMPLES
+from nv_oh import ObjectsHandler, expand_config_paths
+
+
+def load_station(station: str, check_indexes: bool = True) -> ObjectsHandler:
+    oh = ObjectsHandler()
+    oh.check_indexes = check_indexes
+    for file_name in expand_config_paths([os.path.join(CONFIG_EXAMPLES, station)]):
+        with open(file_name) as read_file:
+            for d in json.load(read_file):
+                oh.make_ppo_obj_from_dict(d)
+    return oh
+
+
+def classes_with_name(oh: ObjectsHandler, name: str) -> list[str]:
+    return [cls_name for cls_name in oh.objects_tree if name in oh.objects_tree[cls_name]]
+
+
+@pytest.mark.parametrize("station", ["ribatskoe_json", "novosokol_json"])
+def test_load_with_index_checks(station):
+    oh = load_station(station)
+    oh.check_indexes_consistency()
+
+
+@pytest.mark.parametrize("name", ["CHDR", "CHKGP", "DGA"])
+def test_name_in_several_classes(name):
+    oh = load_station("ribatskoe_json")
+    cls_names = classes_with_name(oh, name)
+    assert len(cls_names) > 1
+    # lookup by name gives object of the last class, as full rebuild of name dict did
+    assert oh.obj_name_to_cls_name_dict[name] == cls_names[-1]
+    assert oh.name_to_obj_dict[name] is oh.objects_tree[cls_names[-1]][name]
+
+    oh.got_remove_object_request(name)
+    assert classes_with_name(oh, name) == cls_names[:-1]
+    assert oh.obj_name_to_cls_name_dict[name] == cls_names[-2]
+    oh.check_indexes_consistency()
+
+    for _ in cls_names[:-1]:
+        oh.got_remove_object_request(name)
+    assert not classes_with_name(oh, name)
+    assert name not in oh.name_to_obj_dict
+    oh.check_indexes_consistency()
+
+
+@pytest.mark.parametrize("address, suggestion", [([["pointsMonitoring", 0]], "STRELKI"),
+                                                 ([["additionalGuardLock", 0], ["position", 0]], "")])
+def test_get_suggested_value(address, suggestion):
+    oh = load_station("ribatskoe_json", check_indexes=False)
+    oh.got_object_name(next(iter(oh.objects_tree["PpoPoint"])))
+    attr_address = AttributeAddress.from_list(address)
+    set_str_attr(oh.current_object, "", attr_address)
+
+    oh.get_suggested_value(address)
+    str_attr = stored_str_attr(oh.current_object, attr_address)
+    assert not str_attr.needs_in_suggestion  # flag was set on stored attribute and used by suggestion
+    assert str_attr.displaying_value == suggestion
+
+
+@pytest.mark.parametrize("name, cls_name, attr_name", [("CHDR", "PpoAdjacentStationTrainSignalRi", "addrKI_SNP"),
+                                                       ("DGA", "PpoGeneralPurposeRelayInput", "inputAddr")])
+def test_validate_addresses_of_all_objects(name, cls_name, attr_name, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    oh = load_station("ribatskoe_json", check_indexes=False)
+    # object is not the one found by name, other class has object with the same name
+    assert oh.obj_name_to_cls_name_dict[name] != cls_name
+    attr_address = AttributeAddress.from_list([[attr_name, 0]])
+    set_str_attr(oh.objects_tree[cls_name][name], "USO:1", attr_address)
+
+    report = oh.validate_addresses()
+    assert (name, [[attr_name, 0]], "USO:1") in [(item.tag, item.address.to_list(), item.value)
+                                                 for item in report.malformed]
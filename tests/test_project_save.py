@@ -0,0 +1,100 @@
+import os
+import stat
+
+import pytest
+
+import project_save
+from project_save import ProjectSaveError, exchange_paths, save_project
+from config import FILE_NAME_TO_CLASSES
+from export_engine import MANIFEST_FILE_NAME
+from nv_oh import ObjectsHandler
+
+
+def make_station() -> ObjectsHandler:
+    oh = ObjectsHandler()
+    oh.auto_add_io = False
+    for i in range(20):
+        oh.init_object("PpoTrackSection", "S{}".format(i))
+    return oh
+
+
+def file_mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def directory_files(directory) -> dict[str, bytes]:
+    result = {}
+    for name in os.listdir(directory):
+        with open(os.path.join(directory, name), "rb") as read_file:
+            result[name] = read_file.read()
+    return result
+
+
+@pytest.fixture
+def umask_022():
+    umask = os.umask(0o022)
+    yield
+    os.umask(umask)
+
+
+def test_save_keeps_modes_and_user_files(tmp_path, umask_022):
+    directory = tmp_path / "station"
+    directory.mkdir(mode=0o750)
+    os.chmod(directory, 0o750)
+    (directory / "notes.txt").write_text("keep")
+    summary = save_project(make_station().objects_tree, str(directory))
+    assert file_mode(directory) == 0o750
+    names = os.listdir(directory)
+    assert len(names) == len(FILE_NAME_TO_CLASSES) + 2
+    for name in names:
+        assert file_mode(directory / name) == 0o644, name
+    assert (directory / "notes.txt").read_text() == "keep"
+    assert os.stat(directory / "notes.txt").st_nlink == 1
+    assert MANIFEST_FILE_NAME in names
+    assert len(summary.groups) == len(FILE_NAME_TO_CLASSES)
+    assert [name for name in os.listdir(tmp_path) if name.startswith(".")] == []
+
+
+def test_new_directory_mode(tmp_path, umask_022):
+    directory = tmp_path / "new_station"
+    save_project(make_station().objects_tree, str(directory))
+    assert file_mode(directory) == 0o755
+
+
+def test_directory_with_subdirectory_is_refused(tmp_path):
+    directory = tmp_path / "output"
+    (directory / "config").mkdir(parents=True)
+    with pytest.raises(ProjectSaveError):
+        save_project(make_station().objects_tree, str(directory))
+    assert os.listdir(directory) == ["config"]
+    assert os.listdir(tmp_path) == ["output"]
+
+
+def test_failed_group_leaves_target_untouched(tmp_path, monkeypatch):
+    directory = str(tmp_path / "station")
+    oh = make_station()
+    save_project(oh.objects_tree, directory)
+    before = directory_files(directory)
+    write_group = project_save.write_group
+
+    def failing_write_group(snapshot, *args):
+        result = write_group(snapshot, *args)
+        result.error = "failed"
+        return result
+
+    monkeypatch.setattr(project_save, "write_group", failing_write_group)
+    oh.init_object("PpoTrackSection", "S_new")
+    with pytest.raises(ProjectSaveError):
+        save_project(oh.objects_tree, directory)
+    assert directory_files(directory) == before
+    assert os.listdir(tmp_path) == ["station"]
+
+
+def test_exchange_paths(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "1").write_text("a")
+    (tmp_path / "b").mkdir()
+    if not exchange_paths(str(tmp_path / "a"), str(tmp_path / "b")):
+        pytest.skip("RENAME_EXCHANGE is not supported here")
+    assert os.listdir(tmp_path / "b") == ["1"]
+    assert os.listdir(tmp_path / "a") == []
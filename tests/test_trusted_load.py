@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+from conftest import CONFIG_EXAMPLES
+from config import FILE_NAME_TO_CLASSES
+from export_engine import group_objects
+from nv_oh import ObjectsHandler, expand_config_paths
+
+
+def load_station(station: str, trusted: bool) -> ObjectsHandler:
+    oh = ObjectsHandler()
+    oh.trusted_load = trusted
+    for file_name in expand_config_paths([os.path.join(CONFIG_EXAMPLES, station)]):
+        with open(file_name) as read_file:
+            for d in json.load(read_file):
+                oh.make_ppo_obj_from_dict(d)
+    return oh
+
+
+def file_output(oh: ObjectsHandler) -> dict[str, list[dict]]:
+    return {file_name: [obj.to_json_dict(True, True) for obj in group_objects(oh.objects_tree, file_name)]
+            for file_name in FILE_NAME_TO_CLASSES}
+
+
+@pytest.mark.parametrize("station", ["ribatskoe_json", "novosokol_json"])
+def test_trusted_and_command_load_follow_same_edits(station):
+    command_oh = load_station(station, False)
+    trusted_oh = load_station(station, True)
+    assert file_output(trusted_oh) == file_output(command_oh)
+
+    names = list(command_oh.name_to_obj_dict)[:200]
+    for oh in (command_oh, trusted_oh):
+        for name in names:
+            if name in oh.name_to_obj_dict:
+                oh.rename_object(name, name + "_zz")
+    assert file_output(trusted_oh) == file_output(command_oh)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping
+
+from config import TPL_TO_OBJ_ID
+from xml_records import SourceEntry
+
+
+def entries_to_dicts(entries: list[SourceEntry]) -> list[dict]:
+    return [{"type": entry.type_, "tag": entry.tag, "line": entry.line} for entry in entries]
+
+
+@dataclass
+class TypeMismatch:
+    tag: str
+    tpl_entries: list[SourceEntry]
+    obj_id_entries: list[SourceEntry]
+
+
+@dataclass
+class Duplicate:
+    tag: str
+    entries: list[SourceEntry]
+
+
+@dataclass
+class ReconciliationReport:
+    missing_in_obj_id: list[SourceEntry] = field(default_factory=list)  # tpl entries
+    missing_in_tpl: list[SourceEntry] = field(default_factory=list)  # obj id entries
+    type_mismatches: list[TypeMismatch] = field(default_factory=list)
+    tpl_duplicates: list[Duplicate] = field(default_factory=list)
+    obj_id_duplicates: list[Duplicate] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.missing_in_obj_id or self.missing_in_tpl or self.type_mismatches or
+                    self.tpl_duplicates or self.obj_id_duplicates)
+
+    def to_dict(self) -> dict:
+        return {"missing_in_obj_id": entries_to_dicts(self.missing_in_obj_id),
+                "missing_in_tpl": entries_to_dicts(self.missing_in_tpl),
+                "type_mismatches": [{"tag": mismatch.tag,
+                                     "tpl": entries_to_dicts(mismatch.tpl_entries),
+                                     "obj_id": entries_to_dicts(mismatch.obj_id_entries)}
+                                    for mismatch in self.type_mismatches],
+                "tpl_duplicates": [{"tag": duplicate.tag, "entries": entries_to_dicts(duplicate.entries)}
+                                   for duplicate in self.tpl_duplicates],
+                "obj_id_duplicates": [{"tag": duplicate.tag, "entries": entries_to_dicts(duplicate.entries)}
+                                      for duplicate in self.obj_id_duplicates]}
+
+    def to_json_file(self, file_name: str):
+        with open(file_name, "w") as write_file:
+            json.dump(self.to_dict(), write_file, indent=4)
+
+    def __str__(self):
+        lines = ["Differences between tpl and objects_id"]
+        lines.append("Missing in objects_id:")
+        lines.extend("    {} {} (tpl line {})".format(entry.type_, entry.tag, entry.line)
+                     for entry in self.missing_in_obj_id)
+        lines.append("Missing in tpl:")
+        lines.extend("    {} {} (objects_id line {})".format(entry.type_, entry.tag, entry.line)
+                     for entry in self.missing_in_tpl)
+        lines.append("Type mismatches:")
+        for mismatch in self.type_mismatches:
+            lines.append("    {}: tpl {}, objects_id {}".format(
+                mismatch.tag,
+                ", ".join("{} (line {})".format(entry.type_, entry.line) for entry in mismatch.tpl_entries),
+                ", ".join("{} (line {})".format(entry.type_, entry.line) for entry in mismatch.obj_id_entries)))
+        for side, duplicates in [("tpl", self.tpl_duplicates), ("objects_id", self.obj_id_duplicates)]:
+            lines.append("Duplicates in {}:".format(side))
+            for duplicate in duplicates:
+                lines.append("    {}: lines {}".format(duplicate.tag,
+                                                      ", ".join(str(entry.line) for entry in duplicate.entries)))
+        return "\n".join(lines)
+
+
+def group_by_tag(entries: Iterable[SourceEntry]) -> dict[str, list[SourceEntry]]:
+    result: dict[str, list[SourceEntry]] = {}
+    for entry in entries:
+        if entry.tag in result:
+            result[entry.tag].append(entry)
+        else:
+            result[entry.tag] = [entry]
+    return result
+
+
+def reconcile(tpl_entries: Iterable[SourceEntry], obj_id_entries: Iterable[SourceEntry],
+              tpl_to_obj_id: Mapping[str, str] = TPL_TO_OBJ_ID) -> ReconciliationReport:
+    """ linear time comparison, only tpl types from tpl_to_obj_id and their obj id types are reconciled """
+    report = ReconciliationReport()
+    tpl_by_tag = group_by_tag(tpl_entries)
+    obj_id_by_tag = group_by_tag(obj_id_entries)
+    obj_id_types = set(tpl_to_obj_id.values())
+
+    for tag, entries in tpl_by_tag.items():
+        if len(entries) > 1:
+            report.tpl_duplicates.append(Duplicate(tag, entries))
+        for entry in entries:
+            if entry.type_ not in tpl_to_obj_id:
+                continue
+            expected_type = tpl_to_obj_id[entry.type_]
+            obj_id_tag_entries = obj_id_by_tag.get(tag, [])
+            if any(obj_id_entry.type_ == expected_type for obj_id_entry in obj_id_tag_entries):
+                continue
+            if obj_id_tag_entries:
+                report.type_mismatches.append(TypeMismatch(tag, [entry], obj_id_tag_entries))
+            else:
+                report.missing_in_obj_id.append(entry)
+
+    for tag, entries in obj_id_by_tag.items():
+        if len(entries) > 1:
+            report.obj_id_duplicates.append(Duplicate(tag, entries))
+        tpl_tag_entries = tpl_by_tag.get(tag, [])
+        tpl_tag_types = {tpl_to_obj_id.get(tpl_entry.type_) for tpl_entry in tpl_tag_entries}
+        for entry in entries:
+            if (entry.type_ not in obj_id_types) or (entry.type_ in tpl_tag_types):
+                continue
+            if not tpl_tag_entries:
+                report.missing_in_tpl.append(entry)
+            elif tpl_tag_types == {None}:
+                # tpl types out of comparison, otherwise mismatch is already reported from tpl side
+                report.type_mismatches.append(TypeMismatch(tag, tpl_tag_entries, [entry]))
+    return report
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from custom_enum import CustomEnum
+
+
+class TreeDeltaKind(CustomEnum):
+    added = 0
+    removed = 1
+    renamed = 2
+    moved = 3
+
+
+@dataclass
+class ObjectsTreeDelta:
+    """ single change of objects tree, position is row index of added object in its class at moment of change,
+        removed, renamed and moved objects are found in view by class and name """
+    kind: int  # TreeDeltaKind
+    cls_name: str
+    obj_name: str
+    position: int = -1  # added
+    new_obj_name: str = ""  # renamed
+    new_cls_name: str = ""  # moved
+    new_position: int = -1  # moved
+
+
+def touches_classes(delta: ObjectsTreeDelta, cls_names: set[str]) -> bool:
+    return (delta.cls_name in cls_names) or (delta.new_cls_name in cls_names)
+
+
+def compress_tree_deltas(deltas: list[ObjectsTreeDelta]) -> list[ObjectsTreeDelta]:
+    """ folds renames of just added objects into additions,
+        then replaces removal and addition of same name in other class by one moved delta """
+    folded: list[ObjectsTreeDelta] = []
+    added_indexes: dict[tuple[str, str], int] = {}
+    for delta in deltas:
+        key = (delta.cls_name, delta.obj_name)
+        if delta.kind == TreeDeltaKind.renamed and key in added_indexes:
+            added_index = added_indexes.pop(key)
+            folded[added_index].obj_name = delta.new_obj_name
+            added_indexes[(delta.cls_name, delta.new_obj_name)] = added_index
+            continue
+        if delta.kind == TreeDeltaKind.added:
+            added_indexes[key] = len(folded)
+        elif key in added_indexes:
+            added_indexes.pop(key)
+        folded.append(delta)
+
+    removed_indexes: dict[str, int] = {delta.obj_name: i for i, delta in enumerate(folded)
+                                       if delta.kind == TreeDeltaKind.removed}
+    skipped_indexes: set[int] = set()
+    for (cls_name, obj_name), added_index in added_indexes.items():
+        if obj_name not in removed_indexes:
+            continue
+        removed_index = removed_indexes.pop(obj_name)
+        removed_delta, added_delta = folded[removed_index], folded[added_index]
+        if removed_delta.cls_name == cls_name:
+            continue
+        first, last = sorted([removed_index, added_index])
+        cls_names = {removed_delta.cls_name, cls_name}
+        if any(touches_classes(folded[i], cls_names) for i in range(first + 1, last)):
+            continue
+        folded[last] = ObjectsTreeDelta(TreeDeltaKind.moved, removed_delta.cls_name, obj_name,
+                                        new_cls_name=cls_name, new_position=added_delta.position)
+        skipped_indexes.add(first)
+    return [delta for i, delta in enumerate(folded) if i not in skipped_indexes]
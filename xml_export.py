@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Any
+from xml.sax.saxutils import quoteattr
+
+from config import MAIN_CLASSES_TREE
+
+PPO_VERSION = "2.0"
+INDENT = "    "
+PARAMETERS_ELEMENT = "Parameters"
+INTERFACE_CLASS_NAMES = frozenset(cls_name for cls_names in MAIN_CLASSES_TREE["INTERFACE OBJECTS"].values()
+                                  for cls_name in cls_names)
+# objects kind: section element, object element
+INTERFACE_KIND = ("InterfaceObjects", "IObject")
+TECHNOLOGICAL_KIND = ("TechnologicalObjects", "TObject")
+
+
+def xml_name(file_attr_name: str) -> str:
+    """ PPO 2.0 element and attribute names start with capital letter: iObjTag - IObjTag """
+    return file_attr_name[:1].upper() + file_attr_name[1:]
+
+
+def object_kind(cls_name: str) -> tuple[str, str]:
+    return INTERFACE_KIND if cls_name in INTERFACE_CLASS_NAMES else TECHNOLOGICAL_KIND
+
+
+def attributes_str(items: Iterable[tuple[str, Any]]) -> str:
+    return "".join(" {}={}".format(xml_name(name), quoteattr(str(value))) for name, value in items)
+
+
+def split_data(data: dict) -> tuple[list[tuple[str, Any]], list[tuple[str, Any]]]:
+    """ scalar values are xml attributes, nested objects and list elements are child elements """
+    scalars, children = [], []
+    for name, value in data.items():
+        if isinstance(value, list):
+            children.extend((name, element) for element in value)
+        elif isinstance(value, dict):
+            children.append((name, value))
+        else:
+            scalars.append((name, value))
+    return scalars, children
+
+
+def iter_element_lines(name: str, value: Any, depth: int) -> Iterator[str]:
+    """ nested object is element with its scalars as attributes, scalar list element is element with Value """
+    indent = INDENT * depth
+    if not isinstance(value, dict):
+        yield "{}<{} Value={} />\n".format(indent, xml_name(name), quoteattr(str(value)))
+        return
+    scalars, children = split_data(value)
+    if not children:
+        yield "{}<{}{} />\n".format(indent, xml_name(name), attributes_str(scalars))
+        return
+    yield "{}<{}{}>\n".format(indent, xml_name(name), attributes_str(scalars))
+    for child_name, child_value in children:
+        yield from iter_element_lines(child_name, child_value, depth + 1)
+    yield "{}</{}>\n".format(indent, xml_name(name))
+
+
+def iter_object_lines(obj_json: dict, depth: int) -> Iterator[str]:
+    """ object is written from its file output dict, scalar attributes are gathered in Parameters element """
+    indent = INDENT * depth
+    element = object_kind(obj_json["class"])[1]
+    header = "{}<{} Type={} Tag={}".format(indent, element, quoteattr(obj_json["class"]),
+                                           quoteattr(str(obj_json["tag"])))
+    scalars, children = split_data(obj_json.get("data", {}))
+    if not (scalars or children):
+        yield header + " />\n"
+        return
+    yield header + ">\n"
+    if scalars:
+        yield "{}<{}{} />\n".format(INDENT * (depth + 1), PARAMETERS_ELEMENT, attributes_str(scalars))
+    for child_name, child_value in children:
+        yield from iter_element_lines(child_name, child_value, depth + 1)
+    yield "{}</{}>\n".format(indent, element)
+
+
+def iter_xml_chunks(obj_jsons: Iterable[dict]) -> Iterator[str]:
+    """ PPO 2.0 file text, one chunk per object, whole document tree is never built,
+        consecutive objects of one kind are written in one section """
+    yield '<?xml version="1.0" encoding="utf-8" ?>\n<PPO Version={}>\n'.format(quoteattr(PPO_VERSION))
+    section = None
+    for obj_json in obj_jsons:
+        obj_section = object_kind(obj_json["class"])[0]
+        if obj_section != section:
+            if section is not None:
+                yield "{}</{}>\n".format(INDENT, section)
+            yield "{}<{}>\n".format(INDENT, obj_section)
+            section = obj_section
+        yield "".join(iter_object_lines(obj_json, 2))
+    if section is not None:
+        yield "{}</{}>\n".format(INDENT, section)
+    yield "</PPO>\n"
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import sys
+from typing import Iterator, NamedTuple, Callable, Optional
+from xml.parsers import expat
+
+CONN_POINT_PREFIX = "ConnPnt"
+
+
+class SourceEntry(NamedTuple):
+    """ common head of file records, records of all files start with type_, tag and line """
+    type_: str
+    tag: str
+    line: int = 0
+
+
+class TplRecord(NamedTuple):
+    """ TObject of TPL, conn_points[i] is value of ConnPnt{i} or empty string """
+    type_: str
+    tag: str
+    line: int = 0
+    conn_points: tuple[str, ...] = ()
+
+
+class ObjectIdRecord(NamedTuple):
+    """ Obj of PpoObjectsId """
+    type_: str
+    tag: str
+    line: int = 0
+    name: str = ""
+    id_: int = 0
+    indent: int = 0
+    bit_size: int = 0
+
+
+def stream_parse(file_name: str, start_element: Callable[[expat.XMLParserType, int, str, dict[str, str]], None],
+                 end_element: Optional[Callable[[int, str], None]], records: list,
+                 chunk_size: int = 1 << 16) -> Iterator:
+    """ feeds file to expat by chunks and yields records collected by handlers after every chunk,
+        handlers get element depth (root is 1), encoding is taken from xml declaration """
+    depth = 0
+    parser = expat.ParserCreate()
+
+    def start_handler(name: str, attrs: dict[str, str]):
+        nonlocal depth
+        depth += 1
+        start_element(parser, depth, name, attrs)
+
+    def end_handler(name: str):
+        nonlocal depth
+        if end_element:
+            end_element(depth, name)
+        depth -= 1
+
+    parser.StartElementHandler = start_handler
+    parser.EndElementHandler = end_handler
+    with open(file_name, "rb") as f:
+        while chunk := f.read(chunk_size):
+            parser.Parse(chunk, False)
+            yield from records
+            records.clear()
+    parser.Parse(b"", True)
+    yield from records
+    records.clear()
+
+
+def iter_source_entries(file_name: str, chunk_size: int = 1 << 16) -> Iterator[SourceEntry]:
+    """ Type and Tag of root children with their line numbers """
+    entries: list[SourceEntry] = []
+
+    def start_element(parser: expat.XMLParserType, depth: int, name: str, attrs: dict[str, str]):
+        if depth == 2:
+            entries.append(SourceEntry(sys.intern(attrs["Type"]), attrs["Tag"], parser.CurrentLineNumber))
+
+    return stream_parse(file_name, start_element, None, entries, chunk_size)
+
+
+def conn_points_from_attrs(attrs: dict[str, str]) -> tuple[str, ...]:
+    points: dict[int, str] = {int(key[len(CONN_POINT_PREFIX):]): value for key, value in attrs.items()
+                              if key.startswith(CONN_POINT_PREFIX)}
+    if not points:
+        return ()
+    return tuple(points.get(i, "") for i in range(max(points) + 1))
+
+
+def iter_tpl_records(file_name: str, chunk_size: int = 1 << 16) -> Iterator[TplRecord]:
+    records: list[TplRecord] = []
+    current: Optional[TplRecord] = None
+
+    def start_element(parser: expat.XMLParserType, depth: int, name: str, attrs: dict[str, str]):
+        nonlocal current
+        if depth == 2:
+            current = TplRecord(sys.intern(attrs["Type"]), attrs["Tag"], parser.CurrentLineNumber)
+        elif depth == 3 and name == "TopologicalLinks":
+            current = current._replace(conn_points=conn_points_from_attrs(attrs))
+
+    def end_element(depth: int, name: str):
+        nonlocal current
+        if depth == 2:
+            records.append(current)
+            current = None
+
+    return stream_parse(file_name, start_element, end_element, records, chunk_size)
+
+
+def iter_obj_id_records(file_name: str, chunk_size: int = 1 << 16) -> Iterator[ObjectIdRecord]:
+    records: list[ObjectIdRecord] = []
+
+    def start_element(parser: expat.XMLParserType, depth: int, name: str, attrs: dict[str, str]):
+        if depth == 2:
+            records.append(ObjectIdRecord(sys.intern(attrs["Type"]), attrs["Tag"], parser.CurrentLineNumber,
+                                          attrs.get("Name", ""), int(attrs.get("Id", 0)),
+                                          int(attrs.get("Indent", 0)), int(attrs.get("BitSize", 0))))
+
+    return stream_parse(file_name, start_element, None, records, chunk_size)